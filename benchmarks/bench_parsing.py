@@ -0,0 +1,85 @@
+"""Benchmark of the parsing and the preprocessing of the API responses.
+
+Compares, on large synthetic responses:
+- the previous path, decoding the JSON then validating each entry with `WordEntry(**entry)`,
+- the fast path validating the raw bytes with the cached TypeAdapter,
+- the fast path with the filters pushed down into the validation.
+
+Usage:
+    poetry run python -m benchmarks.bench_parsing --entries 20 --translations 30 --repeat 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Callable
+
+from trankil.config import PreprocessingSettings
+from trankil.models.word_entry import WordEntry, parse_word_entries
+from trankil.preprocessing.preprocessing import preprocess_translations
+from trankil.synthetic import synthetic_response
+
+RULES = PreprocessingSettings()
+
+
+def decode_then_validate(raw: bytes) -> list[WordEntry]:
+    return preprocess_translations([[WordEntry(**entry) for entry in json.loads(raw)]])
+
+
+def validate_json(raw: bytes) -> list[WordEntry]:
+    return preprocess_translations([parse_word_entries(raw)])
+
+
+def validate_json_push_down(raw: bytes) -> list[WordEntry]:
+    return preprocess_translations([parse_word_entries(raw, RULES)], RULES)
+
+
+def measure(
+    parse: Callable[[bytes], list[WordEntry]], raw: bytes, repeat: int
+) -> tuple[float, int]:
+    """Returns the best time of a parsing, in seconds, and its peak of allocated memory."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(raw)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    parse(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20)
+    parser.add_argument("--translations", type=int, default=30)
+    parser.add_argument("--examples", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    raw = json.dumps(
+        synthetic_response("benchmark", args.entries, args.translations, args.examples, seed=0)
+    ).encode()
+    assert decode_then_validate(raw) == validate_json(raw) == validate_json_push_down(raw)
+
+    print(f"Response of {len(raw) / 1024:.0f} KiB, best of {args.repeat} runs")
+    results = {
+        "json.loads + WordEntry(**entry)": measure(decode_then_validate, raw, args.repeat),
+        "TypeAdapter.validate_json": measure(validate_json, raw, args.repeat),
+        "validate_json + filter push-down": measure(validate_json_push_down, raw, args.repeat),
+    }
+    reference = results["json.loads + WordEntry(**entry)"][0]
+    for name, (seconds, peak) in results.items():
+        print(
+            f"{name:<34} {seconds * 1000:8.2f} ms  x{reference / seconds:5.2f}"
+            f"  peak {peak / 1024:8.0f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark of the startup time of the command line interface.
+
+Runs the commands in new interpreters with `-X importtime`, and reports the best wall time
+of each command (above the startup of a bare interpreter), the total import time and the
+slowest imports.
+
+Usage:
+    poetry run python -m benchmarks.bench_startup --repeat 10 status "export --help"
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from trankil.work_queue import WorkQueue
+
+# The commands run outside of the repository, trankil is imported from its root.
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def run_command(args: list[str], cwd: str) -> tuple[float, str]:
+    """Runs a Python command and returns its wall time and its stderr.
+
+    Raises
+    ------
+    RuntimeError
+        If the command fails, its wall time would not measure the startup.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in (str(REPO_ROOT), env.get("PYTHONPATH")) if path
+    )
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    seconds = time.perf_counter() - start
+    if result.returncode != 0:
+        errors = result.stdout.splitlines() + [
+            line for line in result.stderr.splitlines() if not line.startswith("import time:")
+        ]
+        raise RuntimeError(
+            f"`python {' '.join(args)}` failed with the exit code {result.returncode}:\n"
+            + "\n".join(errors[-10:])
+        )
+    return seconds, result.stderr
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """Parses the output of `-X importtime`.
+
+    Returns
+    -------
+    list[tuple[str, int, int]]
+        Module names, indented by import depth, with their own and cumulative import times,
+        in microseconds.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        imports.append((name.rstrip()[1:], int(self_us), int(cumulative_us)))
+    return imports
+
+
+def measure(args: list[str], repeat: int, cwd: str) -> tuple[float, list[tuple[str, int, int]]]:
+    """Returns the best wall time of a command and the imports of its fastest run."""
+    best, best_stderr = float("inf"), ""
+    for _ in range(repeat):
+        seconds, stderr = run_command(args, cwd)
+        if seconds < best:
+            best, best_stderr = seconds, stderr
+    return best, parse_importtime(best_stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("commands", nargs="*", default=["status", "--help", "export --help"])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports shown.")
+    args = parser.parse_args()
+
+    # The commands run in a scratch folder, so they do not touch the local outputs. It holds
+    # an empty work queue for the status command.
+    with tempfile.TemporaryDirectory(prefix="trankil-startup-") as cwd:
+        WorkQueue(Path(cwd) / "outputs" / "fr_en" / "queue.sqlite").close()
+        bare, _ = measure(["-c", "pass"], args.repeat, cwd)
+        print(f"Bare interpreter: {bare * 1000:.1f} ms, best of {args.repeat} runs")
+        for command in args.commands:
+            seconds, imports = measure(["-m", "trankil.cli", *command.split()], args.repeat, cwd)
+            top_level = [imp for imp in imports if not imp[0].startswith(" ")]
+            total_ms = sum(cumulative for _, _, cumulative in top_level) / 1000
+            print(
+                f"\ntrankil {command}: {seconds * 1000:.1f} ms"
+                f" (+{(seconds - bare) * 1000:.1f} ms), imports {total_ms:.1f} ms"
+            )
+            for name, _, cumulative in sorted(top_level, key=lambda imp: -imp[2])[: args.top]:
+                print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
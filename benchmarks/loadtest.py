@@ -0,0 +1,155 @@
+"""Load test of the fetching client against the mock Linguee API.
+
+The words are fetched by the real client (`iter_linguee_translations`, with its
+throttle, retries and fetch modes) from a local mock server, started in-process unless
+an URL is given. The run reports the throughput, the latencies of the words (retries
+and backoffs included) and of the requests, with their tails, and the failures.
+
+Usage:
+    poetry run python -m benchmarks.loadtest --words 500 --fetch-mode concurrent --concurrency 8
+    poetry run python -m benchmarks.loadtest --error-rate 0.05 --burst-every 5 --output load.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from loguru import logger
+
+from trankil import metrics
+from trankil.api.client import iter_linguee_translations
+from trankil.config import APISettings, AppSettings, ProviderSettings, Settings
+from trankil.mock_server import MockLingueeServer, add_behavior_arguments, behavior_from_args
+
+
+def make_settings(
+    url: str,
+    fetch_mode: str = "concurrent",
+    max_concurrency: int = 8,
+    throttled: bool = False,
+    max_retries: int = 3,
+    backoff_base: float = 0.1,
+) -> Settings:
+    """Returns the settings of the client, without cache nor archive, so that every word
+    is fetched from the server."""
+    return Settings(
+        app=AppSettings(src="fr", dst="en"),
+        api=APISettings(
+            cache_enabled=False,
+            archive_enabled=False,
+            fetch_mode=fetch_mode,
+            max_concurrency=max_concurrency,
+            max_retries=max_retries,
+            backoff_base=backoff_base,
+            providers=[ProviderSettings(kind="linguee", url=url, throttled=throttled)],
+        ),
+    )
+
+
+def run_load(words: list[str], settings: Settings) -> dict[str, Any]:
+    """Fetches the words and returns the report of the run.
+
+    Parameters
+    ----------
+    words : list[str]
+    settings : Settings
+
+    Returns
+    -------
+    dict[str, Any]
+        words, seconds, words_per_second, failures (permanent, transient and unavailable),
+        latencies of the words and of the requests (count, p50, p95, p99, max) and the
+        counters.
+    """
+    run_metrics = metrics.start_run()
+    failures = {"permanent": 0, "transient": 0, "unavailable": 0}
+    start = time.perf_counter()
+    for _, _, error in iter_linguee_translations(words, settings):
+        if error is not None:
+            failures[error.kind] += 1
+    seconds = time.perf_counter() - start
+
+    report = run_metrics.report()
+    return {
+        "words": len(words),
+        "seconds": seconds,
+        "words_per_second": len(words) / seconds if seconds else None,
+        "failures": failures,
+        "latencies": {
+            name: {key: value for key, value in latency.items() if key != "sum"}
+            for name, latency in report["latencies"].items()
+        },
+        "counters": report["counters"],
+    }
+
+
+def format_report(report: dict[str, Any]) -> str:
+    lines = [
+        f"{report['words']} words in {report['seconds']:.2f}s:"
+        f" {report['words_per_second']:.1f} words/s",
+        f"Failures: {report['failures']['permanent']} permanent,"
+        f" {report['failures']['transient']} transient,"
+        f" {report['failures']['unavailable']} unavailable",
+    ]
+    for name, latency in report["latencies"].items():
+        lines.append(
+            f"{name} latency (n={latency['count']}): "
+            + ", ".join(
+                f"{key} {latency[key] * 1000:.1f} ms" for key in ("p50", "p95", "p99", "max")
+            )
+        )
+    if "statuses" in report:
+        lines.append(f"Server responses by status: {report['statuses']}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test of the client on a mock Linguee API.")
+    parser.add_argument("--words", type=int, default=200, help="Number of fetched words.")
+    parser.add_argument("--url", help="Translations endpoint, a mock server is started if unset.")
+    parser.add_argument("--fetch-mode", choices=["sequential", "concurrent"], default="concurrent")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--throttled", action="store_true", help="Paces the requests with the client throttle."
+    )
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--backoff-base", type=float, default=0.1)
+    parser.add_argument("--output", type=Path, help="JSON file of the report.")
+    add_behavior_arguments(parser)
+    args = parser.parse_args(argv)
+
+    words = [f"mot{i}" for i in range(args.words)]
+    server = None if args.url else MockLingueeServer(behavior_from_args(args)).start()
+    settings = make_settings(
+        args.url or server.url,
+        args.fetch_mode,
+        args.concurrency,
+        args.throttled,
+        args.max_retries,
+        args.backoff_base,
+    )
+    # The per-word logs would flood the report.
+    logger.disable("trankil")
+    try:
+        report = run_load(words, settings)
+    finally:
+        logger.enable("trankil")
+        if server is not None:
+            server.close()
+    if server is not None:
+        report["statuses"] = dict(sorted(server.statuses.items()))
+
+    print(format_report(report))
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+"""Benchmark suite of the Trankil pipeline.
+
+Each stage is timed and memory-profiled at the requested scales (number of words), on
+synthetic Linguee responses. The in-memory stages process the words by batches and only
+the stage calls are measured, not the generation of their inputs. The memory is measured
+in a second pass with tracemalloc: it is the peak of the memory allocated by the stage
+calls, above the memory in use before each call.
+
+The results are written to a JSON file, and compared with a baseline file if given:
+
+    poetry run python -m benchmarks.suite --scale 1k --scale 100k --output results.json
+    poetry run python -m benchmarks.suite --scale 1k --baseline baseline.json --tolerance 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from loguru import logger
+
+from trankil.anki.card_generator import generate_fields
+from trankil.anki.deck_generator import export_notes, generate_deck, open_note_store
+from trankil.config import AppSettings, DeckSettings, PreprocessingSettings, Settings
+from trankil.models.word_entry import WordEntry, parse_word_entries
+from trankil.preprocessing.preprocessing import preprocess_translations
+from trankil.reader import read_input_csv
+from trankil.synthetic import synthetic_response
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+RULES = PreprocessingSettings()
+
+
+def parse_scale(value: str) -> int:
+    """Returns the number of words of a scale: "1k", "100k", "1M" or an integer."""
+    return SCALES[value] if value in SCALES else int(value)
+
+
+class Meter:
+    """Accumulates the time and the peak memory of the measured calls.
+
+    Parameters
+    ----------
+    trace : bool
+        Whether the memory is traced, the timings are not reliable when it is.
+    """
+
+    def __init__(self, trace: bool) -> None:
+        self.trace = trace
+        self.seconds = 0.0
+        self.peak = 0
+
+    def measure(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.trace:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        result = fn(*args)
+        self.seconds += time.perf_counter() - start
+        if self.trace:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1] - before)
+        return result
+
+
+class Workload:
+    """Synthetic inputs of the stages.
+
+    Parameters
+    ----------
+    n_entries : int
+    n_translations : int
+    n_examples : int
+        Shape of the synthetic responses, see `synthetic_response`.
+    batch_size : int
+        Number of words processed by a call of the in-memory stages.
+    """
+
+    def __init__(self, n_entries: int, n_translations: int, n_examples: int, batch_size: int):
+        self.shape = {"entries": n_entries, "translations": n_translations, "examples": n_examples}
+        self.batch_size = batch_size
+
+    def raw(self, i: int) -> bytes:
+        response = synthetic_response(
+            f"mot{i}",
+            self.shape["entries"],
+            self.shape["translations"],
+            self.shape["examples"],
+            seed=i,
+        )
+        return json.dumps(response, ensure_ascii=False).encode()
+
+    def batches(self, n: int) -> Iterator[range]:
+        for start in range(0, n, self.batch_size):
+            yield range(start, min(start + self.batch_size, n))
+
+    def raw_batches(self, n: int) -> Iterator[list[bytes]]:
+        for batch in self.batches(n):
+            yield [self.raw(i) for i in batch]
+
+    def entry_batches(self, n: int) -> Iterator[list[list[WordEntry]]]:
+        for raws in self.raw_batches(n):
+            yield [parse_word_entries(raw) for raw in raws]
+
+    def card_batches(self, n: int) -> Iterator[list[WordEntry]]:
+        for entries in self.entry_batches(n):
+            yield preprocess_translations(entries, RULES)
+
+
+def make_settings() -> Settings:
+    return Settings(app=AppSettings(src="fr", dst="en"), deck=DeckSettings(name="Benchmark"))
+
+
+def write_words_csv(path: Path, n: int) -> None:
+    with path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["word_to_translate"])
+        writer.writerows([f"mot{i}"] for i in range(n))
+
+
+def _parse_all(raws: list[bytes]) -> list[list[WordEntry]]:
+    return [parse_word_entries(raw, RULES) for raw in raws]
+
+
+def _generate_all_fields(cards: list[WordEntry]) -> list[tuple[str, str]]:
+    return [generate_fields(card) for card in cards]
+
+
+def bench_parse_responses(n: int, workload: Workload, meter: Meter) -> None:
+    for raws in workload.raw_batches(n):
+        meter.measure(_parse_all, raws)
+
+
+def bench_preprocess_translations(n: int, workload: Workload, meter: Meter) -> None:
+    for entries in workload.entry_batches(n):
+        meter.measure(preprocess_translations, entries, RULES)
+
+
+def bench_generate_fields(n: int, workload: Workload, meter: Meter) -> None:
+    for cards in workload.card_batches(n):
+        meter.measure(_generate_all_fields, cards)
+
+
+def bench_generate_deck(n: int, workload: Workload, meter: Meter) -> None:
+    settings = make_settings()
+    for cards in workload.card_batches(n):
+        meter.measure(generate_deck, cards, settings)
+
+
+def bench_export_deck(n: int, workload: Workload, meter: Meter) -> None:
+    settings = make_settings()
+    store = open_note_store(settings)
+    try:
+        for batch in workload.batches(n):
+            store.add(
+                {"front": f"<div>mot{i}</div>", "back": f"<div>word{i}</div>"} for i in batch
+            )
+        meter.measure(export_notes, store, settings, True)
+    finally:
+        store.close()
+
+
+def bench_read_input_csv(n: int, workload: Workload, meter: Meter) -> None:
+    path = Path("input_words.csv")
+    write_words_csv(path, n)
+    meter.measure(read_input_csv, path, n)
+
+
+STAGES: dict[str, Callable[[int, Workload, Meter], None]] = {
+    "parse_responses": bench_parse_responses,
+    "preprocess_translations": bench_preprocess_translations,
+    "generate_fields": bench_generate_fields,
+    "generate_deck": bench_generate_deck,
+    "export_deck": bench_export_deck,
+    "read_input_csv": bench_read_input_csv,
+}
+
+
+@contextmanager
+def _working_directory() -> Iterator[None]:
+    """Runs a stage in a new temporary directory, where the outputs of Trankil are written."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="trankil-bench-") as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            yield
+        finally:
+            os.chdir(cwd)
+
+
+def _run_stage(stage: str, n: int, workload: Workload, trace: bool) -> Meter:
+    meter = Meter(trace)
+    with _working_directory():
+        if trace:
+            tracemalloc.start()
+        try:
+            STAGES[stage](n, workload, meter)
+        finally:
+            if trace:
+                tracemalloc.stop()
+    return meter
+
+
+def run_suite(
+    stages: list[str], scales: list[int], workload: Workload, memory: bool = True
+) -> dict[str, Any]:
+    """Runs the stages at each scale.
+
+    Parameters
+    ----------
+    stages : list[str]
+        Names of the stages, keys of STAGES.
+    scales : list[int]
+        Numbers of words.
+    workload : Workload
+    memory : bool
+        Whether the memory is profiled, in a second pass.
+
+    Returns
+    -------
+    dict[str, Any]
+        Metadata of the run and the results by "<stage>@<scale>".
+    """
+    results = {}
+    for n in scales:
+        for stage in stages:
+            timing = _run_stage(stage, n, workload, trace=False)
+            result = {
+                "stage": stage,
+                "scale": n,
+                "seconds": timing.seconds,
+                "words_per_second": n / timing.seconds if timing.seconds else None,
+                "peak_kib": None,
+            }
+            if memory:
+                result["peak_kib"] = _run_stage(stage, n, workload, trace=True).peak / 1024
+            results[f"{stage}@{n}"] = result
+            print(_format_result(result), flush=True)
+
+    return {
+        "metadata": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "shape": workload.shape,
+            "batch_size": workload.batch_size,
+        },
+        "results": results,
+    }
+
+
+def _format_result(result: dict[str, Any]) -> str:
+    peak = "" if result["peak_kib"] is None else f"  peak {result['peak_kib']:10.0f} KiB"
+    return f"{result['stage']:<32} {result['scale']:>9}  {result['seconds']:9.3f} s{peak}"
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Compares the results with a baseline run and prints the ratios.
+
+    Parameters
+    ----------
+    results : dict[str, Any]
+    baseline : dict[str, Any]
+        Results of a previous run, as written by `run_suite`.
+    tolerance : float
+        Relative slowdown, or increase of the peak memory, above which a stage regresses.
+
+    Returns
+    -------
+    list[str]
+        Description of the regressions.
+    """
+    regressions = []
+    for key, result in results["results"].items():
+        reference = baseline["results"].get(key)
+        if reference is None:
+            continue
+        for metric in ("seconds", "peak_kib"):
+            if not result[metric] or not reference[metric]:
+                continue
+            ratio = result[metric] / reference[metric]
+            print(f"{key:<42} {metric:<8} x{ratio:5.2f}")
+            if ratio > 1 + tolerance:
+                regressions.append(f"{key} {metric}: x{ratio:.2f}")
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark suite of the Trankil pipeline.")
+    parser.add_argument(
+        "--scale", action="append", help="1k, 100k, 1M or a number of words (default: 1k)."
+    )
+    parser.add_argument(
+        "--stage", action="append", choices=list(STAGES), help="Stages to run (default: all)."
+    )
+    parser.add_argument("--entries", type=int, default=2, help="Entries per response.")
+    parser.add_argument("--translations", type=int, default=4, help="Translations per entry.")
+    parser.add_argument("--examples", type=int, default=2, help="Examples per translation.")
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    parser.add_argument("--no-memory", action="store_true", help="Skips the memory profiling.")
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"))
+    parser.add_argument("--baseline", type=Path, help="Results of a previous run to compare.")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    # The per-batch logs of the stages would flood the results.
+    logger.disable("trankil")
+    try:
+        results = run_suite(
+            args.stage or list(STAGES),
+            [parse_scale(scale) for scale in args.scale or ["1k"]],
+            Workload(args.entries, args.translations, args.examples, args.batch_size),
+            memory=not args.no_memory,
+        )
+    finally:
+        logger.enable("trankil")
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Results written to {args.output}")
+
+    if args.baseline is not None:
+        regressions = compare(
+            results, json.loads(args.baseline.read_text("utf-8")), args.tolerance
+        )
+        if regressions:
+            print("Regressions:\n" + "\n".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
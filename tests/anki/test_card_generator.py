@@ -1,5 +1,5 @@
 from trankil.models.word_entry import WordEntry, Translation, Example
-from trankil.anki.card_generator import generate_fields
+from trankil.anki.card_generator import generate_fields, generate_note
 
 
 def test_generate_fields():
@@ -38,3 +38,24 @@ def test_generate_fields():
     assert "<div class='meaning'>partir</div>" in back
     assert "Il est parti" not in front
     assert "Il est parti" in back
+
+
+def test_generate_note_matches_generate_fields():
+    word = WordEntry(
+        featured=True,
+        text="go",
+        pos="verb",
+        translations=[
+            Translation(
+                featured=True,
+                text="aller",
+                pos="verb",
+                examples=[Example(src="I go to school", dst="Je vais à l'école")],
+            )
+        ],
+    )
+
+    note = generate_note(word)
+
+    assert (note["front"], note["back"]) == generate_fields(word)
+    assert note["overflow"] == ""
@@ -1,51 +1,22 @@
 import json
+import sqlite3
+import tempfile
+import zipfile
 from pathlib import Path
 
 import genanki
 import pytest
 
-from trankil.anki.deck_generator import export_deck, generate_deck, load_notes, save_notes
-
-
-def test_load_notes_file_exists(tmp_path: Path):
-    notes = [{"front": "<div>note1</div>", "back": "<div>note2</div>"}]
-    file_path = tmp_path / "notes.json"
-    file_path.write_text(json.dumps(notes), encoding="utf-8")
-
-    result = load_notes(file_path)
-
-    assert result == notes
-    assert isinstance(result, list)
-
-
-def test_load_notes_file_does_not_exist(tmp_path: Path):
-    file_path = tmp_path / "missing.json"
-
-    result = load_notes(file_path)
-
-    assert result == []
-    assert isinstance(result, list)
-
-
-def test_save_notes_creates_file(tmp_path: Path):
-    notes = [{"front": "<div>note1</div>", "back": "<div>note2</div>"}]
-    file_path = tmp_path / "notes.json"
-    save_notes(notes, file_path)
-
-    assert file_path.exists()
-    content = json.loads(file_path.read_text(encoding="utf-8"))
-    assert content == notes
-
-
-def test_save_notes_overwrites_file(tmp_path: Path):
-    initial_notes = ["<div>old note</div>"]
-    new_notes = ["<div>new note</div>"]
-    file_path = tmp_path / "notes.json"
-    file_path.write_text(json.dumps(initial_notes), encoding="utf-8")
-    save_notes(new_notes, file_path)
-
-    content = json.loads(file_path.read_text(encoding="utf-8"))
-    assert content == new_notes
+from trankil.anki.deck_generator import (
+    StoredDeck,
+    compact_notes,
+    export_deck,
+    export_notes,
+    generate_deck,
+    open_note_store,
+)
+from trankil.anki.note_store import NoteStore, note_guid
+from trankil.config import CardLimits, CardTemplates
 
 
 def test_export_deck_creates_file(tmp_path: Path):
@@ -74,11 +45,29 @@ def mock_settings(tmp_path: Path):
     class DummySettings:
         class App:
             output_folder = tmp_path
+            pair = "fr_en"
 
         class Deck:
             save_notes_json = "notes.json"
+            notes_store = "notes.sqlite"
             export_name = "deck.apkg"
             name = "Test Deck"
+            export_mode = "delta"
+            templates = CardTemplates()
+            card_limits = CardLimits()
+            fragment_cache_size = 16
+
+            @staticmethod
+            def delta_export_name(timestamp):
+                return f"deck_{timestamp}.apkg"
+
+            @staticmethod
+            def deck_name(pair):
+                return f"Test Deck::{pair}"
+
+            @staticmethod
+            def deck_id(pair):
+                return 1234567890
 
         app = App()
         deck = Deck()
@@ -86,27 +75,162 @@ def mock_settings(tmp_path: Path):
     return DummySettings()
 
 
-def test_generate_deck_adds_new_notes(mock_settings, mocker):
+def test_generate_deck_adds_new_notes(mock_settings, tmp_path: Path, mocker):
     translations = [mocker.Mock()]
+    store = NoteStore(tmp_path / "notes.sqlite")
+    store.add([{"front": "old", "back": "old"}])
+    store.close()
 
-    mock_load = mocker.patch(
-        "trankil.anki.deck_generator.load_notes", return_value=[{"front": "old", "back": "old"}]
-    )
     mock_fields = mocker.patch(
-        "trankil.anki.deck_generator.generate_fields", return_value=("front1", "back1")
+        "trankil.anki.deck_generator.generate_note",
+        return_value={"front": "front1", "back": "back1", "overflow": ""},
     )
-    mock_save = mocker.patch("trankil.anki.deck_generator.save_notes")
-    mock_export = mocker.patch("trankil.anki.deck_generator.export_deck")
+    exported = {}
 
-    generate_deck(translations, mock_settings)
+    def fake_export(deck, output_path):
+        exported["deck"] = deck
+        exported["notes"] = [n.fields for n in deck.notes]
+
+    mocker.patch("trankil.anki.deck_generator.export_deck", side_effect=fake_export)
 
-    mock_load.assert_called_once()
-    mock_fields.assert_called_once_with(translations[0])
+    generate_deck(translations, mock_settings)
 
-    saved_notes = mock_save.call_args[0][0]
-    assert {"front": "old", "back": "old"} in saved_notes
-    assert {"front": "front1", "back": "back1"} in saved_notes
+    mock_fields.assert_called_once_with(translations[0], mocker.ANY, "fr_en")
+    assert exported["notes"] == [["old", "old"], ["front1", "back1"]]
 
-    deck_arg = mock_export.call_args[0][0]
+    deck_arg = exported["deck"]
     assert isinstance(deck_arg, genanki.Deck)
-    assert deck_arg.name == "Test Deck"
+    assert deck_arg.name == "Test Deck::fr_en"
+
+
+def test_generate_deck_skips_duplicate_notes(mock_settings, tmp_path: Path, mocker):
+    translations = [mocker.Mock(), mocker.Mock()]
+    store = NoteStore(tmp_path / "notes.sqlite")
+    store.add([{"front": "front1", "back": "back1"}])
+    store.close()
+
+    mocker.patch(
+        "trankil.anki.deck_generator.generate_note",
+        side_effect=[{"front": "front1", "back": "back1"}, {"front": "front2", "back": "back2"}],
+    )
+    exported = {}
+    mocker.patch(
+        "trankil.anki.deck_generator.export_deck",
+        side_effect=lambda deck, path: exported.update(notes=list(deck.notes)),
+    )
+
+    generate_deck(translations, mock_settings)
+
+    assert [n.fields for n in exported["notes"]] == [["front1", "back1"], ["front2", "back2"]]
+    assert [n.guid for n in exported["notes"]] == [
+        note_guid({"front": "front1", "back": "back1"}),
+        note_guid({"front": "front2", "back": "back2"}),
+    ]
+
+
+def test_generate_deck_migrates_json_notes(mock_settings, tmp_path: Path, mocker):
+    notes = [{"front": "<div>note1</div>", "back": "<div>note2</div>"}]
+    (tmp_path / "notes.json").write_text(json.dumps(notes), encoding="utf-8")
+    mocker.patch("trankil.anki.deck_generator.export_deck")
+
+    generate_deck([], mock_settings)
+
+    assert not (tmp_path / "notes.json").exists()
+    assert (tmp_path / "notes.json.migrated").exists()
+    store = NoteStore(tmp_path / "notes.sqlite")
+    assert [(n["front"], n["back"]) for n in store] == [("<div>note1</div>", "<div>note2</div>")]
+    store.close()
+
+
+def test_stored_deck_exports_all_notes(tmp_path: Path):
+    store = NoteStore(tmp_path / "notes.sqlite")
+    store.add([{"front": f"front{i}", "back": f"back{i}"} for i in range(3)])
+    output_path = tmp_path / "deck.apkg"
+
+    export_deck(StoredDeck(1234567890, "Test Deck", store), output_path)
+    store.close()
+
+    with zipfile.ZipFile(output_path) as apkg, tempfile.TemporaryDirectory() as tmp_dir:
+        collection = apkg.extract("collection.anki2", tmp_dir)
+        conn = sqlite3.connect(collection)
+        n_notes = conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+        conn.close()
+    assert n_notes == 3
+
+
+def test_compact_notes(mock_settings, tmp_path: Path):
+    store = open_note_store(mock_settings)
+    store.add([{"front": "front", "back": "back"}])
+    store.close()
+
+    compact_notes(mock_settings)
+
+    store = NoteStore(tmp_path / "notes.sqlite")
+    assert len(store) == 1
+    store.close()
+
+
+def test_export_notes_delta_holds_only_new_notes(mock_settings, mocker):
+    exported = []
+    mocker.patch(
+        "trankil.anki.deck_generator.export_deck",
+        side_effect=lambda deck, path: exported.append((path, [n.fields[0] for n in deck.notes])),
+    )
+    store = open_note_store(mock_settings)
+    store.add([{"front": "a", "back": "a"}, {"front": "b", "back": "b"}])
+
+    first_path = export_notes(store, mock_settings)
+    store.add([{"front": "b", "back": "b"}, {"front": "c", "back": "c"}])
+    second_path = export_notes(store, mock_settings)
+    store.close()
+
+    assert [notes for _, notes in exported] == [["a", "b"], ["c"]]
+    assert first_path.name.startswith("deck_")
+    assert second_path.suffix == ".apkg"
+
+
+def test_export_notes_skipped_when_unchanged(mock_settings, mocker):
+    mock_export = mocker.patch("trankil.anki.deck_generator.export_deck")
+    store = open_note_store(mock_settings)
+    store.add([{"front": "a", "back": "a"}])
+
+    assert export_notes(store, mock_settings) is not None
+    store.add([{"front": "a", "back": "a"}])
+    assert export_notes(store, mock_settings) is None
+    store.close()
+
+    mock_export.assert_called_once()
+
+
+def test_export_notes_full(mock_settings, tmp_path: Path, mocker):
+    exported = []
+    mocker.patch(
+        "trankil.anki.deck_generator.export_deck",
+        side_effect=lambda deck, path: exported.append((path, [n.fields[0] for n in deck.notes])),
+    )
+    store = open_note_store(mock_settings)
+    store.add([{"front": "a", "back": "a"}])
+    export_notes(store, mock_settings)
+    store.add([{"front": "b", "back": "b"}])
+
+    path = export_notes(store, mock_settings, full=True)
+    store.close()
+
+    assert path == tmp_path / "deck.apkg"
+    assert exported[-1] == (tmp_path / "deck.apkg", ["a", "b"])
+
+
+def test_export_notes_with_overflow_field(mock_settings, mocker):
+    mock_settings.deck.card_limits = CardLimits(overflow_field=True)
+    exported = []
+    mocker.patch(
+        "trankil.anki.deck_generator.export_deck",
+        side_effect=lambda deck, path: exported.extend(deck.notes),
+    )
+    store = open_note_store(mock_settings)
+    store.add([{"front": "a", "back": "b", "overflow": "c"}, {"front": "d", "back": "e"}])
+    export_notes(store, mock_settings)
+    store.close()
+
+    assert [n.model.name for n in exported] == ["trankil model with overflow"] * 2
+    assert [n.fields for n in exported] == [["a", "b", "c"], ["d", "e", ""]]
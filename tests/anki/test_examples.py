@@ -0,0 +1,33 @@
+import pytest
+
+from trankil.anki.examples import length_score, score_examples, top_k, uniqueness_scores
+from trankil.config import CardLimits
+
+
+@pytest.mark.parametrize(
+    "text, expected", [("a" * 5, 0.5), ("a" * 10, 1.0), ("a" * 20, 1.0), ("a" * 40, 0.5)]
+)
+def test_length_score(text, expected):
+    assert length_score(text, 10, 20) == expected
+
+
+def test_uniqueness_scores():
+    scores = uniqueness_scores(["le chat dort", "le chien dort", "un oiseau", "un oiseau", ""])
+
+    assert scores[0] == scores[1] == pytest.approx(2 / 3)
+    assert scores[2] == 0.5
+    assert scores[3] == scores[4] == 0.0
+    assert uniqueness_scores(["le chat", "un chien"]) == [1.0, 1.0]
+
+
+def test_score_examples_weights():
+    sources = ["court", "une phrase de longueur idéale"]
+    limits = CardLimits(example_min_length=10, uniqueness_weight=0)
+
+    assert score_examples(sources, limits) == [0.5, 1.0]
+    assert score_examples(sources, CardLimits(length_weight=0)) == [1.0, 1.0]
+
+
+def test_top_k_best_first_and_ties_by_index():
+    assert top_k([0.5, 2.0, 1.0, 2.0], 3) == [1, 3, 2]
+    assert top_k([1.0], 3) == [0]
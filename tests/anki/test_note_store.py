@@ -0,0 +1,162 @@
+import json
+import sqlite3
+from pathlib import Path
+
+import genanki
+
+from trankil.anki.note_store import NoteStore, entry_guid, note_guid
+from trankil.models.word_entry import Translation, WordEntry
+
+
+def test_note_guid_is_stable_and_matches_genanki_default():
+    note = {"front": "front1", "back": "back1"}
+
+    assert note_guid(note) == note_guid(dict(note))
+    assert note_guid(note) != note_guid({"front": "front1", "back": "back2"})
+    assert note_guid(note) == genanki.Note(fields=["front1", "back1"]).guid
+
+
+def test_note_store_add_only_new_notes(tmp_path: Path):
+    store = NoteStore(tmp_path / "sub" / "notes.sqlite")
+
+    assert store.add([{"front": "a", "back": "a"}, {"front": "b", "back": "b"}]) == 2
+    assert store.add([{"front": "a", "back": "a"}, {"front": "c", "back": "c"}]) == 1
+    assert len(store) == 3
+    assert note_guid({"front": "c", "back": "c"}) in store
+    assert note_guid({"front": "d", "back": "d"}) not in store
+    store.close()
+
+
+def test_note_store_iterates_in_insertion_order(tmp_path: Path):
+    store = NoteStore(tmp_path / "notes.sqlite")
+    store.add([{"front": "b", "back": "b"}, {"front": "a", "back": "a"}])
+    store.close()
+
+    store = NoteStore(tmp_path / "notes.sqlite")
+    notes = list(store)
+
+    assert [n["front"] for n in notes] == ["b", "a"]
+    assert notes[0]["guid"] == note_guid({"front": "b", "back": "b"})
+    store.close()
+
+
+def test_note_store_migrate_from_json(tmp_path: Path):
+    json_path = tmp_path / "notes.json"
+    json_path.write_text(json.dumps([{"front": "a", "back": "a"}]), encoding="utf-8")
+    store = NoteStore(tmp_path / "notes.sqlite")
+
+    assert store.migrate_from_json(json_path) == 1
+    assert store.migrate_from_json(json_path) == 0
+    assert (tmp_path / "notes.json.migrated").exists()
+    assert len(store) == 1
+    store.close()
+
+
+def test_note_store_compact(tmp_path: Path):
+    store = NoteStore(tmp_path / "notes.sqlite")
+    store.add([{"front": "a", "back": "a"}])
+    store.compact()
+
+    assert len(store) == 1
+    store.close()
+
+
+def test_note_store_content_hash_changes_only_with_new_notes(tmp_path: Path):
+    store = NoteStore(tmp_path / "notes.sqlite")
+    assert store.content_hash() == ""
+
+    store.add([{"front": "a", "back": "a"}])
+    first_hash = store.content_hash()
+    store.add([{"front": "a", "back": "a"}])
+
+    assert store.content_hash() == first_hash
+    store.add([{"front": "b", "back": "b"}])
+    assert store.content_hash() != first_hash
+    store.close()
+
+
+def test_note_store_export_state(tmp_path: Path):
+    store = NoteStore(tmp_path / "notes.sqlite")
+    store.add([{"front": "a", "back": "a"}, {"front": "b", "back": "b"}])
+
+    assert store.last_export("delta") == (0, "")
+    store.mark_exported("delta", store.last_id(), store.content_hash())
+    store.add([{"front": "c", "back": "c"}])
+
+    export_id, export_hash = store.last_export("delta")
+    assert export_id == 2
+    assert export_hash != store.content_hash()
+    assert [n["front"] for n in store.iter_notes(after_id=export_id)] == ["c"]
+    assert store.last_export("full") == (0, "")
+    store.close()
+
+
+def test_note_store_snapshot_and_bounded_iteration(tmp_path: Path):
+    store = NoteStore(tmp_path / "notes.sqlite")
+    store.add([{"front": "a", "back": "1"}, {"front": "b", "back": "2"}])
+    last_id, content_hash = store.snapshot()
+    store.add([{"front": "c", "back": "3"}])
+
+    assert (last_id, content_hash) != store.snapshot()
+    assert [n["front"] for n in store.iter_notes(until_id=last_id)] == ["a", "b"]
+    assert [n["front"] for n in store.iter_notes(after_id=last_id)] == ["c"]
+    store.close()
+
+
+def test_note_store_overflow_field_and_migration(tmp_path: Path):
+    path = tmp_path / "notes.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE notes (id INTEGER PRIMARY KEY AUTOINCREMENT, guid TEXT NOT NULL UNIQUE,"
+        " front TEXT NOT NULL, back TEXT NOT NULL)"
+    )
+    conn.execute("INSERT INTO notes (guid, front, back) VALUES ('g', 'a', 'a')")
+    conn.commit()
+    conn.close()
+
+    store = NoteStore(path)
+    store.add([{"front": "b", "back": "b", "overflow": "c"}])
+
+    assert [n["overflow"] for n in store] == ["", "c"]
+    store.close()
+
+
+def make_entry(text: str, translations: list[tuple[str, bool]]) -> WordEntry:
+    return WordEntry(
+        featured=True,
+        text=text,
+        pos="noun",
+        translations=[
+            Translation(featured=featured, text=t, pos="noun", examples=[])
+            for t, featured in translations
+        ],
+    )
+
+
+def test_entry_guid_is_independent_of_the_layout(tmp_path: Path):
+    entry = make_entry("voir", [("see", True)])
+    guid = entry_guid("fr_en", entry)
+    store = NoteStore(tmp_path / "notes.sqlite")
+
+    assert store.add([{"front": "a", "back": "a", "guid": guid, "key": guid}]) == 1
+    assert store.add([{"front": "b", "back": "b", "guid": guid, "key": guid}]) == 0
+    assert guid != entry_guid("fr_de", entry)
+    assert [n["guid"] for n in store] == [guid]
+    assert store.guid_of_key(guid) == guid
+    store.close()
+
+
+def test_entry_guid_tells_the_meanings_apart(tmp_path: Path):
+    lawyer = make_entry("avocat", [("lawyer", True), ("advocate", False)])
+    avocado = make_entry("avocat", [("avocado", True)])
+    store = NoteStore(tmp_path / "notes.sqlite")
+
+    notes = [
+        {"front": "a", "back": t.translations[0].text, "guid": entry_guid("fr_en", t)}
+        for t in (lawyer, avocado)
+    ]
+    assert store.add(notes) == 2
+    assert entry_guid("fr_en", lawyer) == entry_guid(
+        "fr_en", make_entry("avocat", [("lawyer", True), ("attorney", False)])
+    )
+    store.close()
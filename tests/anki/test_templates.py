@@ -0,0 +1,116 @@
+import pytest
+
+from trankil.anki.templates import CardRenderer, compile_template, get_renderer
+from trankil.config import CardLimits, CardTemplates, DeckSettings
+from trankil.models.word_entry import Example, Translation, WordEntry
+
+
+def make_word(examples: list[Example]) -> WordEntry:
+    return WordEntry(
+        featured=True,
+        text="go",
+        pos="verb",
+        translations=[Translation(featured=True, text="aller", pos="verb", examples=examples)],
+    )
+
+
+def test_compile_template_rejects_unknown_fields():
+    render = compile_template("front_example", "<li>{src}</li>")
+    assert render(src="a", dst="b") == "<li>a</li>"
+
+    with pytest.raises(ValueError, match="Unknown fields in the front_example template: text"):
+        compile_template("front_example", "<li>{text}</li>")
+
+
+def test_card_renderer_default_layout():
+    renderer = CardRenderer(CardTemplates())
+
+    front, back = renderer.render(make_word([Example(src="I go", dst="Je vais")]))
+
+    header = "<div class='word'>go <span class='type_word'>verb</span></div>"
+    assert front == (
+        f"{header}<br><div class='group'><div class='translation_title'>__translation_1__:</div>"
+        "<ul><br><li>I go</li><br></ul></div>"
+    )
+    assert back == (
+        f"{header}<br><div class='group'><div class='meaning'>aller</div>"
+        "<ul><br><li>I go<br><i>Je vais</i></li><br></ul></div>"
+    )
+
+
+def test_card_renderer_custom_templates():
+    templates = CardTemplates(
+        header="<h1>{text}</h1>",
+        front_translation="<p>{index}.{examples}</p>",
+        back_translation="<p>{text}:{examples}</p>",
+        front_example="{src}",
+        back_example="{src}={dst}",
+        separator="|",
+    )
+
+    front, back = CardRenderer(templates).render(
+        make_word([Example(src="a", dst="b"), Example(src="c", dst="d")])
+    )
+
+    assert front == "<h1>go</h1>|<p>1.|a|c|</p>"
+    assert back == "<h1>go</h1>|<p>aller:|a=b|c=d|</p>"
+
+
+def test_card_renderer_caches_fragments():
+    renderer = CardRenderer(CardTemplates())
+    word = make_word([Example(src="I go", dst="Je vais")])
+
+    first = renderer.render(word)
+    second = renderer.render(make_word([Example(src="I go", dst="Je vais")]))
+
+    assert first == second
+    assert renderer._render_translation.cache_info().hits == 1
+    assert renderer._render_example.cache_info().misses == 1
+
+
+def test_get_renderer_compiles_once():
+    assert get_renderer(DeckSettings()) is get_renderer(DeckSettings())
+
+
+def test_card_renderer_keeps_the_best_examples():
+    renderer = CardRenderer(
+        CardTemplates(), limits=CardLimits(max_examples=2, overflow_field=True)
+    )
+    examples = [
+        Example(src="Go", dst="Va"),
+        Example(src="I go to the market on Sundays", dst="Je vais au marché le dimanche"),
+        Example(src="I go to the market on Sundays", dst="Je vais au marché le dimanche"),
+        Example(src="We will go home after dinner", dst="Nous rentrerons après le dîner"),
+    ]
+
+    note = renderer.render_note(make_word(examples))
+
+    assert note["front"].index("We will go home") < note["front"].index("I go to the market")
+    assert note["front"].count("I go to the market") == 1
+    assert "<li>Go</li>" not in note["front"]
+    assert "<li>Go<br><i>Va</i></li>" in note["overflow"]
+    assert note["overflow"].count("I go to the market") == 1
+    assert renderer.render(make_word(examples)) == (note["front"], note["back"])
+
+
+def test_card_renderer_caps_the_fields():
+    examples = [Example(src=f"Example number {i}", dst=f"Exemple numéro {i}") for i in range(20)]
+    word = make_word(examples)
+    unbounded = CardRenderer(CardTemplates()).render_note(word)
+    renderer = CardRenderer(CardTemplates(), limits=CardLimits(max_field_bytes=400))
+
+    note = renderer.render_note(word)
+
+    assert len(unbounded["back"].encode("utf-8")) > 400
+    assert len(note["back"].encode("utf-8")) <= 400
+    assert "Example number 0<br>" in note["back"]
+    assert "Example number 19" not in note["back"]
+    assert note["overflow"] == ""
+
+
+def test_card_renderer_drops_the_translations_which_cannot_fit():
+    renderer = CardRenderer(CardTemplates(), limits=CardLimits(max_field_bytes=60))
+
+    front, back = renderer.render(make_word([Example(src="I go", dst="Je vais")]))
+
+    assert front == back == "<div class='word'>go <span class='type_word'>verb</span></div>"
@@ -0,0 +1,32 @@
+import json
+from pathlib import Path
+
+from trankil.api.archive import ResponseArchive
+
+
+def test_archive_add_replaces_and_keeps_order(tmp_path: Path):
+    archive = ResponseArchive(tmp_path / "sub" / "responses.sqlite")
+    archive.add("chat", [{"text": "chat"}])
+    archive.add("chien", [{"text": "chien"}])
+    archive.add("chat", [{"text": "chat", "pos": "noun"}])
+
+    chunks = list(archive.iter_chunks(1))
+
+    assert len(archive) == 2
+    assert [json.loads(p) for chunk in chunks for p in chunk] == [
+        [{"text": "chat", "pos": "noun"}],
+        [{"text": "chien"}],
+    ]
+    archive.close()
+
+
+def test_archive_add_missing_ignores_archived_words(tmp_path: Path):
+    archive = ResponseArchive(tmp_path / "responses.sqlite")
+    archive.add("chat", [{"text": "chat"}])
+
+    n_new = archive.add_missing([("chat", "[]"), ("lait", "[]")])
+
+    assert n_new == 1
+    assert "lait" in archive
+    assert [len(chunk) for chunk in archive.iter_chunks(10)] == [2]
+    archive.close()
@@ -0,0 +1,95 @@
+from pathlib import Path
+
+from trankil.api.cache import ResponseCache
+
+
+def make_params(word: str) -> dict:
+    return {
+        "query": word,
+        "src": "fr",
+        "dst": "en",
+        "guess_direction": False,
+        "follow_corrections": "never",
+    }
+
+
+def test_cache_set_and_get(tmp_path: Path):
+    cache = ResponseCache(tmp_path / "sub" / "cache.sqlite", ttl=3600, max_entries=10)
+    payload = [{"text": "chat"}]
+
+    assert cache.get(make_params("chat")) is None
+    cache.set(make_params("chat"), payload)
+
+    assert cache.get(make_params("chat")) == payload
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+
+def test_cache_key_includes_languages(tmp_path: Path):
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl=3600, max_entries=10)
+    cache.set(make_params("chat"), [{"text": "chat"}])
+
+    assert cache.get({**make_params("chat"), "dst": "de"}) is None
+    cache.close()
+
+
+def test_cache_expired_entry(tmp_path: Path, mocker):
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl=10, max_entries=10)
+    mock_time = mocker.patch("trankil.api.cache.time.time", return_value=1000.0)
+    cache.set(make_params("chat"), [])
+
+    mock_time.return_value = 1011.0
+
+    assert cache.get(make_params("chat")) is None
+    assert cache.purge_expired() == 1
+    assert len(cache) == 0
+    cache.close()
+
+
+def test_negative_cache(tmp_path: Path, mocker):
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl=10, max_entries=10, negative_ttl=100)
+    mock_time = mocker.patch("trankil.api.cache.time.time", return_value=1000.0)
+    cache.set_failure(make_params("chta"), "500 error, please check the spelling")
+
+    assert cache.get_failure(make_params("chta")) == "500 error, please check the spelling"
+    assert cache.get_failure(make_params("chat")) is None
+    assert cache.negative_hits == 1
+
+    mock_time.return_value = 1101.0
+    assert cache.get_failure(make_params("chta")) is None
+    assert cache.purge_expired() == 1
+    cache.close()
+
+
+def test_negative_cache_disabled(tmp_path: Path):
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl=10, max_entries=10)
+    cache.set_failure(make_params("chta"), "500 error, please check the spelling")
+
+    assert cache.get_failure(make_params("chta")) is None
+    cache.close()
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path, mocker):
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl=3600, max_entries=2)
+    mock_time = mocker.patch("trankil.api.cache.time.time", return_value=1.0)
+    cache.set(make_params("a"), ["a"])
+    mock_time.return_value = 2.0
+    cache.set(make_params("b"), ["b"])
+    mock_time.return_value = 3.0
+    cache.get(make_params("a"))
+    mock_time.return_value = 4.0
+    cache.set(make_params("c"), ["c"])
+
+    assert len(cache) == 2
+    assert cache.get(make_params("b")) is None
+    assert cache.get(make_params("a")) == ["a"]
+    cache.close()
+
+
+def test_cache_iter_responses_by_language_pair(tmp_path: Path):
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl=0, max_entries=10)
+    cache.set(make_params("chat"), [{"text": "chat"}])
+    cache.set({**make_params("cat"), "src": "en", "dst": "fr"}, [])
+
+    assert list(cache.iter_responses("fr", "en")) == [("chat", '[{"text": "chat"}]')]
+    cache.close()
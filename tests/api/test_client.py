@@ -1,7 +1,21 @@
+import asyncio
+import json
+import threading
+import time
+
 import pytest
 import requests
 
-from trankil.api.client import fetch_linguee_translations
+from trankil.api.archive import ResponseArchive
+from trankil.api.cache import ResponseCache
+from trankil.api.client import (
+    _make_async_pace,
+    fetch_linguee_translations,
+    iter_linguee_translations,
+    make_throttle,
+)
+from trankil.api.providers import FetchError
+from trankil.config import PreprocessingSettings
 from trankil.models.word_entry import WordEntry
 
 
@@ -11,6 +25,22 @@ def settings():
         url = "https://linguee-api.fly.dev/api/v2/translations"
         guess_direction = "false"
         follow_correction = "never"
+        archive_enabled = False
+        cache_enabled = False
+        fetch_mode = "sequential"
+        max_concurrency = 2
+        rate_per_second = 1000.0
+        rate_burst = 5
+        throttle = "fixed"
+        min_rate = 0.05
+        max_rate = 0.5
+        rate_increase = 0.01
+        rate_decrease_factor = 0.5
+        max_retries = 0
+        backoff_base = 2.0
+        backoff_max = 60.0
+        negative_cache_ttl = 3600
+        providers = []
 
     class AppSettings:
         src = "fr"
@@ -19,35 +49,38 @@ def settings():
     class Settings:
         api = APISettings()
         app = AppSettings()
+        preprocessing = PreprocessingSettings()
 
     return Settings()
 
 
 def test_fetch_linguee_translations_success(mocker, settings):
-    mock_get = mocker.patch("trankil.api.client.requests.get")
+    mock_get = mocker.patch("trankil.api.providers.requests.Session.get")
     mock_response = mocker.Mock()
     mock_response.status_code = 200
-    mock_response.json.return_value = [
-        {
-            "featured": True,
-            "text": "lexique",
-            "pos": "noun, masculine",
-            "translations": [
-                {
-                    "featured": True,
-                    "text": "lexicon",
-                    "pos": "noun",
-                    "examples": [
-                        {
-                            "src": "Le lexique juridique comporte de nombreux mots latins.",
-                            "dst": "The legal lexicon contains many Latin words.",
-                        }
-                    ],
-                    "usage_frequency": None,
-                }
-            ],
-        }
-    ]
+    mock_response.content = json.dumps(
+        [
+            {
+                "featured": True,
+                "text": "lexique",
+                "pos": "noun, masculine",
+                "translations": [
+                    {
+                        "featured": True,
+                        "text": "lexicon",
+                        "pos": "noun",
+                        "examples": [
+                            {
+                                "src": "Le lexique juridique comporte de nombreux mots latins.",
+                                "dst": "The legal lexicon contains many Latin words.",
+                            }
+                        ],
+                        "usage_frequency": None,
+                    }
+                ],
+            }
+        ]
+    ).encode()
     mock_get.return_value = mock_response
 
     result, errors = fetch_linguee_translations(["lexique"], settings)
@@ -58,7 +91,7 @@ def test_fetch_linguee_translations_success(mocker, settings):
 
 
 def test_fetch_linguee_translations_500_error(mocker, settings):
-    mock_get = mocker.patch("trankil.api.client.requests.get")
+    mock_get = mocker.patch("trankil.api.providers.requests.Session.get")
     mock_response = mocker.Mock()
     mock_response.status_code = 500
     mock_get.return_value = mock_response
@@ -68,14 +101,16 @@ def test_fetch_linguee_translations_500_error(mocker, settings):
     result, errors = fetch_linguee_translations(["blablater"], settings)
 
     assert result == []
-    assert errors == [{"word": "blablater", "error": "500 error, please check the spelling"}]
+    assert errors == [
+        {"word": "blablater", "error": "500 error, please check the spelling", "kind": "permanent"}
+    ]
 
     mock_logger.warning.assert_called_once()
     assert "500 error for the word" in mock_logger.warning.call_args[0][0]
 
 
 def test_fetch_linguee_translations_exception(mocker, settings):
-    mock_get = mocker.patch("trankil.api.client.requests.get")
+    mock_get = mocker.patch("trankil.api.providers.requests.Session.get")
     mock_get.side_effect = requests.Timeout("Request timed out")
 
     mock_logger = mocker.patch("trankil.api.client.logger")
@@ -89,3 +124,331 @@ def test_fetch_linguee_translations_exception(mocker, settings):
 
     mock_logger.warning.assert_called_once()
     assert "Failed to fetch" in mock_logger.warning.call_args[0][0]
+
+
+def test_fetch_linguee_translations_cache_hit_skips_call(mocker, settings, tmp_path):
+    settings.api.cache_enabled = True
+    settings.api.cache_path = tmp_path / "cache.sqlite"
+    settings.api.cache_ttl = 3600
+    settings.api.cache_max_entries = 10
+
+    mock_sleep = mocker.patch("trankil.api.client.time.sleep")
+    mock_get = mocker.patch("trankil.api.providers.requests.Session.get")
+    mock_response = mocker.Mock()
+    mock_response.status_code = 200
+    mock_response.content = json.dumps(
+        [{"featured": True, "text": "lapin", "pos": "noun", "translations": []}]
+    ).encode()
+    mock_get.return_value = mock_response
+
+    first, _ = fetch_linguee_translations(["lapin"], settings)
+    second, errors = fetch_linguee_translations(["lapin"], settings)
+
+    assert first == second
+    assert errors == []
+    mock_get.assert_called_once()
+    mock_sleep.assert_called_once()
+
+
+def test_fetch_linguee_translations_concurrent_mode(mocker, settings):
+    settings.api.fetch_mode = "concurrent"
+    mock_sleep = mocker.patch("trankil.api.client.time.sleep")
+    mock_logger = mocker.patch("trankil.api.client.logger")
+
+    def fake_get(url, params, timeout):
+        response = mocker.Mock()
+        if params["query"] == "maisno":
+            response.status_code = 500
+        else:
+            response.status_code = 200
+            response.content = json.dumps(
+                [{"featured": True, "text": params["query"], "pos": "noun", "translations": []}]
+            ).encode()
+        return response
+
+    mocker.patch("trankil.api.providers.requests.Session.get", side_effect=fake_get)
+
+    result, errors = fetch_linguee_translations(["tasse", "maisno", "citron"], settings)
+
+    assert [entries[0].text for entries in result] == ["tasse", "citron"]
+    assert errors == [
+        {"word": "maisno", "error": "500 error, please check the spelling", "kind": "permanent"}
+    ]
+    mock_sleep.assert_not_called()
+    mock_logger.warning.assert_called_once()
+
+
+def test_fetch_linguee_translations_retries_transient_errors(mocker, settings):
+    settings.api.throttle = "adaptive"
+    settings.api.rate_per_second = 0.2
+    settings.api.max_retries = 2
+    mock_sleep = mocker.patch("trankil.api.client.time.sleep")
+    mocker.patch("trankil.api.client.logger")
+
+    throttled = mocker.Mock(status_code=429, headers={"Retry-After": "30"})
+    success = mocker.Mock(status_code=200)
+    success.content = json.dumps(
+        [{"featured": True, "text": "lapin", "pos": "noun", "translations": []}]
+    ).encode()
+    mock_get = mocker.patch(
+        "trankil.api.providers.requests.Session.get",
+        side_effect=[requests.Timeout("slow"), throttled, success],
+    )
+
+    result, errors = fetch_linguee_translations(["lapin"], settings)
+
+    assert result[0][0].text == "lapin"
+    assert errors == []
+    assert mock_get.call_count == 3
+    assert max(call.args[0] for call in mock_sleep.call_args_list) >= 30
+
+
+def test_fetch_linguee_translations_retries_exhausted(mocker, settings):
+    settings.api.max_retries = 1
+    mocker.patch("trankil.api.client.time.sleep")
+    mock_logger = mocker.patch("trankil.api.client.logger")
+    mocker.patch(
+        "trankil.api.providers.requests.Session.get",
+        return_value=mocker.Mock(status_code=503, headers={}),
+    )
+
+    result, errors = fetch_linguee_translations(["lapin"], settings)
+
+    assert result == []
+    assert errors == [
+        {
+            "word": "lapin",
+            "error": "503 error, the API is temporarily unavailable",
+            "kind": "transient",
+        }
+    ]
+    mock_logger.warning.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        FetchError("Connection refused", transient=True),
+        FetchError("404 Not Found", status_code=404),
+        FetchError("1 validation error for WordEntry"),
+    ],
+)
+def test_fetch_linguee_translations_fails_over_to_next_provider(mocker, settings, error):
+    mock_sleep = mocker.patch("trankil.api.client.time.sleep")
+    mocker.patch("trankil.api.client.logger")
+    mirror = mocker.Mock(throttled=False)
+    mirror.name = "mirror"
+    mirror.fetch.side_effect = error
+    public = mocker.Mock(throttled=True)
+    public.fetch.return_value = (
+        [WordEntry(featured=True, text="lapin", pos="noun", translations=[])],
+        [],
+    )
+    mocker.patch("trankil.api.client.build_providers", return_value=[mirror, public])
+
+    result, errors = fetch_linguee_translations(["lapin"], settings)
+
+    assert result[0][0].text == "lapin"
+    assert errors == []
+    mirror.fetch.assert_called_once()
+    public.fetch.assert_called_once()
+    mock_sleep.assert_called_once()
+
+
+def test_fetch_linguee_translations_no_fail_over_on_permanent_error(mocker, settings):
+    mocker.patch("trankil.api.client.time.sleep")
+    mocker.patch("trankil.api.client.logger")
+    mirror = mocker.Mock(throttled=False)
+    mirror.fetch.side_effect = FetchError("500 error, please check the spelling", permanent=True)
+    public = mocker.Mock(throttled=True)
+    mocker.patch("trankil.api.client.build_providers", return_value=[mirror, public])
+
+    result, errors = fetch_linguee_translations(["lapinn"], settings)
+
+    assert result == []
+    assert errors == [
+        {"word": "lapinn", "error": "500 error, please check the spelling", "kind": "permanent"}
+    ]
+    public.fetch.assert_not_called()
+
+
+def test_iter_linguee_translations_yields_each_word_when_fetched(mocker, settings):
+    mocker.patch("trankil.api.client.time.sleep")
+    mocker.patch("trankil.api.client.logger")
+    mock_get = mocker.patch("trankil.api.providers.requests.Session.get")
+    mock_get.return_value.status_code = 200
+    mock_get.return_value.content = json.dumps(
+        [{"featured": True, "text": "tasse", "pos": "noun", "translations": []}]
+    ).encode()
+
+    outcomes = iter_linguee_translations(["tasse", "citron"], settings)
+    word, entries, error = next(outcomes)
+
+    assert (word, error) == ("tasse", None)
+    assert entries[0].text == "tasse"
+    assert mock_get.call_count == 1
+    assert [word for word, _, _ in outcomes] == ["citron"]
+
+
+def test_iter_linguee_translations_concurrent_mode(mocker, settings):
+    settings.api.fetch_mode = "concurrent"
+    mocker.patch("trankil.api.client.logger")
+    mock_get = mocker.patch("trankil.api.providers.requests.Session.get")
+    mock_get.return_value.status_code = 200
+    mock_get.return_value.content = json.dumps(
+        [{"featured": True, "text": "tasse", "pos": "noun", "translations": []}]
+    ).encode()
+
+    outcomes = list(iter_linguee_translations(["tasse", "citron", "lait"], settings))
+
+    assert sorted(word for word, _, _ in outcomes) == ["citron", "lait", "tasse"]
+    assert all(error is None for _, _, error in outcomes)
+
+
+def test_fetch_linguee_translations_archives_fetched_responses(mocker, settings, tmp_path):
+    settings.api.archive_enabled = True
+    settings.app.archive_path = tmp_path / "responses.sqlite"
+    mocker.patch("trankil.api.client.time.sleep")
+    payload = [{"featured": True, "text": "tasse", "pos": "noun", "translations": []}]
+    mock_get = mocker.patch("trankil.api.providers.requests.Session.get")
+    mock_get.return_value.status_code = 200
+    mock_get.return_value.content = json.dumps(payload).encode()
+
+    fetch_linguee_translations(["tasse"], settings)
+
+    archive = ResponseArchive(tmp_path / "responses.sqlite")
+    assert "tasse" in archive
+    assert [json.loads(p) for chunk in archive.iter_chunks(10) for p in chunk] == [payload]
+    archive.close()
+
+
+def test_fetch_linguee_translations_classifies_errors(mocker, settings):
+    mocker.patch("trankil.api.client.time.sleep")
+    mocker.patch("trankil.api.client.logger")
+
+    def fake_get(url, params, timeout):
+        response = mocker.Mock()
+        response.status_code = {"lapinn": 500, "lapin": 503, "zzz": 200, "chat": 404}[
+            params["query"]
+        ]
+        response.headers = {}
+        response.content = b"[]"
+        if response.status_code == 404:
+            response.raise_for_status.side_effect = requests.HTTPError("404 Not Found")
+        return response
+
+    mocker.patch("trankil.api.providers.requests.Session.get", side_effect=fake_get)
+
+    _, errors = fetch_linguee_translations(["lapinn", "lapin", "zzz", "chat"], settings)
+
+    assert [(e["word"], e["kind"]) for e in errors] == [
+        ("lapinn", "permanent"),
+        ("lapin", "transient"),
+        ("zzz", "permanent"),
+        ("chat", "unavailable"),
+    ]
+    assert errors[2]["error"] == "No translation found, please check the spelling"
+
+
+def test_fetch_linguee_translations_negative_cache_skips_call(mocker, settings, tmp_path):
+    settings.api.cache_enabled = True
+    settings.api.cache_path = tmp_path / "cache.sqlite"
+    settings.api.cache_ttl = 3600
+    settings.api.cache_max_entries = 10
+    mocker.patch("trankil.api.client.time.sleep")
+    mocker.patch("trankil.api.client.logger")
+    mock_get = mocker.patch("trankil.api.providers.requests.Session.get")
+    mock_get.return_value.status_code = 500
+
+    _, first = fetch_linguee_translations(["lapinn"], settings)
+    _, second = fetch_linguee_translations(["lapinn"], settings)
+
+    error = {
+        "word": "lapinn",
+        "error": "500 error, please check the spelling",
+        "kind": "permanent",
+    }
+    assert first == second == [error]
+    mock_get.assert_called_once()
+
+
+def test_fetch_linguee_translations_caches_only_the_word_failures(mocker, settings, tmp_path):
+    settings.api.cache_enabled = True
+    settings.api.cache_path = tmp_path / "cache.sqlite"
+    settings.api.cache_ttl = 3600
+    settings.api.cache_max_entries = 10
+    mocker.patch("trankil.api.client.time.sleep")
+    mocker.patch("trankil.api.client.logger")
+    mock_get = mocker.patch("trankil.api.providers.requests.Session.get")
+    mock_get.return_value.status_code = 404
+    mock_get.return_value.raise_for_status.side_effect = requests.HTTPError("404 Not Found")
+
+    fetch_linguee_translations(["chat"], settings)
+    _, errors = fetch_linguee_translations(["chat"], settings)
+
+    assert errors == [{"word": "chat", "error": "404 Not Found", "kind": "unavailable"}]
+    assert mock_get.call_count == 2
+
+
+def test_iter_linguee_translations_purges_the_expired_failures(mocker, settings, tmp_path):
+    settings.api.cache_enabled = True
+    settings.api.cache_path = tmp_path / "cache.sqlite"
+    settings.api.cache_ttl = 3600
+    settings.api.cache_max_entries = 10
+    mocker.patch("trankil.api.client.time.sleep")
+    mocker.patch("trankil.api.client.logger")
+    mock_get = mocker.patch("trankil.api.providers.requests.Session.get")
+    mock_get.return_value.status_code = 500
+    fetch_linguee_translations(["lapinn"], settings)
+
+    mocker.patch("trankil.api.cache.time.time", return_value=time.time() + 10**9)
+    list(iter_linguee_translations([], settings))
+
+    cache = ResponseCache(settings.api.cache_path, 3600, 10)
+    assert cache._conn.execute("SELECT COUNT(*) FROM failures").fetchone()[0] == 0
+    cache.close()
+
+
+def test_async_pace_follows_the_adaptive_rate_and_the_pauses(mocker, settings):
+    settings.api.throttle = "adaptive"
+    settings.api.rate_burst = 2
+    clock = {"now": 0.0}
+    mocker.patch("trankil.api.throttle.time.monotonic", side_effect=lambda: clock["now"])
+    mocker.patch("trankil.api.rate_limiter.time.monotonic", side_effect=lambda: clock["now"])
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        clock["now"] += delay
+
+    mocker.patch("trankil.api.client.asyncio.sleep", side_effect=fake_sleep)
+    throttle = make_throttle(settings)
+    throttle.on_throttled(retry_after=10)
+    pace = _make_async_pace(settings, throttle)
+
+    async def pace_many(n):
+        for _ in range(n):
+            await pace()
+
+    asyncio.run(pace_many(3))
+
+    assert throttle.rate == 0.25
+    assert sleeps == [pytest.approx(10), pytest.approx(4)]
+
+
+@pytest.mark.parametrize("fetch_mode", ["sequential", "concurrent"])
+def test_iter_linguee_translations_stop_interrupts_the_waits(mocker, settings, fetch_mode):
+    settings.api.fetch_mode = fetch_mode
+    settings.api.max_retries = 3
+    settings.api.backoff_base = 60.0
+    mocker.patch("trankil.api.client.logger")
+    unavailable = mocker.Mock(status_code=503, headers={"Retry-After": "60"})
+    mocker.patch("trankil.api.providers.requests.Session.get", return_value=unavailable)
+    stop = threading.Event()
+    threading.Timer(0.2, stop.set).start()
+
+    start = time.monotonic()
+    outcomes = list(iter_linguee_translations(["lapin", "chat"], settings, stop=stop))
+
+    assert outcomes == []
+    assert time.monotonic() - start < 5
@@ -0,0 +1,152 @@
+import json
+from pathlib import Path
+
+import pytest
+import requests
+
+from trankil.api.providers import (
+    FetchError,
+    FixtureProvider,
+    LingueeHTTPProvider,
+    ProviderMiss,
+    SelfHostedLingueeProvider,
+    TranslationProvider,
+    build_providers,
+    register_provider,
+)
+from trankil.config import APISettings, AppSettings, ProviderSettings, Settings
+
+PARAMS = {
+    "query": "chat",
+    "src": "fr",
+    "dst": "en",
+    "guess_direction": False,
+    "follow_corrections": "never",
+}
+PAYLOAD = [
+    {
+        "featured": True,
+        "text": "chat",
+        "pos": "noun",
+        "translations": [{"featured": True, "text": "cat", "pos": "noun", "examples": []}],
+    }
+]
+
+
+def make_settings(providers: list[ProviderSettings]) -> Settings:
+    return Settings(app=AppSettings(src="fr", dst="en"), api=APISettings(providers=providers))
+
+
+def test_http_provider_success(mocker):
+    session = mocker.Mock()
+    session.get.return_value = mocker.Mock(status_code=200, content=json.dumps(PAYLOAD).encode())
+    provider = LingueeHTTPProvider("http://localhost/api", session)
+
+    entries, data = provider.fetch(PARAMS)
+
+    assert entries[0].translations[0].text == "cat"
+    assert json.loads(data) == PAYLOAD
+    session.get.assert_called_once_with("http://localhost/api", params=PARAMS, timeout=10)
+
+
+def test_http_provider_transient_errors(mocker):
+    session = mocker.Mock()
+    session.get.return_value = mocker.Mock(status_code=429, headers={"Retry-After": "7"})
+    provider = LingueeHTTPProvider("http://localhost/api", session)
+
+    with pytest.raises(FetchError) as exc_info:
+        provider.fetch(PARAMS)
+    assert exc_info.value.transient
+    assert exc_info.value.retry_after == 7
+    assert exc_info.value.status_code == 429
+
+    session.get.return_value = mocker.Mock(status_code=500, headers={})
+    with pytest.raises(FetchError) as exc_info:
+        provider.fetch(PARAMS)
+    assert not exc_info.value.transient
+    assert exc_info.value.status_code == 500
+
+    session.get.side_effect = requests.ConnectionError("refused")
+    with pytest.raises(FetchError) as exc_info:
+        provider.fetch(PARAMS)
+    assert exc_info.value.transient
+
+
+def test_http_provider_invalid_payload(mocker):
+    session = mocker.Mock()
+    session.get.return_value = mocker.Mock(status_code=200, content=b'[{"text": "chat"}]')
+    provider = LingueeHTTPProvider("http://localhost/api", session)
+
+    with pytest.raises(FetchError) as exc_info:
+        provider.fetch(PARAMS)
+    assert not exc_info.value.transient
+
+    session.get.return_value = mocker.Mock(status_code=200, content=b"<html>")
+    with pytest.raises(FetchError, match="Invalid JSON"):
+        provider.fetch(PARAMS)
+
+
+def test_fixture_provider_from_mapping_and_files(tmp_path: Path):
+    fixtures = tmp_path / "fr_en"
+    fixtures.mkdir()
+    (fixtures / "chien.json").write_text(json.dumps(PAYLOAD), encoding="utf-8")
+    provider = FixtureProvider({"chat": PAYLOAD}, fixtures_path=tmp_path)
+
+    assert provider.fetch(PARAMS)[1] == PAYLOAD
+    assert json.loads(provider.fetch({**PARAMS, "query": "chien"})[1]) == PAYLOAD
+    with pytest.raises(ProviderMiss):
+        provider.fetch({**PARAMS, "query": "lapin"})
+
+
+def test_build_providers_default_chain():
+    providers = build_providers(make_settings([]))
+
+    assert len(providers) == 1
+    assert isinstance(providers[0], LingueeHTTPProvider)
+    assert providers[0].throttled
+
+
+def test_build_providers_failover_chain(tmp_path: Path):
+    settings = make_settings(
+        [
+            ProviderSettings(kind="fixture", fixtures_path=tmp_path),
+            ProviderSettings(kind="linguee_self_hosted", url="http://localhost:8000/api"),
+            ProviderSettings(kind="linguee", url="https://linguee-api.fly.dev/api"),
+        ]
+    )
+    session = requests.Session()
+
+    providers = build_providers(settings, session)
+
+    assert [type(p) for p in providers] == [
+        FixtureProvider,
+        SelfHostedLingueeProvider,
+        LingueeHTTPProvider,
+    ]
+    assert [p.throttled for p in providers] == [False, False, True]
+    assert providers[1].session is providers[2].session is session
+
+
+def test_build_providers_errors():
+    with pytest.raises(ValueError, match="Unknown translation provider"):
+        build_providers(make_settings([ProviderSettings(kind="deepl")]))
+
+    with pytest.raises(ValueError, match="requires an url"):
+        build_providers(make_settings([ProviderSettings(kind="linguee_self_hosted")]))
+
+
+def test_register_provider(mocker):
+    class StaticProvider(TranslationProvider):
+        @classmethod
+        def from_settings(cls, provider_settings, session):
+            return cls("static", throttled=False)
+
+        def fetch_raw(self, params):
+            return PAYLOAD
+
+    mocker.patch.dict("trankil.api.providers.PROVIDERS")
+    register_provider("static", StaticProvider)
+
+    providers = build_providers(make_settings([ProviderSettings(kind="static")]))
+
+    assert providers[0].fetch(PARAMS)[1] == PAYLOAD
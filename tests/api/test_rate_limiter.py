@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from trankil.api.rate_limiter import TokenBucket
+
+
+def test_token_bucket_invalid_parameters():
+    with pytest.raises(ValueError, match="strictly positive"):
+        TokenBucket(rate=0, burst=1)
+
+
+def test_token_bucket_allows_burst_then_waits(mocker):
+    clock = {"now": 0.0}
+    mocker.patch("trankil.api.rate_limiter.time.monotonic", side_effect=lambda: clock["now"])
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        clock["now"] += delay
+
+    mocker.patch("trankil.api.rate_limiter.asyncio.sleep", side_effect=fake_sleep)
+
+    async def acquire_many(n):
+        bucket = TokenBucket(rate=2.0, burst=3)
+        for _ in range(n):
+            await bucket.acquire()
+
+    asyncio.run(acquire_many(5))
+
+    assert sleeps == [pytest.approx(0.5), pytest.approx(0.5)]
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from trankil.api.throttle import AdaptiveThrottle, FixedThrottle, backoff_delay, parse_retry_after
+
+
+def test_fixed_throttle_delay_range():
+    throttle = FixedThrottle(1, 2)
+    assert 1 <= throttle.next_delay() <= 2
+
+
+def test_fixed_throttle_honors_retry_after(mocker):
+    mocker.patch("trankil.api.throttle.time.monotonic", return_value=100.0)
+    throttle = FixedThrottle(1, 2)
+    throttle.on_throttled(retry_after=30)
+
+    assert throttle.next_delay() == 30
+
+
+def test_adaptive_throttle_invalid_rates():
+    with pytest.raises(ValueError):
+        AdaptiveThrottle(rate=1, min_rate=2, max_rate=1)
+
+
+def test_adaptive_throttle_aimd():
+    throttle = AdaptiveThrottle(rate=0.2, min_rate=0.05, max_rate=0.25, increase=0.1)
+
+    throttle.on_success()
+    assert throttle.rate == 0.25
+
+    throttle.on_throttled()
+    assert throttle.rate == 0.125
+
+    for _ in range(5):
+        throttle.on_throttled()
+    assert throttle.rate == 0.05
+
+
+def test_adaptive_throttle_spaces_slots(mocker):
+    mocker.patch("trankil.api.throttle.time.monotonic", return_value=10.0)
+    throttle = AdaptiveThrottle(rate=0.5, min_rate=0.1, max_rate=1)
+
+    assert throttle.next_delay() == 0
+    assert throttle.next_delay() == 2
+    assert throttle.next_delay() == 4
+
+
+def test_adaptive_throttle_honors_retry_after(mocker):
+    mocker.patch("trankil.api.throttle.time.monotonic", return_value=10.0)
+    throttle = AdaptiveThrottle(rate=1, min_rate=0.1, max_rate=1)
+    throttle.on_throttled(retry_after=60)
+
+    assert throttle.next_delay() == 60
+
+
+def test_backoff_delay_is_capped(mocker):
+    mock_uniform = mocker.patch("trankil.api.throttle.random.uniform", return_value=0.0)
+
+    backoff_delay(2, base=2, cap=60)
+    backoff_delay(10, base=2, cap=60)
+
+    assert mock_uniform.call_args_list[0].args == (0, 8)
+    assert mock_uniform.call_args_list[1].args == (0, 60)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("12") == 12
+    assert parse_retry_after("not a date") is None
+
+    date = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=120), usegmt=True)
+    assert 100 < parse_retry_after(date) <= 120
@@ -1,5 +1,10 @@
+import json
+
 import pytest
-from trankil.models.word_entry import Example, Translation, WordEntry
+from pydantic import ValidationError
+
+from trankil.config import PreprocessingSettings
+from trankil.models.word_entry import Example, Translation, WordEntry, parse_word_entries
 
 
 def test_example_valid():
@@ -68,3 +73,91 @@ def test_invalid_translation_missing_field():
             # missing pos
             examples=[Example(src="hello", dst="bonjour")],
         )
+
+
+def test_parse_word_entries_from_raw_json_and_decoded_json():
+    payload = [
+        {
+            "featured": True,
+            "text": "chat",
+            "pos": "noun",
+            "audio_links": [],
+            "translations": [{"featured": True, "text": "cat", "pos": "noun", "examples": []}],
+        }
+    ]
+
+    from_bytes = parse_word_entries(json.dumps(payload).encode())
+
+    assert from_bytes == parse_word_entries(json.dumps(payload))
+    assert from_bytes == parse_word_entries(payload)
+    assert from_bytes[0].translations[0].text == "cat"
+    with pytest.raises(ValidationError):
+        parse_word_entries(b'[{"text": "chat"}]')
+
+
+def test_parse_word_entries_pushes_the_filters_down():
+    payload = [
+        {
+            "featured": True,
+            "text": "chat",
+            "pos": "noun",
+            "translations": [
+                {"featured": True, "text": "cat", "pos": "noun", "examples": []},
+                # Not featured: discarded before its (invalid) examples are validated.
+                {"featured": False, "text": "puss", "pos": "noun", "examples": "invalid"},
+            ],
+        },
+        {"featured": False, "text": "chatte", "pos": "noun"},
+    ]
+    rules = PreprocessingSettings()
+
+    entries = parse_word_entries(json.dumps(payload), rules)
+
+    assert [e.text for e in entries] == ["chat"]
+    assert [t.text for t in entries[0].translations] == ["cat"]
+    assert parse_word_entries(payload, rules) == entries
+
+
+def test_parse_word_entries_filter_rules_disabled():
+    payload = [
+        {
+            "featured": False,
+            "text": "chatte",
+            "pos": "noun",
+            "translations": [{"featured": False, "text": "cat", "pos": "noun", "examples": []}],
+        }
+    ]
+    rules = PreprocessingSettings(featured_entries_only=False, featured_translations_only=False)
+
+    entries = parse_word_entries(json.dumps(payload), rules)
+
+    assert entries == parse_word_entries(json.dumps(payload))
+    assert entries[0].translations[0] == Translation(
+        featured=False, text="cat", pos="noun", examples=[]
+    )
+
+
+@pytest.mark.parametrize("featured_entries_only", [False, True])
+@pytest.mark.parametrize("featured_translations_only", [False, True])
+def test_parse_word_entries_builds_word_entries(featured_entries_only, featured_translations_only):
+    payload = [
+        {
+            "featured": True,
+            "text": "chat",
+            "pos": "noun",
+            "translations": [
+                {"featured": True, "text": "cat", "pos": "noun", "examples": []},
+                {"featured": False, "text": "puss", "pos": "noun", "examples": []},
+            ],
+        }
+    ]
+    rules = PreprocessingSettings(
+        featured_entries_only=featured_entries_only,
+        featured_translations_only=featured_translations_only,
+    )
+
+    entries = parse_word_entries(json.dumps(payload), rules)
+
+    assert [type(entry) for entry in entries] == [WordEntry]
+    assert all(type(t) is Translation for t in entries[0].translations)
+    assert len(entries[0].translations) == (1 if featured_translations_only else 2)
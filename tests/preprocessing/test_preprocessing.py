@@ -1,7 +1,9 @@
 import pytest
 
+from trankil.config import PreprocessingSettings
 from trankil.models.word_entry import Example, Translation, WordEntry
 from trankil.preprocessing.preprocessing import (
+    iter_preprocessed,
     keep_frequent_translations,
     keep_frequent_word,
     preprocess_translations,
@@ -61,7 +63,7 @@ def example_multiple_word_entry() -> list[WordEntry]:
                             dst="I saw my reflection in the mirror.",
                         ),
                     ],
-                    usage_frequency="almost_always",
+                    usage_frequency="almost always used",
                 ),
                 Translation(
                     featured=True,
@@ -138,27 +140,61 @@ def test_keep_frequent_translations(example_simple_word_entry):
     result = keep_frequent_translations(example_simple_word_entry)
     assert isinstance(result, list)
     assert len(result[0].translations) == 1
+    assert len(example_simple_word_entry[0].translations) == 2
 
 
-def test_preprocess_translations_calls_subfunctions(mocker):
-    input_translations = [["dummy_word_entry"]]
-
-    mock_split = mocker.patch(
-        "trankil.preprocessing.preprocessing.split_meanings",
-        side_effect=lambda x: ["split_result"],
-    )
-    mock_keep_word = mocker.patch(
-        "trankil.preprocessing.preprocessing.keep_frequent_word",
-        side_effect=lambda x: ["keep_word_result"],
-    )
-    mock_keep_trans = mocker.patch(
-        "trankil.preprocessing.preprocessing.keep_frequent_translations",
-        side_effect=lambda x: ["final_result"],
-    )
-
-    result = preprocess_translations(input_translations)
-
-    mock_split.assert_called_once_with(input_translations)
-    mock_keep_word.assert_called_once_with(["split_result"])
-    mock_keep_trans.assert_called_once_with(["keep_word_result"])
-    assert result == ["final_result"]
+def test_preprocess_translations_keeps_featured_without_mutating(
+    example_fetch_linguee_translations,
+):
+    before = [
+        [entry.model_copy(deep=True) for entry in e] for e in example_fetch_linguee_translations
+    ]
+
+    result = preprocess_translations(example_fetch_linguee_translations)
+
+    assert [(entry.text, [t.text for t in entry.translations]) for entry in result] == [
+        ("huppé", ["upmarket"]),
+        ("voir", ["see", "view"]),
+    ]
+    assert example_fetch_linguee_translations == before
+
+
+def test_iter_preprocessed_is_lazy(example_simple_word_entry):
+    def batches():
+        yield example_simple_word_entry
+        raise AssertionError("The second batch must not be read")
+
+    assert next(iter_preprocessed(batches())).text == "huppé"
+
+
+@pytest.mark.parametrize(
+    "rules, expected",
+    [
+        (
+            PreprocessingSettings(min_usage_frequency="often used"),
+            [("huppé", []), ("voir", ["see"])],
+        ),
+        (PreprocessingSettings(allowed_pos=["verb"]), [("voir", ["see", "view"])]),
+        (
+            PreprocessingSettings(featured_entries_only=False, allowed_pos=["verb"]),
+            [("voir", ["see", "view"]), ("se voir", ["show", "meet up"])],
+        ),
+        (
+            PreprocessingSettings(featured_translations_only=False, max_translations=2),
+            [("huppé", ["upmarket", "hupped"]), ("voir", ["see", "view"])],
+        ),
+        (PreprocessingSettings(max_translations=1), [("huppé", ["upmarket"]), ("voir", ["see"])]),
+    ],
+)
+def test_preprocess_translations_rules(example_fetch_linguee_translations, rules, expected):
+    result = preprocess_translations(example_fetch_linguee_translations, rules)
+
+    assert [(entry.text, [t.text for t in entry.translations]) for entry in result] == expected
+
+
+def test_preprocess_translations_follows_the_rules(example_fetch_linguee_translations):
+    rules = PreprocessingSettings(featured_entries_only=False, featured_translations_only=False)
+
+    result = preprocess_translations(example_fetch_linguee_translations, rules)
+
+    assert result == split_meanings(example_fetch_linguee_translations)
@@ -0,0 +1,89 @@
+import json
+from pathlib import Path
+
+from trankil.anki.note_store import NoteStore
+from trankil.batch import discover_pairs, interleave, pair_settings, run_all_pairs
+from trankil.config import APISettings, AppSettings, ProviderSettings, Settings
+from trankil.synthetic import synthetic_response
+from trankil.work_queue import WorkQueue
+
+
+def write_input(data_folder: Path, pair: str, words: list[str]) -> None:
+    (data_folder / pair).mkdir(parents=True)
+    (data_folder / pair / "input_words.csv").write_text(
+        "word_to_translate\n" + "".join(f"{word}\n" for word in words), encoding="utf-8"
+    )
+
+
+def test_discover_pairs(tmp_path):
+    write_input(tmp_path, "fr_en", [])
+    write_input(tmp_path, "de_en", [])
+    (tmp_path / "es_fr").mkdir()
+    (tmp_path / "misc").mkdir()
+
+    assert discover_pairs(tmp_path) == [("de", "en"), ("fr", "en")]
+
+
+def test_pair_settings():
+    settings = Settings(
+        app=AppSettings(src="fr", dst="en", words_limit=3),
+        api=APISettings(fetch_mode="concurrent"),
+    )
+
+    settings_of_pair = pair_settings(settings, "de", "fr")
+
+    assert settings_of_pair.app.pair == "de_fr"
+    assert settings_of_pair.app.words_limit == 3
+    assert settings_of_pair.api.fetch_mode == "sequential"
+    assert settings.app.pair == "fr_en"
+
+
+def test_interleave_round_robin():
+    iterators = {"a": iter([1, 2, 3]), "b": iter([]), "c": iter([4, 5])}
+
+    assert list(interleave(iterators)) == [("a", 1), ("c", 4), ("a", 2), ("c", 5), ("a", 3)]
+
+
+def test_run_all_pairs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data_folder = tmp_path / "inputs"
+    fixtures = tmp_path / "fixtures"
+    words = {"fr_en": ["chat", "chien", "inconnu"], "de_en": ["Hund"]}
+    for pair, pair_words in words.items():
+        write_input(data_folder, pair, pair_words)
+        (fixtures / pair).mkdir(parents=True)
+        for word in pair_words[:2]:
+            response = synthetic_response(word, n_entries=1, n_translations=2, n_examples=1)
+            (fixtures / pair / f"{word}.json").write_text(json.dumps(response))
+
+    settings = Settings(
+        app=AppSettings(src="it", dst="en", words_limit=10, data_folder=data_folder),
+        api=APISettings(
+            cache_enabled=False,
+            providers=[ProviderSettings(kind="fixture", fixtures_path=fixtures)],
+        ),
+    )
+
+    results = run_all_pairs(settings)
+
+    assert set(results) == {"de_en", "fr_en"}
+    n_translated, errors, deck_paths = results["fr_en"]
+    assert n_translated == 2
+    assert [error["word"] for error in errors] == ["inconnu"]
+    assert len(deck_paths) == 1
+    assert results["de_en"][0] == 1
+
+    for pair, n_done in (("fr_en", 2), ("de_en", 1)):
+        queue = WorkQueue(Path(f"outputs/{pair}/queue.sqlite"))
+        assert queue.counts()["done"] == n_done
+        queue.close()
+        store = NoteStore(Path(f"outputs/{pair}/Trankil.sqlite"))
+        assert len(store) == n_done
+        store.close()
+    assert not Path("outputs/it_en").exists()
+
+
+def test_run_all_pairs_without_pair(tmp_path):
+    settings = Settings(app=AppSettings(src="fr", dst="en", data_folder=tmp_path))
+
+    assert run_all_pairs(settings) == {}
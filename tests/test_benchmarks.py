@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from benchmarks.bench_startup import run_command
+from benchmarks.loadtest import main as loadtest_main
+from benchmarks.suite import STAGES, Workload, compare, main, parse_scale, run_suite
+
+
+def test_parse_scale():
+    assert parse_scale("1k") == 1_000
+    assert parse_scale("100k") == 100_000
+    assert parse_scale("1M") == 1_000_000
+    assert parse_scale("42") == 42
+
+
+def test_run_suite_all_stages():
+    results = run_suite(list(STAGES), [10], Workload(1, 2, 1, batch_size=4))
+
+    assert results["metadata"]["shape"] == {"entries": 1, "translations": 2, "examples": 1}
+    assert set(results["results"]) == {f"{stage}@10" for stage in STAGES}
+    for result in results["results"].values():
+        assert result["scale"] == 10
+        assert result["seconds"] >= 0
+        assert result["peak_kib"] is not None
+
+
+def test_compare_reports_regressions():
+    baseline = {"results": {"parse@10": {"seconds": 1.0, "peak_kib": 100.0}}}
+    results = {
+        "results": {
+            "parse@10": {"seconds": 1.5, "peak_kib": 100.0},
+            "export@10": {"seconds": 9.0, "peak_kib": 1.0},
+        }
+    }
+
+    assert compare(results, baseline, tolerance=0.2) == ["parse@10 seconds: x1.50"]
+    assert compare(results, baseline, tolerance=0.6) == []
+
+
+def test_main_fails_on_regression(tmp_path):
+    output = tmp_path / "results.json"
+    args = ["--scale", "5", "--stage", "read_input_csv", "--no-memory", "--output", str(output)]
+    assert main(args) == 0
+    results = json.loads(output.read_text())
+    assert results["results"]["read_input_csv@5"]["peak_kib"] is None
+
+    results["results"]["read_input_csv@5"]["seconds"] = 1e-12
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(results))
+    assert main(args + ["--baseline", str(baseline)]) == 1
+
+
+def test_loadtest(tmp_path, capsys):
+    output = tmp_path / "load.json"
+
+    assert loadtest_main(["--words", "20", "--latency", "0", "--output", str(output)]) == 0
+
+    report = json.loads(output.read_text("utf-8"))
+    assert report["words"] == 20
+    assert report["failures"] == {"permanent": 0, "transient": 0, "unavailable": 0}
+    assert report["latencies"]["request"]["count"] == 20
+    assert report["statuses"] == {"200": 20}
+    assert "words/s" in capsys.readouterr().out
+
+
+def test_run_command_imports_trankil_outside_the_repository(tmp_path):
+    seconds, stderr = run_command(["-c", "import trankil.cli"], str(tmp_path))
+
+    assert seconds > 0
+    assert "trankil.cli" in stderr
+    with pytest.raises(RuntimeError, match="exit code 1:\nboom"):
+        run_command(["-c", "import sys; print('boom'); sys.exit(1)"], str(tmp_path))
@@ -0,0 +1,83 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import trankil.main
+from trankil.cli import main
+from trankil.work_queue import WorkQueue
+
+HEAVY_MODULES = ("genanki", "loguru", "pydantic", "pydantic_settings", "requests")
+
+
+@pytest.mark.parametrize(
+    "argv, function_name, kwargs",
+    [
+        ([], "run", {}),
+        (["run"], "run", {}),
+        (["fetch"], "run", {"export": False}),
+        (["run", "--all-pairs"], "run", {"all_pairs": True}),
+        (["fetch", "--all-pairs"], "run", {"export": False, "all_pairs": True}),
+        (["render"], "rebuild", {"export": False}),
+        (["rebuild"], "rebuild", {}),
+        (["export"], "export", {"full": False}),
+        (["export", "--full"], "export", {"full": True}),
+        (["daemon"], "daemon", {}),
+        (["compact-notes"], "compact", {}),
+    ],
+)
+def test_commands(monkeypatch, argv, function_name, kwargs):
+    calls = []
+    monkeypatch.setattr(trankil.main, function_name, lambda **kw: calls.append(kw))
+
+    assert main(argv) == 0
+    assert calls == [kwargs]
+
+
+def test_status(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    queue = WorkQueue(Path("outputs/fr_en/queue.sqlite"))
+    queue.enqueue(["chat", "chien", "oiseau"])
+    queue.mark_done(queue.claim(1))
+    queue.close()
+
+    assert main(["status"]) == 0
+    assert capsys.readouterr().out == "fr_en: 2 pending, 0 in flight, 1 done, 0 failed\n"
+
+    assert main(["status", "--pair", "de_en"]) == 1
+    assert capsys.readouterr().out == "No work queue found.\n"
+
+
+def test_status_imports_no_heavy_dependency(tmp_path):
+    root = Path(__file__).resolve().parents[1]
+    code = (
+        "import sys; from trankil.cli import main; main(['status']);"
+        f" print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,
+        env={"PYTHONPATH": str(root)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.splitlines()[-1] == "[]"
+
+
+def test_main_imports_the_command_modules_lazily(tmp_path):
+    root = Path(__file__).resolve().parents[1]
+    code = (
+        "import sys; import trankil.main;"
+        " print([m for m in ('genanki', 'requests', 'trankil.daemon') if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,
+        env={"PYTHONPATH": str(root)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.splitlines()[-1] == "[]"
@@ -5,8 +5,10 @@ import pytest
 
 from trankil.config import (
     APISettings,
+    CardLimits,
     AppSettings,
     DeckSettings,
+    LEGACY_DECK_ID,
     get_settings,
     SettingsError,
     Settings,
@@ -18,6 +20,10 @@ def test_appsettings_valid():
     assert app.src == "en"
     assert app.dst == "fr"
     assert app.words_limit == 100
+    assert app.pipeline == "staged"
+    assert app.archive_path == Path("outputs/en_fr/responses.sqlite")
+    assert app.pair == "en_fr"
+    assert app.metrics_report_path == Path("outputs/en_fr/run_metrics.json")
 
 
 def test_appsettings_missing_field():
@@ -30,6 +36,46 @@ def test_decksettings_defaults_and_properties():
     assert deck.name == "Trankil"
     assert deck.export_name.name == "Trankil.apkg"
     assert deck.save_notes_json.name == "Trankil.json"
+    assert deck.notes_store.name == "Trankil.sqlite"
+    assert deck.export_mode == "delta"
+    assert deck.export_interval == 60
+    assert deck.delta_export_name("20250101-000000").name == "Trankil_20250101-000000.apkg"
+
+
+def test_decksettings_deck_id_by_pair():
+    deck = DeckSettings(deck_ids={"fr_en": 1239922789})
+    assert deck.deck_id("fr_en") == 1239922789
+    assert deck.deck_id("de_en") == DeckSettings().deck_id("de_en")
+    assert deck.deck_id("de_en") != deck.deck_id("es_fr")
+    assert 1 << 30 <= deck.deck_id("de_en") < 1 << 31
+    assert DeckSettings(name="Other").deck_id("de_en") != deck.deck_id("de_en")
+
+
+def test_decksettings_deck_name_by_pair():
+    assert DeckSettings().deck_name("fr_en") == "Trankil::fr_en"
+    assert DeckSettings().deck_name("fr_en") != DeckSettings().deck_name("de_en")
+    assert DeckSettings(deck_ids={"fr_en": LEGACY_DECK_ID}).deck_name("fr_en") == "Trankil"
+
+
+def test_settings_keep_the_legacy_deck_id_for_the_configured_pair():
+    settings = Settings(app=AppSettings(src="fr", dst="en"))
+    assert settings.deck.deck_id("fr_en") == LEGACY_DECK_ID
+    assert settings.deck.deck_id("de_en") != LEGACY_DECK_ID
+    assert settings.deck.deck_name("fr_en") == "Trankil"
+    assert settings.deck.deck_name("de_en") == "Trankil::de_en"
+    pinned = Settings(app=AppSettings(src="fr", dst="en"), deck={"deck_ids": {"fr_en": 42}})
+    assert pinned.deck.deck_id("fr_en") == 42
+
+
+def test_decksettings_rejects_invalid_templates():
+    with pytest.raises(ValidationError, match="Unknown fields"):
+        DeckSettings(templates={"back_example": "<li>{word}</li>"})
+
+
+def test_preprocessingsettings_defaults():
+    preprocessing = Settings(app=AppSettings(src="fr", dst="en")).preprocessing
+    assert preprocessing.featured_entries_only is True
+    assert preprocessing.featured_translations_only is True
 
 
 def test_apisettings_defaults():
@@ -37,6 +83,8 @@ def test_apisettings_defaults():
     assert api.url.startswith("https://")
     assert api.guess_direction == False
     assert api.follow_correction == "never"
+    assert api.cache_enabled is True
+    assert api.cache_path == Path("outputs/linguee_cache.sqlite")
 
 
 def test_appsettings_paths_properties():
@@ -45,6 +93,9 @@ def test_appsettings_paths_properties():
     assert app.output_folder == Path("outputs/en_fr")
     assert app.output_errors_path == Path("outputs/en_fr/errors.csv")
     assert app.output_history_path == Path("outputs/en_fr/history.csv")
+    assert app.history_index_path == Path("outputs/en_fr/history.sqlite")
+    assert app.queue_path == Path("outputs/en_fr/queue.sqlite")
+    assert app.input_cursor_path == Path("outputs/en_fr/input_words.cursor")
 
 
 def test_settings_env(monkeypatch):
@@ -76,3 +127,33 @@ def test_get_settings_invalid_env(monkeypatch):
         get_settings()
 
     assert "Invalid configuration" in str(exc_info.value)
+
+
+def test_settings_env_providers(monkeypatch):
+    monkeypatch.setenv("APP__SRC", "fr")
+    monkeypatch.setenv("APP__DST", "en")
+    monkeypatch.setenv(
+        "API__PROVIDERS",
+        '[{"kind": "linguee_self_hosted", "url": "http://localhost:8000/api/v2/translations"},'
+        ' {"kind": "linguee", "url": "https://linguee-api.fly.dev/api/v2/translations"}]',
+    )
+
+    settings = get_settings()
+
+    assert [p.kind for p in settings.api.providers] == ["linguee_self_hosted", "linguee"]
+    assert settings.api.providers[0].throttled is None
+
+
+def test_card_limits(monkeypatch):
+    monkeypatch.setenv("APP__SRC", "fr")
+    monkeypatch.setenv("APP__DST", "en")
+    monkeypatch.setenv("DECK__CARD_LIMITS__MAX_EXAMPLES", "3")
+    monkeypatch.setenv("DECK__CARD_LIMITS__OVERFLOW_FIELD", "true")
+
+    settings = get_settings()
+
+    assert settings.deck.card_limits.max_examples == 3
+    assert settings.deck.card_limits.overflow_field is True
+    assert settings.deck.card_limits.max_field_bytes is None
+    with pytest.raises(ValidationError):
+        CardLimits(example_min_length=50, example_max_length=10)
@@ -0,0 +1,111 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+from trankil.anki.note_store import NoteStore
+from trankil.config import APISettings, AppSettings, DaemonSettings, ProviderSettings, Settings
+from trankil.daemon import run_daemon
+from trankil.synthetic import synthetic_response
+from trankil.watcher import PollingWatcher
+from trankil.work_queue import WorkQueue
+
+
+def wait_until(condition, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timeout"
+        time.sleep(0.02)
+
+
+def n_done(queue_path: Path) -> int:
+    if not queue_path.exists():
+        return 0
+    queue = WorkQueue(queue_path)
+    try:
+        return queue.counts()["done"]
+    finally:
+        queue.close()
+
+
+def test_run_daemon(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fixtures = tmp_path / "fixtures"
+    (fixtures / "fr_en").mkdir(parents=True)
+    for word in ("chat", "chien", "oiseau"):
+        response = synthetic_response(word, n_entries=1, n_translations=2, n_examples=1)
+        (fixtures / "fr_en" / f"{word}.json").write_text(json.dumps(response))
+    settings = Settings(
+        app=AppSettings(src="fr", dst="en", words_limit=2),
+        api=APISettings(
+            cache_enabled=False,
+            providers=[ProviderSettings(kind="fixture", fixtures_path=fixtures)],
+        ),
+    )
+    input_path = settings.app.input_path
+    input_path.parent.mkdir(parents=True)
+    input_path.write_text("word_to_translate\nchat\nchien\n", encoding="utf-8")
+
+    stop = threading.Event()
+    results = []
+    watcher = PollingWatcher(input_path, interval=0.02)
+    thread = threading.Thread(
+        target=lambda: results.append(run_daemon(settings, stop, watcher)), daemon=True
+    )
+    thread.start()
+    try:
+        wait_until(lambda: n_done(settings.app.queue_path) == 2)
+        with input_path.open("a", encoding="utf-8") as file:
+            file.write("oiseau\n")
+        wait_until(lambda: n_done(settings.app.queue_path) == 3)
+    finally:
+        stop.set()
+        thread.join(10)
+
+    assert not thread.is_alive()
+    n_translated, errors, deck_paths = results[0]
+    assert n_translated == 3
+    assert errors == []
+    assert len(deck_paths) == 1
+    store = NoteStore(Path("outputs/fr_en/Trankil.sqlite"))
+    assert len(store) == 3
+    store.close()
+
+
+def test_run_daemon_stops_immediately(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    settings = Settings(app=AppSettings(src="fr", dst="en"))
+    stop = threading.Event()
+    stop.set()
+
+    assert run_daemon(settings, stop, PollingWatcher(settings.app.input_path)) == (0, [], [])
+
+
+class SilentWatcher:
+    def wait(self, timeout: float) -> bool:
+        time.sleep(min(timeout, 0.02))
+        return False
+
+    def close(self) -> None:
+        pass
+
+
+def test_run_daemon_imports_only_on_change_or_rescan(tmp_path, monkeypatch, mocker):
+    monkeypatch.chdir(tmp_path)
+    settings = Settings(
+        app=AppSettings(src="fr", dst="en"), daemon=DaemonSettings(rescan_interval=3600)
+    )
+    settings.app.input_path.parent.mkdir(parents=True)
+    settings.app.input_path.write_text("word_to_translate\n", encoding="utf-8")
+    mock_import = mocker.spy(WorkQueue, "import_csv")
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=run_daemon, args=(settings, stop, SilentWatcher()), daemon=True
+    )
+    thread.start()
+    time.sleep(0.3)
+    stop.set()
+    thread.join(10)
+
+    assert not thread.is_alive()
+    assert mock_import.call_count == 1
@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from trankil.history import HistoryIndex
+
+
+def test_add_and_lookup(tmp_path: Path):
+    history = HistoryIndex(tmp_path / "sub" / "history.sqlite")
+
+    assert history.add(["chat", "chien", ""]) == 2
+    assert history.add(["chat", "lapin"]) == 1
+    assert "chat" in history
+    assert "oiseau" not in history
+    assert len(history) == 3
+    assert history.known(["lapin", "oiseau", "chien"]) == {"lapin", "chien"}
+    assert history.known(f"mot{i}" for i in range(2000)) == set()
+    history.close()
+
+
+def test_sync_csv_reads_only_new_rows(tmp_path: Path):
+    csv_path = tmp_path / "history.csv"
+    history = HistoryIndex(tmp_path / "history.sqlite")
+
+    assert history.sync_csv(csv_path) == 0
+
+    csv_path.write_text("translated_words\nchat\nchien\n", encoding="utf-8")
+    assert history.sync_csv(csv_path) == 2
+    assert history.sync_csv(csv_path) == 0
+
+    with csv_path.open("a", encoding="utf-8") as f:
+        f.write("lapin\nchat\n")
+    history.close()
+
+    # The offset of the previous sync is persisted with the index.
+    history = HistoryIndex(tmp_path / "history.sqlite")
+    assert history.sync_csv(csv_path) == 1
+    assert len(history) == 3
+    history.close()
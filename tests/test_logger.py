@@ -0,0 +1,50 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from trankil.config import LoggingSettings
+from trankil.logger import configure_logging, logger
+
+
+@pytest.fixture(autouse=True)
+def restore_logging():
+    yield
+    configure_logging(LoggingSettings(level="DEBUG", path=None))
+
+
+def test_import_has_no_io_side_effect(tmp_path):
+    root = Path(__file__).resolve().parents[1]
+    subprocess.run(
+        [sys.executable, "-c", "import trankil.main"],
+        cwd=tmp_path,
+        env={"PYTHONPATH": str(root)},
+        check=True,
+    )
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_configure_logging_json_file_and_level(tmp_path):
+    log_path = tmp_path / "logs" / "app.log"
+    configure_logging(LoggingSettings(level="INFO", path=log_path, format="json"))
+
+    logger.debug("hidden")
+    logger.info("{n_word} words", n_word=3)
+    logger.complete()
+
+    records = [json.loads(line)["record"] for line in log_path.read_text().splitlines()]
+    assert [record["message"] for record in records] == ["3 words"]
+    assert records[0]["extra"] == {"n_word": 3}
+
+
+def test_configure_logging_replaces_its_sinks(tmp_path):
+    first, second = tmp_path / "first.log", tmp_path / "second.log"
+    configure_logging(LoggingSettings(path=first, enqueue=False))
+    configure_logging(LoggingSettings(path=second, enqueue=False))
+
+    logger.info("message")
+
+    assert first.read_text() == ""
+    assert second.read_text().count("message") == 1
@@ -13,15 +13,19 @@ from trankil.models.word_entry import Example, Translation, WordEntry
 def test_run_main_flow(mocker):
     # --- Mock all the called functions ---
     mock_get_settings = mocker.patch("trankil.main.get_settings")
-    mock_read_input = mocker.patch("trankil.main.read_input_csv")
-    mock_fetch_api = mocker.patch("trankil.main.fetch_linguee_translations")
-    mock_preprocess = mocker.patch("trankil.main.preprocess_translations")
-    mock_generate_deck = mocker.patch("trankil.main.generate_deck")
-    mock_remove_words = mocker.patch("trankil.main.remove_translated_word_from_csv")
-    mock_write_translated = mocker.patch("trankil.main.write_translated_word")
-    mock_write_errors = mocker.patch("trankil.main.write_errors")
+    mock_configure_logging = mocker.patch("trankil.main.configure_logging")
+    mock_queue_class = mocker.patch("trankil.work_queue.WorkQueue")
+    mock_fetch_api = mocker.patch("trankil.api.client.fetch_linguee_translations")
+    mock_preprocess = mocker.patch("trankil.preprocessing.preprocessing.preprocess_translations")
+    mock_generate_deck = mocker.patch("trankil.anki.deck_generator.generate_deck")
+    mock_write_translated = mocker.patch("trankil.writer.write_translated_word")
+    mock_record_translated = mocker.patch("trankil.pipeline.record_translated")
+    mock_write_errors = mocker.patch("trankil.writer.write_errors")
     mock_logger_info = mocker.patch("trankil.main.logger.info")
     mock_logger_success = mocker.patch("trankil.main.logger.success")
+    mock_write_metrics = mocker.patch(
+        "trankil.main.write_run_metrics", return_value=(Path("m.json"), Path("m.prom"))
+    )
 
     class DummySettings:
         class App:
@@ -29,18 +33,31 @@ def test_run_main_flow(mocker):
             output_folder = Path("outputs")
             output_errors_path = Path("errors.csv")
             output_history_path = Path("history.csv")
+            queue_path = Path("queue.sqlite")
+            input_cursor_path = Path("input_words.cursor")
             words_limit = 10
+            skip_translated = False
+            pipeline = "staged"
 
         class Deck:
             name = "Trankil"
             export_name = Path("test_trankil.apkg")
 
+        class Metrics:
+            enabled = True
+
         app = App()
         deck = Deck()
+        metrics = Metrics()
+        logging = object()
+        preprocessing = None
 
     settings_instance = DummySettings()
     mock_get_settings.return_value = settings_instance
-    mock_read_input.return_value = ["word1", "word2"]
+    mock_queue = mock_queue_class.return_value
+    mock_queue.release_in_flight.return_value = 0
+    mock_queue.import_csv.return_value = 2
+    mock_queue.claim.return_value = ["word1", "word2"]
     mock_fetch_api.return_value = (
         [
             [
@@ -59,7 +76,7 @@ def test_run_main_flow(mocker):
                 )
             ]
         ],
-        [{"word": "word2", "error": "error_message"}],
+        [{"word": "word2", "error": "error_message", "kind": "permanent"}],
     )
 
     mock_preprocess.return_value = [
@@ -81,11 +98,21 @@ def test_run_main_flow(mocker):
     run()
 
     mock_get_settings.assert_called_once()
-    mock_read_input.assert_called_once_with(Path("input.csv"), 10)
+    mock_configure_logging.assert_called_once_with(settings_instance.logging)
+    mock_queue_class.assert_called_once_with(Path("queue.sqlite"))
+    mock_queue.import_csv.assert_called_once_with(
+        Path("input.csv"), Path("input_words.cursor"), requeue=True
+    )
+    mock_queue.claim.assert_called_once_with(10)
     mock_fetch_api.assert_called_once_with(["word1", "word2"], settings_instance)
     mock_preprocess.assert_called_once()
     mock_generate_deck.assert_called_once()
-    mock_remove_words.assert_called_once_with(["word1", "word2"], Path("input.csv"))
+    assert list(mock_queue.mark_done.call_args[0][0]) == ["word1"]
+    mock_record_translated.assert_called_once_with(["word1"], settings_instance)
+    mock_queue.mark_failed.assert_called_once_with(
+        [{"word": "word2", "error": "error_message", "kind": "permanent"}]
+    )
+    mock_queue.close.assert_called_once()
     mock_write_translated.assert_called_once_with(["word1"], Path("history.csv"))
     mock_write_errors.assert_called_once_with(
         [{"word": "word2", "error": "error_message"}], Path("errors.csv")
@@ -94,6 +121,11 @@ def test_run_main_flow(mocker):
     mock_logger_info.assert_called()
     mock_logger_success.assert_called()
 
+    mock_write_metrics.assert_called_once()
+    report = mock_write_metrics.call_args[0][1].report()
+    assert report["counters"] == {"words_translated": 1, "word_errors": 1}
+    assert set(report["stages"]) >= {"fetch", "preprocess", "deck"}
+
 
 def test_main_success(monkeypatch):
     called = {}
@@ -106,7 +138,7 @@ def test_main_success(monkeypatch):
         trankil.main, "logger", type("Logger", (), {"exception": lambda *a, **k: None})()
     )
 
-    trankil.main.main()
+    trankil.main.main([])
     # If mock_run is called during the test then the dict called get values.
     assert called.get("ok", False) is True
 
@@ -128,7 +160,77 @@ def test_main_exception(monkeypatch):
     )
 
     with pytest.raises(ValueError, match="Fail"):
-        trankil.main.main()
+        trankil.main.main([])
 
     assert "Application crashed due to an unexpected error" in called["msg"]
     assert isinstance(called["exc"], ValueError)
+
+
+def test_main_compact_notes(monkeypatch):
+    called = {}
+
+    monkeypatch.setattr(trankil.main, "compact", lambda: called.setdefault("compact", True))
+    monkeypatch.setattr(trankil.main, "run", lambda: called.setdefault("run", True))
+
+    trankil.main.main(["compact-notes"])
+
+    assert called == {"compact": True}
+
+
+def test_main_export_full(monkeypatch):
+    called = {}
+
+    monkeypatch.setattr(trankil.main, "export", lambda full: called.setdefault("full", full))
+
+    trankil.main.main(["export", "--full"])
+
+    assert called == {"full": True}
+
+
+def test_run_streaming_pipeline(mocker):
+    mock_get_settings = mocker.patch("trankil.main.get_settings")
+    mocker.patch("trankil.main.configure_logging")
+    mock_queue_class = mocker.patch("trankil.work_queue.WorkQueue")
+    mock_stream = mocker.patch(
+        "trankil.pipeline.stream_words", return_value=(1, [], [Path("deck.apkg")])
+    )
+    mock_fetch_api = mocker.patch("trankil.api.client.fetch_linguee_translations")
+    mocker.patch("trankil.main.logger")
+
+    settings = mock_get_settings.return_value
+    settings.app.pipeline = "streaming"
+    settings.app.skip_translated = False
+    settings.metrics.enabled = False
+    mock_queue = mock_queue_class.return_value
+    mock_queue.release_in_flight.return_value = 0
+    mock_queue.claim.return_value = ["word1"]
+
+    run()
+
+    mock_stream.assert_called_once_with(["word1"], settings, mock_queue, True)
+    mock_fetch_api.assert_not_called()
+    mock_queue.close.assert_called_once()
+
+
+def test_run_writes_metrics_on_failure(mocker):
+    mocker.patch("trankil.main.get_settings")
+    mocker.patch("trankil.main.configure_logging")
+    mocker.patch("trankil.main.translate", side_effect=RuntimeError("Fail"))
+    mock_write_metrics = mocker.patch(
+        "trankil.main.write_run_metrics", return_value=(Path("m.json"), Path("m.prom"))
+    )
+
+    with pytest.raises(RuntimeError, match="Fail"):
+        run()
+
+    mock_write_metrics.assert_called_once()
+
+
+def test_main_rebuild(monkeypatch):
+    called = {}
+
+    monkeypatch.setattr(trankil.main, "rebuild", lambda: called.setdefault("rebuild", True))
+
+    trankil.main.main(["rebuild"])
+
+    assert called == {"rebuild": True}
@@ -0,0 +1,114 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from trankil import metrics
+from trankil.config import AppSettings, MetricsSettings, Settings
+from trankil.metrics import RunMetrics, quantile, write_run_metrics
+
+
+def test_quantile_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+    assert quantile(samples, 0.5) == 50
+    assert quantile(samples, 0.95) == 95
+    assert quantile(samples, 0.99) == 99
+    assert quantile([3.0], 0.99) == 3
+
+
+def test_report_spans_latencies_counters_and_gauges():
+    run = RunMetrics()
+    with run.span("request", latency=True):
+        pass
+    run.add_span("render", 0.5)
+    run.add_span("render", 0.25)
+    for seconds in (0.1, 0.2, 0.3, 0.4):
+        run.observe("word", seconds)
+    run.increment("fetched_bytes", 100)
+    run.increment("fetched_bytes", 50)
+    run.set_gauge("notes_stored", 3)
+    run.set_gauge("notes_stored", 4)
+
+    report = run.report()
+
+    assert report["stages"]["render"] == {"calls": 2, "seconds": 0.75}
+    assert report["stages"]["request"]["calls"] == 1
+    assert report["latencies"]["request"]["count"] == 1
+    assert report["latencies"]["word"] == pytest.approx(
+        {"count": 4, "sum": 1.0, "p50": 0.2, "p95": 0.4, "p99": 0.4, "max": 0.4}
+    )
+    assert report["counters"] == {"fetched_bytes": 150}
+    assert report["gauges"] == {"notes_stored": 4}
+    json.dumps(report)
+
+
+def test_span_records_failed_blocks():
+    run = RunMetrics()
+    with pytest.raises(ValueError):
+        with run.span("parse"):
+            raise ValueError
+    assert run.report()["stages"]["parse"]["calls"] == 1
+
+
+def test_to_prometheus():
+    run = RunMetrics()
+    for seconds in (0.07, 0.3, 100.0):
+        run.observe("request", seconds)
+    run.add_span("export", 1.5)
+    run.increment("cache_hits", 2)
+
+    text = run.to_prometheus({"pair": "fr_en"})
+
+    assert "# TYPE trankil_latency_seconds histogram" in text
+    assert 'trankil_latency_seconds_bucket{pair="fr_en",name="request",le="0.05"} 0.0' in text
+    assert 'trankil_latency_seconds_bucket{pair="fr_en",name="request",le="0.1"} 1.0' in text
+    assert 'trankil_latency_seconds_bucket{pair="fr_en",name="request",le="60"} 2.0' in text
+    assert 'trankil_latency_seconds_bucket{pair="fr_en",name="request",le="+Inf"} 3.0' in text
+    assert 'trankil_latency_seconds_count{pair="fr_en",name="request"} 3.0' in text
+    assert (
+        'trankil_latency_quantile_seconds{pair="fr_en",name="request",quantile="0.5"} 0.3' in text
+    )
+    assert 'trankil_stage_seconds{pair="fr_en",stage="export"} 1.5' in text
+    assert 'trankil_cache_hits{pair="fr_en"} 2.0' in text
+    assert text.endswith("\n")
+
+
+def test_start_run_resets_the_current_metrics():
+    previous = metrics.start_run()
+    metrics.increment("requests")
+
+    current = metrics.start_run()
+    metrics.increment("words")
+
+    assert current is not previous
+    assert current.report()["counters"] == {"words": 1}
+    assert previous.report()["counters"] == {"requests": 1}
+
+
+def test_write_run_metrics(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    settings = Settings(
+        app=AppSettings(src="fr", dst="en"),
+        metrics=MetricsSettings(textfile_dir=tmp_path / "textfiles"),
+    )
+    run = RunMetrics()
+    run.increment("requests", 3)
+
+    report_path, prometheus_path = write_run_metrics(settings, run)
+
+    assert report_path == Path("outputs/fr_en/run_metrics.json")
+    assert json.loads(report_path.read_text())["counters"] == {"requests": 3}
+    assert prometheus_path == tmp_path / "textfiles" / "trankil_fr_en.prom"
+    assert 'trankil_requests{pair="fr_en"} 3.0' in prometheus_path.read_text()
+    assert not list(prometheus_path.parent.glob("*.tmp"))
+
+
+def test_write_run_metrics_all_pairs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    settings = Settings(app=AppSettings(src="fr", dst="en"))
+
+    report_path, prometheus_path = write_run_metrics(settings, RunMetrics(), all_pairs=True)
+
+    assert report_path == Path("outputs/run_metrics.json")
+    assert prometheus_path == Path("outputs/trankil_all.prom")
+    assert 'pair="all"' in prometheus_path.read_text()
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+import requests
+
+from trankil.api.client import fetch_linguee_translations
+from trankil.config import APISettings, AppSettings, ProviderSettings, Settings
+from trankil.mock_server import MockBehavior, MockLingueeServer
+
+
+def test_mock_server_answers_the_translations_contract(tmp_path):
+    (tmp_path / "fr_en").mkdir()
+    (tmp_path / "fr_en" / "chat.json").write_text(json.dumps([{"text": "chat"}]))
+
+    with MockLingueeServer(MockBehavior(fixtures_path=tmp_path)) as server:
+        params = {"query": "chat", "src": "fr", "dst": "en"}
+        assert requests.get(server.url, params=params, timeout=5).json() == [{"text": "chat"}]
+        params["query"] = "chien"
+        assert requests.get(server.url, params=params, timeout=5).json()[0]["text"] == "chien"
+        assert requests.get(server.url, params={"query": "chat"}, timeout=5).status_code == 422
+        assert requests.get(server.url + "/other", timeout=5).status_code == 404
+
+    assert server.statuses == {200: 2}
+
+
+@pytest.mark.parametrize(
+    "behavior, status",
+    [
+        (MockBehavior(spelling_error_rate=1.0), 500),
+        (MockBehavior(error_rate=1.0, retry_after=3), 503),
+        (MockBehavior(burst_every=60, burst_duration=30, retry_after=3), 429),
+    ],
+)
+def test_mock_server_errors(behavior, status):
+    with MockLingueeServer(behavior) as server:
+        resp = requests.get(
+            server.url, params={"query": "chat", "src": "fr", "dst": "en"}, timeout=5
+        )
+
+    assert resp.status_code == status
+    assert resp.headers.get("Retry-After") == (None if status == 500 else "3")
+
+
+def test_mock_server_latency_distributions():
+    assert MockBehavior(latency=0.1).sample_latency() == 0.1
+    assert 0 <= MockBehavior(latency=0.1, latency_distribution="uniform").sample_latency() <= 0.2
+    assert MockBehavior(latency=0.1, latency_distribution="lognormal").sample_latency() > 0
+    with pytest.raises(ValueError):
+        MockBehavior(latency_distribution="pareto")
+
+
+def test_client_against_mock_server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with MockLingueeServer(MockBehavior(seed=0)) as server:
+        settings = Settings(
+            app=AppSettings(src="fr", dst="en"),
+            api=APISettings(
+                cache_enabled=False,
+                archive_enabled=False,
+                providers=[ProviderSettings(kind="linguee_self_hosted", url=server.url)],
+            ),
+        )
+        translations, errors = fetch_linguee_translations(["chat", "chien"], settings)
+
+    assert [entries[0].text for entries in translations] == ["chat", "chien"]
+    assert errors == []
@@ -0,0 +1,177 @@
+import pytest
+
+from trankil.anki.note_store import NoteStore
+from trankil.api.providers import FetchError
+from trankil.config import AppSettings, DeckSettings, Settings
+from trankil.history import HistoryIndex
+from trankil.models.word_entry import Example, Translation, WordEntry
+from trankil.pipeline import (
+    BackgroundExporter,
+    WordCheckpointer,
+    claim_untranslated,
+    claim_words,
+    record_errors,
+    stream_words,
+)
+from trankil.work_queue import DONE, FAILED, IN_FLIGHT, PENDING, WorkQueue
+
+
+def make_entry(word: str) -> WordEntry:
+    return WordEntry(
+        featured=True,
+        text=word,
+        pos="noun",
+        translations=[
+            Translation(
+                featured=True,
+                text=f"{word}_en",
+                pos="noun",
+                examples=[Example(src=f"une {word}", dst=f"a {word}_en")],
+            )
+        ],
+    )
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return Settings(app=AppSettings(src="fr", dst="en"), deck=DeckSettings(name="deck"))
+
+
+@pytest.fixture
+def queue(settings):
+    queue = WorkQueue(settings.app.queue_path)
+    queue.enqueue(["tasse", "maisno", "citron"])
+    queue.claim(3)
+    yield queue
+    queue.close()
+
+
+def test_stream_words_checkpoints_each_word(mocker, settings, queue):
+    mocker.patch(
+        "trankil.pipeline.iter_linguee_translations",
+        return_value=iter(
+            [
+                ("tasse", [make_entry("tasse")], None),
+                (
+                    "maisno",
+                    None,
+                    FetchError("500 error, please check the spelling", permanent=True),
+                ),
+                ("citron", [make_entry("citron")], None),
+            ]
+        ),
+    )
+
+    n_translated, errors, deck_paths = stream_words(["tasse", "maisno", "citron"], settings, queue)
+
+    assert n_translated == 2
+    assert errors == [
+        {"word": "maisno", "error": "500 error, please check the spelling", "kind": "permanent"}
+    ]
+    assert queue.counts()[DONE] == 2
+    assert queue.counts()[FAILED] == 1
+    assert settings.app.output_history_path.read_text(encoding="utf-8").split() == [
+        "translated_words",
+        "tasse",
+        "citron",
+    ]
+    assert settings.app.output_errors_path.exists()
+    assert len(deck_paths) == 1 and deck_paths[0].exists()
+
+    store = NoteStore(settings.app.output_folder / settings.deck.notes_store)
+    assert len(store) == 2
+    store.close()
+
+
+def test_stream_words_interrupted_keeps_processed_words(mocker, settings, queue):
+    def outcomes(words, settings):
+        yield "tasse", [make_entry("tasse")], None
+        raise KeyboardInterrupt
+
+    mocker.patch("trankil.pipeline.iter_linguee_translations", side_effect=outcomes)
+    mock_export = mocker.patch("trankil.pipeline.export_notes")
+
+    with pytest.raises(KeyboardInterrupt):
+        stream_words(["tasse", "maisno", "citron"], settings, queue)
+
+    assert queue.counts()[DONE] == 1
+    assert queue.counts()[IN_FLIGHT] == 2
+    mock_export.assert_not_called()
+
+    store = NoteStore(settings.app.output_folder / settings.deck.notes_store)
+    assert len(store) == 1
+    store.close()
+
+
+def test_claim_words_skips_translated_words(settings):
+    settings.app.input_path.parent.mkdir(parents=True)
+    settings.app.input_path.write_text(
+        "word_to_translate\ntasse\ncitron\nchat\nchien\n", encoding="utf-8"
+    )
+    settings.app.output_folder.mkdir(parents=True)
+    settings.app.output_history_path.write_text(
+        "translated_words\ntasse\nchat\n", encoding="utf-8"
+    )
+    queue = WorkQueue(settings.app.queue_path)
+
+    assert claim_words(queue, settings) == ["citron", "chien"]
+    assert queue.counts()[DONE] == 2
+
+    settings.app.skip_translated = False
+    with settings.app.input_path.open("a", encoding="utf-8") as f:
+        f.write("tasse2\ntasse\n")
+    assert claim_words(queue, settings) == ["tasse", "citron", "chien", "tasse2"]
+    queue.close()
+
+
+def test_checkpointed_words_are_skipped_as_queried(settings, queue):
+    checkpointer = WordCheckpointer(settings, queue, export=False)
+    # The entry of an inflected query has another text, the entries of a word may all be
+    # filtered out.
+    checkpointer.process("tasse", [make_entry("tasses")], None)
+    checkpointer.process(
+        "citron", [make_entry("citron").model_copy(update={"featured": False})], None
+    )
+    checkpointer.close()
+    assert settings.app.output_history_path.read_text(encoding="utf-8").split() == [
+        "translated_words",
+        "tasses",
+    ]
+
+    queue.enqueue(["tasse", "citron", "lait"])
+    queue.release_in_flight()
+    history = HistoryIndex(settings.app.history_index_path)
+    history.sync_csv(settings.app.output_history_path)
+
+    assert claim_untranslated(queue, 10, history) == ["maisno", "lait"]
+    history.close()
+
+
+def test_record_errors(settings, queue):
+    errors = [
+        {"word": "tasse", "error": "503 error", "kind": "transient"},
+        {"word": "maisno", "error": "500 error", "kind": "permanent"},
+        {"word": "citron", "error": "404 error", "kind": "unavailable"},
+    ]
+
+    assert record_errors(queue, errors, settings) == [{"word": "maisno", "error": "500 error"}]
+    assert queue.counts()[PENDING] == 2
+    assert queue.counts()[FAILED] == 1
+    assert queue.error_log(word="citron")[0]["kind"] == "unavailable"
+
+
+def test_background_exporter_respects_interval(mocker, settings):
+    mock_export = mocker.patch("trankil.pipeline.export_notes", return_value=None)
+
+    exporter = BackgroundExporter(settings, interval=3600)
+    exporter.maybe_export()
+    exporter.close()
+    assert mock_export.call_count == 1
+
+    mock_export.reset_mock()
+    exporter = BackgroundExporter(settings, interval=0)
+    exporter.maybe_export()
+    exporter.maybe_export()
+    exporter.close()
+    assert 2 <= mock_export.call_count <= 3
@@ -1,5 +1,5 @@
 import pytest
-from trankil.reader import read_input_csv
+from trankil.reader import iter_input_csv, load_cursor, read_input_csv, save_cursor
 
 
 def test_read_input_csv_success(tmp_path):
@@ -29,3 +29,70 @@ def test_read_input_csv_empty_file(tmp_path):
 
     with pytest.raises(ValueError, match="CSV file is empty"):
         read_input_csv(csv_file, 10)
+
+
+def test_read_input_csv_limit_and_other_columns(tmp_path):
+    csv_file = tmp_path / "test.csv"
+    csv_file.write_text(
+        'id,word_to_translate\n1,chat\n\n2,"chien, loup"\n3,lapin\n', encoding="utf-8"
+    )
+
+    assert read_input_csv(csv_file, 2) == ["chat", "chien, loup"]
+
+
+def test_iter_input_csv_stops_reading_early(tmp_path):
+    csv_file = tmp_path / "test.csv"
+    csv_file.write_text("word_to_translate\n" + "mot\n" * 1000, encoding="utf-8")
+    words = iter_input_csv(csv_file)
+
+    assert next(words) == ("mot", len("word_to_translate\nmot\n"))
+    words.close()
+
+
+def test_iter_input_csv_resumes_from_offset(tmp_path):
+    csv_file = tmp_path / "test.csv"
+    csv_file.write_text("word_to_translate\nchat\nvalidé\ncitron\n", encoding="utf-8")
+
+    rows = list(iter_input_csv(csv_file))
+    offset = rows[1][1]
+
+    assert [word for word, _ in iter_input_csv(csv_file, offset)] == ["citron"]
+    assert read_input_csv(csv_file, 10, offset) == ["citron"]
+
+
+def test_iter_input_csv_invalid_offset_restarts(tmp_path):
+    csv_file = tmp_path / "test.csv"
+    csv_file.write_text("word_to_translate\nchat\ndog\n", encoding="utf-8")
+
+    assert read_input_csv(csv_file, 10, offset=20) == ["chat", "dog"]
+    assert read_input_csv(csv_file, 10, offset=10_000) == ["chat", "dog"]
+
+
+def test_cursor_round_trip(tmp_path):
+    csv_file = tmp_path / "test.csv"
+    csv_file.write_text("word_to_translate\nchat\ndog\nlapin\n", encoding="utf-8")
+    cursor = tmp_path / "cursor"
+    assert load_cursor(cursor) == 0
+
+    _, offset = list(iter_input_csv(csv_file))[1]
+    save_cursor(cursor, offset)
+    assert [word for word, _ in iter_input_csv(csv_file, load_cursor(cursor))] == ["lapin"]
+
+
+def test_cursor_is_reset_when_the_file_is_rewritten(tmp_path):
+    csv_file = tmp_path / "test.csv"
+    csv_file.write_text("word_to_translate\nchat\nchien\n", encoding="utf-8")
+    cursor = tmp_path / "cursor"
+    _, offset = list(iter_input_csv(csv_file))[-1]
+    save_cursor(cursor, offset, csv_file)
+
+    with csv_file.open("a", encoding="utf-8") as f:
+        f.write("lapin\n")
+    assert load_cursor(cursor, csv_file) == offset
+
+    csv_file.write_text("word_to_translate\nlapin\nrats\ntortue\n", encoding="utf-8")
+    assert load_cursor(cursor, csv_file) == 0
+    assert load_cursor(cursor) == offset
+
+    cursor.write_text(str(offset), encoding="utf-8")
+    assert load_cursor(cursor, csv_file) == offset
@@ -0,0 +1,161 @@
+import json
+
+import pytest
+
+from trankil.anki.note_store import NoteStore
+from trankil.api.archive import ResponseArchive
+from trankil.api.cache import ResponseCache
+from trankil.config import APISettings, AppSettings, CardLimits, DeckSettings, Settings
+from trankil.rebuild import rebuild_notes, render_chunk, render_in_pool
+
+
+def make_response(word: str) -> list[dict]:
+    return [
+        {
+            "featured": True,
+            "text": word,
+            "pos": "noun",
+            "translations": [
+                {
+                    "featured": True,
+                    "text": f"{word}_en",
+                    "pos": "noun",
+                    "examples": [{"src": f"une {word}", "dst": f"a {word}_en"}],
+                }
+            ],
+        }
+    ]
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return Settings(
+        app=AppSettings(src="fr", dst="en", rebuild_workers=2, rebuild_chunk_size=2),
+        api=APISettings(cache_path=tmp_path / "cache.sqlite"),
+        deck=DeckSettings(name="deck"),
+    )
+
+
+def test_render_chunk():
+    notes = render_chunk([json.dumps(make_response("tasse")), json.dumps([])])
+
+    assert len(notes) == 1
+    assert "tasse" in notes[0]["front"]
+
+
+def test_render_in_pool_keeps_chunk_order():
+    chunks = [[json.dumps(make_response(f"mot{i}"))] for i in range(5)]
+
+    rendered = list(render_in_pool(chunks, workers=2))
+
+    assert [notes[0]["front"] for notes in rendered] == [
+        render_chunk(chunk)[0]["front"] for chunk in chunks
+    ]
+
+
+def test_rebuild_notes_replaces_the_store(mocker, settings):
+    store_path = settings.app.output_folder / settings.deck.notes_store
+    store = NoteStore(store_path)
+    store.add([{"front": "old layout", "back": "old layout"}])
+    store.close()
+
+    archive = ResponseArchive(settings.app.archive_path)
+    for word in ["tasse", "citron", "lait"]:
+        archive.add(word, make_response(word))
+    archive.close()
+
+    cache = ResponseCache(settings.api.cache_path, ttl=0, max_entries=10)
+    cache.set(
+        {
+            "query": "pain",
+            "src": "fr",
+            "dst": "en",
+            "guess_direction": False,
+            "follow_corrections": "never",
+        },
+        make_response("pain"),
+    )
+    cache.close()
+
+    mocker.patch(
+        "trankil.rebuild.render_in_pool",
+        side_effect=lambda chunks, workers, deck_settings, rules, pair: (
+            render_chunk(chunk, deck_settings, rules, pair) for chunk in chunks
+        ),
+    )
+
+    deck_path = rebuild_notes(settings)
+
+    assert deck_path == settings.app.output_folder / settings.deck.export_name
+    assert deck_path.exists()
+    assert store_path.with_name(store_path.name + ".bak").exists()
+
+    store = NoteStore(store_path)
+    fronts = [n["front"] for n in store]
+    assert len(fronts) == 4
+    assert "old layout" not in fronts
+    assert store.last_export("delta")[0] == store.last_id()
+    store.close()
+
+
+def test_rebuild_notes_empty_archive(settings):
+    assert rebuild_notes(settings) is None
+
+
+def test_rebuild_notes_keeps_the_guids_of_the_entries(mocker, settings):
+    mocker.patch(
+        "trankil.rebuild.render_in_pool",
+        side_effect=lambda chunks, workers, deck_settings, rules, pair: (
+            render_chunk(chunk, deck_settings, rules, pair) for chunk in chunks
+        ),
+    )
+    archive = ResponseArchive(settings.app.archive_path)
+    for word in ["tasse", "citron"]:
+        archive.add(word, make_response(word) + make_response(word)[:1])
+    archive.close()
+    store_path = settings.app.output_folder / settings.deck.notes_store
+
+    def rebuilt_notes():
+        rebuild_notes(settings, export=False)
+        store = NoteStore(store_path)
+        notes = {n["guid"]: n["back"] for n in store}
+        store.close()
+        return notes
+
+    before = rebuilt_notes()
+    settings.deck.templates = settings.deck.templates.model_copy(update={"separator": "<hr>"})
+    settings.deck.card_limits = CardLimits(max_examples=1)
+    after = rebuilt_notes()
+
+    assert len(before) == 2
+    assert before.keys() == after.keys()
+    assert before != after
+
+
+def test_rebuild_notes_keeps_the_guids_of_the_legacy_notes(mocker, settings):
+    mocker.patch(
+        "trankil.rebuild.render_in_pool",
+        side_effect=lambda chunks, workers, deck_settings, rules, pair: (
+            render_chunk(chunk, deck_settings, rules, pair) for chunk in chunks
+        ),
+    )
+    archive = ResponseArchive(settings.app.archive_path)
+    for word in ["tasse", "citron"]:
+        archive.add(word, make_response(word))
+    archive.close()
+    store_path = settings.app.output_folder / settings.deck.notes_store
+    legacy = render_chunk([json.dumps(make_response("tasse"))])[0]
+    store = NoteStore(store_path)
+    store.add([legacy])
+    legacy_guid = next(iter(store))["guid"]
+    store.close()
+
+    settings.deck.templates = settings.deck.templates.model_copy(update={"separator": "<hr>"})
+    rebuild_notes(settings, export=False)
+
+    store = NoteStore(store_path)
+    notes = {n["guid"]: n["front"] for n in store}
+    store.close()
+    assert len(notes) == 2
+    assert notes[legacy_guid] != legacy["front"]
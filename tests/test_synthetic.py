@@ -0,0 +1,13 @@
+from trankil.models.word_entry import parse_word_entries
+from trankil.synthetic import synthetic_response
+
+
+def test_synthetic_response_is_valid_and_reproducible():
+    response = synthetic_response("chat", n_entries=2, n_translations=4, n_examples=2)
+
+    entries = parse_word_entries(response)
+
+    assert response == synthetic_response("chat", n_entries=2, n_translations=4, n_examples=2)
+    assert [e.text for e in entries] == ["chat", "chat_1"]
+    assert all(len(e.translations) == 4 for e in entries)
+    assert all(len(t.examples) == 2 for e in entries for t in e.translations)
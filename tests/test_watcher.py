@@ -0,0 +1,46 @@
+import pytest
+
+from trankil.watcher import InotifyWatcher, PollingWatcher, make_watcher
+
+
+def test_polling_watcher(tmp_path):
+    path = tmp_path / "input_words.csv"
+    watcher = PollingWatcher(path, interval=0.01)
+
+    assert not watcher.wait(0.05)
+    path.write_text("word_to_translate\n")
+    assert watcher.wait(0.05)
+    assert not watcher.wait(0.05)
+    with path.open("a") as file:
+        file.write("chat\n")
+    assert watcher.wait(0.05)
+
+
+def test_polling_watcher_timeout_before_poll(tmp_path):
+    path = tmp_path / "input_words.csv"
+    watcher = PollingWatcher(path, interval=60)
+    path.write_text("word_to_translate\n")
+
+    assert not watcher.wait(0.01)
+
+
+def test_inotify_watcher(tmp_path):
+    path = tmp_path / "data" / "input_words.csv"
+    try:
+        watcher = InotifyWatcher(path)
+    except OSError:
+        pytest.skip("inotify is not available")
+
+    try:
+        assert not watcher.wait(0.01)
+        (path.parent / "other.csv").write_text("chat\n")
+        assert not watcher.wait(0.05)
+        path.write_text("word_to_translate\n")
+        assert watcher.wait(1)
+        assert not watcher.wait(0.01)
+    finally:
+        watcher.close()
+
+
+def test_make_watcher(tmp_path):
+    assert isinstance(make_watcher(tmp_path / "words.csv", "polling"), PollingWatcher)
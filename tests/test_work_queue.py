@@ -0,0 +1,141 @@
+import sqlite3
+from pathlib import Path
+
+from trankil.work_queue import DONE, FAILED, IN_FLIGHT, PENDING, PERMANENT, TRANSIENT, WorkQueue
+
+
+def test_enqueue_ignores_known_words(tmp_path: Path):
+    queue = WorkQueue(tmp_path / "sub" / "queue.sqlite")
+
+    assert queue.enqueue(["chat", "chien", ""]) == 2
+    assert queue.enqueue(["chat", "lapin"]) == 1
+    assert queue.counts() == {PENDING: 3, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+    queue.close()
+
+
+def test_import_csv_imports_only_new_rows(tmp_path: Path):
+    csv_path = tmp_path / "input_words.csv"
+    cursor_path = tmp_path / "input_words.cursor"
+    csv_path.write_text("word_to_translate\nchat\nchien\n", encoding="utf-8")
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+
+    assert queue.import_csv(csv_path, cursor_path) == 2
+    assert queue.import_csv(csv_path, cursor_path) == 0
+
+    with csv_path.open("a", encoding="utf-8") as f:
+        f.write("lapin\nchat\n")
+
+    assert queue.import_csv(csv_path, cursor_path) == 1
+    assert queue.claim(10) == ["chat", "chien", "lapin"]
+    queue.close()
+
+
+def test_import_csv_scans_a_rewritten_file_again(tmp_path: Path):
+    csv_path = tmp_path / "input_words.csv"
+    cursor_path = tmp_path / "input_words.cursor"
+    csv_path.write_text("word_to_translate\nchat\nchien\n", encoding="utf-8")
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    assert queue.import_csv(csv_path, cursor_path) == 2
+    queue.mark_done(queue.claim(10))
+
+    csv_path.write_text("word_to_translate\nlapin\nrats\ntortue\nchat\n", encoding="utf-8")
+
+    assert queue.import_csv(csv_path, cursor_path, requeue=True) == 3
+    assert queue.claim(10) == ["lapin", "rats", "tortue"]
+    queue.close()
+
+
+def test_enqueue_requeues_done_and_failed_words(tmp_path: Path):
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    queue.enqueue(["chat", "chien", "lapin", "loup"])
+    queue.claim(3)
+    queue.mark_done(["chat"])
+    queue.mark_failed([{"word": "chien", "error": "500 error"}])
+
+    assert queue.enqueue(["chat", "chien", "lapin", "loup"]) == 0
+    assert queue.enqueue(["chat", "chien", "lapin", "loup", "ours"], requeue=True) == 3
+    assert queue.counts() == {PENDING: 4, IN_FLIGHT: 1, DONE: 0, FAILED: 0}
+    assert queue.claim(10) == ["chat", "chien", "loup", "ours"]
+    queue.close()
+
+
+def test_claim_and_mark_states(tmp_path: Path):
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    queue.enqueue(["chat", "chien", "lapin"])
+
+    assert queue.claim(2) == ["chat", "chien"]
+    assert queue.claim(2) == ["lapin"]
+
+    queue.mark_done(["chat"])
+    queue.mark_failed([{"word": "chien", "error": "500 error"}])
+
+    assert queue.counts() == {PENDING: 0, IN_FLIGHT: 1, DONE: 1, FAILED: 1}
+    queue.close()
+
+
+def test_release_in_flight(tmp_path: Path):
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    queue.enqueue(["chat", "chien"])
+    queue.claim(1)
+    queue.close()
+
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    assert queue.release_in_flight() == 1
+    assert queue.claim(5) == ["chat", "chien"]
+    queue.close()
+
+
+def test_retry_later_schedules_with_backoff(tmp_path: Path, mocker):
+    mock_time = mocker.patch("trankil.work_queue.time.time", return_value=1000.0)
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    queue.enqueue(["chat"])
+    error = {"word": "chat", "error": "503 error"}
+
+    assert queue.claim(1) == ["chat"]
+    assert queue.retry_later([error], delay=10, max_delay=15, max_attempts=3) == []
+    assert queue.counts()[PENDING] == 1
+    assert queue.claim(1) == []
+
+    mock_time.return_value = 1010.0
+    assert queue.claim(1) == ["chat"]
+    assert queue.retry_later([error], delay=10, max_delay=15, max_attempts=3) == []
+
+    mock_time.return_value = 1024.0
+    assert queue.claim(1) == []
+    mock_time.return_value = 1025.0
+    assert queue.claim(1) == ["chat"]
+    assert queue.retry_later([error], delay=10, max_delay=15, max_attempts=3) == [error]
+    assert queue.counts()[FAILED] == 1
+    queue.close()
+
+
+def test_error_log(tmp_path: Path):
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    queue.enqueue(["chat", "chta"])
+    queue.claim(2)
+    queue.retry_later([{"word": "chat", "error": "timeout"}], 10, 10, 5)
+    queue.mark_failed([{"word": "chta", "error": "500 error"}])
+
+    assert [(e["word"], e["kind"], e["attempt"]) for e in queue.error_log()] == [
+        ("chat", TRANSIENT, 1),
+        ("chta", PERMANENT, 1),
+    ]
+    assert [e["error"] for e in queue.error_log(word="chta")] == ["500 error"]
+    assert [e["word"] for e in queue.error_log(kind=TRANSIENT)] == ["chat"]
+    queue.close()
+
+
+def test_queue_of_previous_version_is_migrated(tmp_path: Path):
+    conn = sqlite3.connect(tmp_path / "queue.sqlite")
+    conn.execute(
+        "CREATE TABLE words (seq INTEGER PRIMARY KEY AUTOINCREMENT, word TEXT NOT NULL UNIQUE,"
+        " state TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, error TEXT,"
+        " updated_at REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO words (word, state, updated_at) VALUES ('chat', 'pending', 0)")
+    conn.commit()
+    conn.close()
+
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    assert queue.claim(1) == ["chat"]
+    queue.close()
@@ -1,7 +1,7 @@
 import csv
 from pathlib import Path
 import pytest
-from trankil.writer import remove_translated_word_from_csv, write_errors, write_translated_word
+from trankil.writer import write_errors, write_translated_word
 
 
 def test_write_errors_creates_file(tmp_path: Path):
@@ -60,14 +60,6 @@ def write_csv_file(path: Path, header: list[str], rows: list[list[str]]):
         writer.writerows(rows)
 
 
-def read_csv_file(path: Path):
-    with path.open(newline="", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        header = next(reader)
-        rows = [row[0] for row in reader]
-    return header, rows
-
-
 def read_csv_words(path: Path):
     with path.open(newline="", encoding="utf-8") as f:
         reader = csv.reader(f)
@@ -76,58 +68,6 @@ def read_csv_words(path: Path):
     return header, rows
 
 
-def test_remove_some_words(tmp_path: Path):
-    csv_path = tmp_path / "words.csv"
-    header = ["word"]
-    rows = [["apple"], ["banana"], ["cherry"]]
-    write_csv_file(csv_path, header, rows)
-
-    remove_translated_word_from_csv(["banana"], csv_path)
-    new_header, new_rows = read_csv_file(csv_path)
-
-    assert new_header == header
-    assert new_rows == ["apple", "cherry"]
-
-
-def test_remove_no_words(tmp_path: Path):
-    csv_path = tmp_path / "words.csv"
-    header = ["word"]
-    rows = [["apple"], ["banana"]]
-    write_csv_file(csv_path, header, rows)
-
-    remove_translated_word_from_csv([], csv_path)
-    new_header, new_rows = read_csv_file(csv_path)
-
-    assert new_header == header
-    assert new_rows == ["apple", "banana"]
-
-
-def test_remove_all_words(tmp_path: Path):
-    csv_path = tmp_path / "words.csv"
-    header = ["word"]
-    rows = [["apple"], ["banana"]]
-    write_csv_file(csv_path, header, rows)
-
-    remove_translated_word_from_csv(["apple", "banana"], csv_path)
-    new_header, new_rows = read_csv_file(csv_path)
-
-    assert new_header == header
-    assert new_rows == []
-
-
-def test_remove_word_not_present(tmp_path: Path):
-    csv_path = tmp_path / "words.csv"
-    header = ["word"]
-    rows = [["apple"], ["banana"]]
-    write_csv_file(csv_path, header, rows)
-
-    remove_translated_word_from_csv(["cherry"], csv_path)
-    new_header, new_rows = read_csv_file(csv_path)
-
-    assert new_header == header
-    assert new_rows == ["apple", "banana"]
-
-
 def test_write_translated_word_creates_file(tmp_path: Path):
     file_path = tmp_path / "history.csv"
     words = ["hello", "world"]
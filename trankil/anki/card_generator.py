@@ -1,42 +1,74 @@
+from typing import Optional
+
+import genanki
+
+from trankil.anki.note_store import entry_guid
+from trankil.anki.templates import CardRenderer
+from trankil.config import CardTemplates
 from trankil.models.word_entry import WordEntry
 
+DEFAULT_RENDERER = CardRenderer(CardTemplates())
+
 
-def generate_fields(card_data: WordEntry) -> tuple[str, str]:
+def generate_fields(
+    card_data: WordEntry, renderer: Optional[CardRenderer] = None
+) -> tuple[str, str]:
     """Generates Anki card in HTML format.
 
     Parameters
     ----------
     card_data : WordEntry
         WordEntry instance that contains minimal information to create an anki card.
+    renderer : Optional[CardRenderer]
+        Renderer of the card templates, see `trankil.anki.templates.get_renderer`.
+        The default templates are used if None.
 
     Returns
     -------
     tuple[str, str]
         Front and Back of the anki card.
     """
-    original_word = card_data.text
-    type_word = card_data.pos
-    translations = card_data.translations
-
-    front_parts = [
-        f"<div class='word'>{original_word} <span class='type_word'>{type_word}</span></div>"
-    ]
-    back_parts = [
-        f"<div class='word'>{original_word} <span class='type_word'>{type_word}</span></div>"
-    ]
-
-    for i, trans in enumerate(translations, start=1):
-        front_parts.append(
-            f"<div class='group'><div class='translation_title'>__translation_{i}__:</div><ul>"
-        )
-        back_parts.append(f"<div class='group'><div class='meaning'>{trans.text}</div><ul>")
-
-        for example in trans.examples:
-            src, dist = example.src, example.dst
-            front_parts.append(f"<li>{src}</li>")
-            back_parts.append(f"<li>{src}<br><i>{dist}</i></li>")
-
-        front_parts.append("</ul></div>")
-        back_parts.append("</ul></div>")
-
-    return "<br>".join(front_parts), "<br>".join(back_parts)
+    return (renderer or DEFAULT_RENDERER).render(card_data)
+
+
+def generate_note(
+    card_data: WordEntry, renderer: Optional[CardRenderer] = None, pair: Optional[str] = None
+) -> dict[str, str]:
+    """Generates the HTML note of an Anki card, within the card limits of the renderer.
+
+    Parameters
+    ----------
+    card_data : WordEntry
+        WordEntry instance that contains minimal information to create an anki card.
+    renderer : Optional[CardRenderer]
+        Renderer of the card templates, see `trankil.anki.templates.get_renderer`.
+        The default templates are used if None.
+    pair : Optional[str]
+        Language pair of the card. If set, the note gets the GUID of its source entry and
+        meaning, see `trankil.anki.note_store.entry_guid`.
+
+    Returns
+    -------
+    dict[str, str]
+        HTML note with the "front", "back" and "overflow" keys, and the "guid" and "key"
+        keys if the pair is set.
+    """
+    note = (renderer or DEFAULT_RENDERER).render_note(card_data)
+    if pair is not None:
+        note["guid"] = note["key"] = entry_guid(pair, card_data)
+    return note
+
+
+def legacy_guid(card_data: WordEntry) -> str:
+    """Returns the GUID the previous versions gave to the note of an entry: the genanki
+    default, a hash of the fields rendered with the default templates.
+
+    Parameters
+    ----------
+    card_data : WordEntry
+
+    Returns
+    -------
+    str
+    """
+    return genanki.guid_for(*generate_fields(card_data))
@@ -1,55 +1,104 @@
 from __future__ import annotations
 
-import json
+from collections.abc import Iterator
+from datetime import datetime
 from pathlib import Path
-from typing import TYPE_CHECKING, Union
+from typing import TYPE_CHECKING, Optional, Union
 
 import genanki
 
-from trankil.anki.card_generator import generate_fields
-from trankil.anki.model import my_model
+from trankil import metrics
+from trankil.anki.card_generator import generate_note
+from trankil.anki.model import get_model, my_model
+from trankil.anki.note_store import NoteStore
+from trankil.anki.templates import get_renderer
 from trankil.logger import logger
 
-
 if TYPE_CHECKING:
     from trankil.config import Settings
     from trankil.models.word_entry import WordEntry
 
 
-def load_notes(output_path: Union[str, Path]) -> list[dict[str, str]]:
-    """Loads and returns existing notes if any.
+class StoredDeck(genanki.Deck):
+    """genanki deck whose notes are read lazily from a note store.
+    genanki iterates over the notes twice when writing the package, so the notes are
+    exposed as a re-iterable view of the store instead of a list.
 
     Parameters
     ----------
-    output_path : Union[str, Path]
-        Path where potential existing notes are.
+    deck_id : int
+    name : str
+    store : NoteStore
+    after_id : int
+        Only the notes stored after this id are in the deck, all of them by default.
+    until_id : Optional[int]
+        Only the notes stored up to this id are in the deck, no upper bound if None.
+    model : genanki.Model
+        Model of the notes, see `trankil.anki.model.get_model`.
+    """
+
+    def __init__(
+        self,
+        deck_id: int,
+        name: str,
+        store: NoteStore,
+        after_id: int = 0,
+        until_id: Optional[int] = None,
+        model: genanki.Model = my_model,
+    ) -> None:
+        super().__init__(deck_id, name)
+        self.notes = _StoredNotes(store, after_id, until_id, model)
+
+
+class _StoredNotes:
+    def __init__(
+        self, store: NoteStore, after_id: int, until_id: Optional[int], model: genanki.Model
+    ) -> None:
+        self.store = store
+        self.after_id = after_id
+        self.until_id = until_id
+        self.model = model
+
+    def __iter__(self) -> Iterator[genanki.Note]:
+        n_fields = len(self.model.fields)
+        for n in self.store.iter_notes(self.after_id, self.until_id):
+            fields = [n["front"], n["back"], n["overflow"]][:n_fields]
+            yield genanki.Note(model=self.model, fields=fields, guid=n["guid"])
+
+
+def open_note_store(settings: Settings) -> NoteStore:
+    """Opens the note store of the deck, migrating the legacy json file of notes if any.
+
+    Parameters
+    ----------
+    settings : Settings
 
     Returns
     -------
-    list
-        Contains list of the existing notes in HTML format.
+    NoteStore
     """
-    if output_path.exists():
-        logger.info("Existing notes are loaded to build the deck.")
-        return json.loads(output_path.read_text(encoding="utf-8"))
-    else:
-        logger.info("No existing note found. The deck is built from scratch.")
-        return []
+    store = NoteStore(settings.app.output_folder / settings.deck.notes_store)
+    n_migrated = store.migrate_from_json(
+        settings.app.output_folder / settings.deck.save_notes_json
+    )
+    if n_migrated:
+        logger.info("{n_notes} notes migrated from the json file.", n_notes=n_migrated)
+    return store
 
 
-def save_notes(notes: list[dict[str, str]], output_path: Union[str, Path]) -> None:
-    """Writes HTML notes into a json file.
+def compact_notes(settings: Settings) -> None:
+    """Compacts the note store of the deck.
 
     Parameters
     ----------
-    notes : list[dict[str, str]]
-        Contains that HTML notes.
-    output_path : Union[str, Path]
+    settings : Settings
     """
-    path = Path(output_path)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(notes, ensure_ascii=False, indent=2), encoding="utf-8")
-    logger.info("All the notes are saved in the json file.")
+    store = open_note_store(settings)
+    try:
+        store.compact()
+    finally:
+        store.close()
+    logger.success("The note store {store_path} is compacted", store_path=store.path)
 
 
 def export_deck(deck: genanki.Deck, output_path: Union[str, Path]) -> None:
@@ -62,11 +111,66 @@ def export_deck(deck: genanki.Deck, output_path: Union[str, Path]) -> None:
     """
     pkg = genanki.Package(deck)
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    pkg.write_to_file(output_path)
+    with metrics.span("export"):
+        pkg.write_to_file(output_path)
     logger.success("The deck is saved to the path {deck_path}", deck_path=output_path)
 
 
-def generate_deck(translations: list[WordEntry], settings: Settings) -> None:
+def export_notes(store: NoteStore, settings: Settings, full: bool = False) -> Optional[Path]:
+    """Exports the notes of the store in .apkg format.
+
+    In the "delta" export mode, the package holds only the notes added since the last
+    export and is written to a new timestamped file: Anki merges it into the existing deck
+    thanks to the stable GUIDs. In the "full" export mode, the package holds all the notes.
+    The export is skipped when the content of the store has not changed since the last
+    export in the same mode, unless the full export is explicitly requested.
+
+    Parameters
+    ----------
+    store : NoteStore
+    settings : Settings
+    full : bool
+        Forces a full export.
+
+    Returns
+    -------
+    Optional[Path]
+        Path of the written package, None if the export is skipped.
+    """
+    mode = "full" if full else settings.deck.export_mode
+    full_path = settings.app.output_folder / settings.deck.export_name
+    last_id, content_hash = store.snapshot()
+    export_id, export_hash = store.last_export(mode)
+    metrics.set_gauge("notes_stored", len(store))
+    metrics.set_gauge("note_store_bytes", store.path.stat().st_size)
+
+    if not full and content_hash == export_hash and (mode == "delta" or full_path.exists()):
+        logger.debug("No new note since the last export, the export is skipped.")
+        return None
+
+    deck_id = settings.deck.deck_id(settings.app.pair)
+    deck_name = settings.deck.deck_name(settings.app.pair)
+    model = get_model(settings.deck.card_limits.overflow_field)
+    if mode == "full":
+        deck = StoredDeck(deck_id, deck_name, store, until_id=last_id, model=model)
+        output_path = full_path
+    else:
+        deck = StoredDeck(
+            deck_id, deck_name, store, after_id=export_id, until_id=last_id, model=model
+        )
+        # The id of the last note keeps the names unique when exporting twice in a second.
+        output_path = settings.app.output_folder / settings.deck.delta_export_name(
+            f"{datetime.now():%Y%m%d-%H%M%S}-{last_id}"
+        )
+
+    export_deck(deck, output_path)
+    store.mark_exported(mode, last_id, content_hash)
+    return output_path
+
+
+def generate_deck(
+    translations: list[WordEntry], settings: Settings, export: bool = True
+) -> Optional[Path]:
     """Generates and saves the anki deck from the tranlsation data.
 
     Parameters
@@ -74,18 +178,25 @@ def generate_deck(translations: list[WordEntry], settings: Settings) -> None:
     translations : list[WordEntry]
         Contains the translation data.
     settings : Settings
-    """
-    existing_notes = load_notes(settings.app.output_folder / settings.deck.save_notes_json)
-
-    for t in translations:
-        front_html, back_html = generate_fields(t)
-        note = {"front": front_html, "back": back_html}
-        if note not in existing_notes:
-            existing_notes.append(note)
-
-    deck = genanki.Deck(1239922789, settings.deck.name)
-    for n in existing_notes:
-        deck.add_note(genanki.Note(model=my_model, fields=[n["front"], n["back"]]))
+    export : bool
+        Whether the deck is exported, otherwise the notes are only stored.
 
-    save_notes(existing_notes, settings.app.output_folder / settings.deck.save_notes_json)
-    export_deck(deck, settings.app.output_folder / settings.deck.export_name)
+    Returns
+    -------
+    Optional[Path]
+        Path of the exported package, None if the export is skipped.
+    """
+    renderer = get_renderer(settings.deck)
+    store = open_note_store(settings)
+    try:
+        with metrics.span("render"):
+            n_new = store.add(generate_note(t, renderer, settings.app.pair) for t in translations)
+        logger.info(
+            "{n_new} new notes saved, {n_notes} notes in the store.",
+            n_new=n_new,
+            n_notes=len(store),
+        )
+
+        return export_notes(store, settings) if export else None
+    finally:
+        store.close()
@@ -0,0 +1,110 @@
+"""Scoring and top-k selection of the examples of a translation.
+
+An example is scored on the length of its source sentence, against a band of preferred
+lengths, and on its uniqueness: the rarer its words among the other examples of the
+translation, the higher its score, so near duplicates rank low. The best examples are
+picked with a heap, without sorting all of them.
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+from collections import Counter
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from trankil.config import CardLimits
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def length_score(text: str, min_length: int, max_length: int) -> float:
+    """Returns 1 for a text whose length is in the band, less the further it is from it.
+
+    Parameters
+    ----------
+    text : str
+    min_length : int
+        Shortest preferred length, in characters.
+    max_length : int
+        Longest preferred length, in characters.
+
+    Returns
+    -------
+    float
+        Score between 0 and 1.
+    """
+    length = len(text)
+    if length < min_length:
+        return length / min_length
+    if length > max_length:
+        return max_length / length
+    return 1.0
+
+
+def uniqueness_scores(texts: Sequence[str]) -> list[float]:
+    """Returns the uniqueness of each text among the others: the mean of the inverse
+    number of texts holding each of its words.
+
+    Parameters
+    ----------
+    texts : Sequence[str]
+
+    Returns
+    -------
+    list[float]
+        Scores between 0 and 1, 1 for a text sharing no word with the others. The repeats
+        of a text score 0.
+    """
+    words = [frozenset(_WORD_PATTERN.findall(text.lower())) for text in texts]
+    frequencies = Counter(word for text_words in words for word in text_words)
+    scores = []
+    seen: set[str] = set()
+    for text, text_words in zip(texts, words):
+        if not text_words or text in seen:
+            scores.append(0.0)
+        else:
+            scores.append(sum(1 / frequencies[w] for w in text_words) / len(text_words))
+        seen.add(text)
+    return scores
+
+
+def score_examples(sources: Sequence[str], limits: CardLimits) -> list[float]:
+    """Scores the examples of a translation from their source sentences.
+
+    Parameters
+    ----------
+    sources : Sequence[str]
+        Source sentences of the examples.
+    limits : CardLimits
+        Length band and weights of the scores.
+
+    Returns
+    -------
+    list[float]
+    """
+    uniqueness = uniqueness_scores(sources)
+    return [
+        limits.length_weight
+        * length_score(source, limits.example_min_length, limits.example_max_length)
+        + limits.uniqueness_weight * unique
+        for source, unique in zip(sources, uniqueness)
+    ]
+
+
+def top_k(scores: Sequence[float], k: int) -> list[int]:
+    """Returns the indices of the k best scores, best first. The ties are broken by
+    index, so the first examples win.
+
+    Parameters
+    ----------
+    scores : Sequence[float]
+    k : int
+
+    Returns
+    -------
+    list[int]
+    """
+    return heapq.nsmallest(k, range(len(scores)), key=lambda i: (-scores[i], i))
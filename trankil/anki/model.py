@@ -1,11 +1,6 @@
 import genanki
 
-my_model = genanki.Model(
-    1154577639,
-    "trankil model",
-    fields=[{"name": "Front"}, {"name": "Back"}],
-    templates=[{"name": "trankil card", "qfmt": "{{Front}}", "afmt": "{{Back}}"}],
-    css="""
+_CSS = """
 .card {
   font-family: Arial;
   font-size: 18px;
@@ -52,5 +47,33 @@ ul {
 i {
   color: #666;
 }
-""",
+"""
+
+my_model = genanki.Model(
+    1154577639,
+    "trankil model",
+    fields=[{"name": "Front"}, {"name": "Back"}],
+    templates=[{"name": "trankil card", "qfmt": "{{Front}}", "afmt": "{{Back}}"}],
+    css=_CSS,
 )
+
+# The dropped examples of the bounded cards are shown in a collapsed section of the back.
+overflow_model = genanki.Model(
+    1154577640,
+    "trankil model with overflow",
+    fields=[{"name": "Front"}, {"name": "Back"}, {"name": "Overflow"}],
+    templates=[
+        {
+            "name": "trankil card",
+            "qfmt": "{{Front}}",
+            "afmt": "{{Back}}{{#Overflow}}<details class='overflow'>"
+            "<summary>More examples</summary>{{Overflow}}</details>{{/Overflow}}",
+        }
+    ],
+    css=_CSS,
+)
+
+
+def get_model(overflow_field: bool = False) -> genanki.Model:
+    """Returns the note model, with the overflow field or not."""
+    return overflow_model if overflow_field else my_model
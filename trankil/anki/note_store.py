@@ -0,0 +1,272 @@
+"""SQLite store of the HTML notes of the deck.
+
+The notes are indexed by their GUID, so only the new notes are written on each run and
+the notes are read back lazily when the deck is exported. The store keeps a rolling
+content hash, updated with each new note, and the state of the last export. A note may
+carry an overflow field, the examples dropped from a bounded card, and the key of its
+meaning, see `entry_guid`: a note whose meaning is already stored is not added again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Union
+
+import genanki
+
+if TYPE_CHECKING:
+    from trankil.models.word_entry import WordEntry
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guid TEXT NOT NULL UNIQUE,
+    key TEXT,
+    front TEXT NOT NULL,
+    back TEXT NOT NULL,
+    overflow TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def entry_guid(pair: str, entry: WordEntry) -> str:
+    """Returns the stable GUID of the note of a source entry, a hash of the language pair,
+    of the text and part of speech of the entry and of its meaning: the sorted texts of its
+    featured translations, of all its translations if none is featured. It doesn't depend
+    on the rendered HTML, so the notes rendered again with another layout keep their GUID
+    and re-importing the deck into Anki updates them instead of duplicating them.
+
+    Parameters
+    ----------
+    pair : str
+        Language pair, e.g. "fr_en".
+    entry : WordEntry
+
+    Returns
+    -------
+    str
+    """
+    meaning = [t.text for t in entry.translations if t.featured] or [
+        t.text for t in entry.translations
+    ]
+    return genanki.guid_for(pair, entry.text, entry.pos, *sorted(set(meaning)))
+
+
+def note_guid(note: dict[str, str]) -> str:
+    """Returns the GUID of a note: its "guid" key, see `entry_guid`, or else a hash of its
+    front and back. The latter is the GUID genanki assigns by default, the one of the
+    notes stored by the previous versions.
+
+    Parameters
+    ----------
+    note : dict[str, str]
+        HTML note with the "front" and "back" keys, and the optional "guid" key.
+
+    Returns
+    -------
+    str
+    """
+    return note.get("guid") or genanki.guid_for(note["front"], note["back"])
+
+
+class NoteStore:
+    """Append-only store of the HTML notes, backed by SQLite.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        Path of the SQLite database. The parent folders are created if needed.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        # WAL lets a background export read the notes while new notes are written.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(notes)")}
+        if "overflow" not in columns:
+            # Store created by a previous version.
+            with self._conn:
+                self._conn.execute(
+                    "ALTER TABLE notes ADD COLUMN overflow TEXT NOT NULL DEFAULT ''"
+                )
+        if "key" not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE notes ADD COLUMN key TEXT")
+        self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_notes_key ON notes (key)")
+
+    def add(self, notes: Iterable[dict[str, str]]) -> int:
+        """Adds the notes that are not stored yet, neither their GUID nor their key.
+
+        Parameters
+        ----------
+        notes : Iterable[dict[str, str]]
+            HTML notes with the "front" and "back" keys, and the optional "overflow", "guid"
+            and "key" keys.
+
+        Returns
+        -------
+        int
+            Number of new notes.
+        """
+        n_new = 0
+        content_hash = self.content_hash()
+        with self._conn:
+            for n in notes:
+                guid = note_guid(n)
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO notes (guid, key, front, back, overflow)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (guid, n.get("key"), n["front"], n["back"], n.get("overflow", "")),
+                )
+                if cursor.rowcount:
+                    n_new += 1
+                    content_hash = hashlib.sha256(f"{content_hash}{guid}".encode()).hexdigest()
+            self._set_meta("content_hash", content_hash)
+        return n_new
+
+    def iter_notes(
+        self, after_id: int = 0, until_id: Optional[int] = None
+    ) -> Iterator[dict[str, str]]:
+        """Yields the stored notes in insertion order, without loading them all in memory.
+
+        Parameters
+        ----------
+        after_id : int
+            Only the notes stored after this id are yielded, all of them by default.
+        until_id : Optional[int]
+            Only the notes stored up to this id are yielded, no upper bound if None.
+
+        Yields
+        ------
+        dict[str, str]
+            Note with the "guid", "front", "back" and "overflow" keys.
+        """
+        cursor = self._conn.execute(
+            "SELECT guid, front, back, overflow FROM notes WHERE id > ? AND id <= ? ORDER BY id",
+            (after_id, self.last_id() if until_id is None else until_id),
+        )
+        for guid, front, back, overflow in cursor:
+            yield {"guid": guid, "front": front, "back": back, "overflow": overflow}
+
+    def guid_of_key(self, key: str) -> Optional[str]:
+        """Returns the GUID of the note of a meaning key, None if it is not stored."""
+        row = self._conn.execute("SELECT guid FROM notes WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def has_legacy_note(self, guid: str) -> bool:
+        """Returns whether a note without meaning key, stored by a previous version, has
+        this GUID."""
+        return (
+            self._conn.execute(
+                "SELECT 1 FROM notes WHERE guid = ? AND key IS NULL", (guid,)
+            ).fetchone()
+            is not None
+        )
+
+    def last_id(self) -> int:
+        """Returns the id of the last stored note, 0 if the store is empty."""
+        return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM notes").fetchone()[0]
+
+    def snapshot(self) -> tuple[int, str]:
+        """Returns the id of the last stored note and the content hash, read consistently
+        even while notes are added from another connection."""
+        with self._conn:
+            self._conn.execute("BEGIN")
+            return self.last_id(), self.content_hash()
+
+    def content_hash(self) -> str:
+        """Returns the rolling hash of the stored notes, it changes with every new note."""
+        return self._get_meta("content_hash", "")
+
+    def last_export(self, mode: str) -> tuple[int, str]:
+        """Returns the id of the last exported note and the content hash at the last export.
+
+        Parameters
+        ----------
+        mode : str
+            Export mode, each mode has its own state.
+
+        Returns
+        -------
+        tuple[int, str]
+            0 and an empty hash if the store has never been exported in this mode.
+        """
+        return (
+            int(self._get_meta(f"{mode}_export_id", "0")),
+            self._get_meta(f"{mode}_export_hash", ""),
+        )
+
+    def mark_exported(self, mode: str, last_id: int, content_hash: str) -> None:
+        """Records the state of the store at the last export.
+
+        Parameters
+        ----------
+        mode : str
+            Export mode, each mode has its own state.
+        last_id : int
+            Id of the last exported note.
+        content_hash : str
+            Content hash of the store when exported.
+        """
+        with self._conn:
+            self._set_meta(f"{mode}_export_id", str(last_id))
+            self._set_meta(f"{mode}_export_hash", content_hash)
+
+    def _get_meta(self, key: str, default: str) -> str:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def __iter__(self) -> Iterator[dict[str, str]]:
+        return self.iter_notes()
+
+    def __contains__(self, guid: object) -> bool:
+        return (
+            self._conn.execute("SELECT 1 FROM notes WHERE guid = ?", (guid,)).fetchone()
+            is not None
+        )
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+    def migrate_from_json(self, json_path: Union[str, Path]) -> int:
+        """Imports the notes of a legacy json file, then renames it with a ".migrated" suffix
+        so that the migration runs only once.
+
+        Parameters
+        ----------
+        json_path : Union[str, Path]
+            Path of the json file written by the previous versions of Trankil.
+
+        Returns
+        -------
+        int
+            Number of imported notes, 0 if there is no file to migrate.
+        """
+        json_path = Path(json_path)
+        if not json_path.exists():
+            return 0
+
+        n_new = self.add(json.loads(json_path.read_text(encoding="utf-8")))
+        json_path.replace(json_path.with_name(json_path.name + ".migrated"))
+        return n_new
+
+    def compact(self) -> None:
+        """Rebuilds the database file to reclaim the unused space."""
+        self._conn.execute("VACUUM")
+
+    def close(self) -> None:
+        self._conn.close()
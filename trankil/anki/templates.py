@@ -0,0 +1,247 @@
+"""Template engine of the Anki cards.
+
+The card templates use the `str.format` syntax. They are compiled once: their placeholders
+are checked against the fields available to each template and the bound `format` methods
+are kept. The rendered fragments of the translations and examples are cached by content,
+so the translations shared by several cards are rendered once. The size of the cards can
+be bounded, see `CardLimits`: only the best examples of each translation are kept and the
+fields are capped in bytes, the dropped examples going to an optional overflow field.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from string import Formatter
+from typing import TYPE_CHECKING, Callable, Optional
+
+from trankil.anki.examples import score_examples, top_k
+
+if TYPE_CHECKING:
+    from trankil.config import CardLimits, CardTemplates, DeckSettings
+    from trankil.models.word_entry import WordEntry
+
+TEMPLATE_FIELDS: dict[str, frozenset[str]] = {
+    "header": frozenset({"text", "pos"}),
+    "front_translation": frozenset({"index", "text", "pos", "examples"}),
+    "back_translation": frozenset({"index", "text", "pos", "examples"}),
+    "front_example": frozenset({"src", "dst"}),
+    "back_example": frozenset({"src", "dst"}),
+}
+
+ExampleKey = tuple[str, str]
+TranslationKey = tuple[int, str, str, tuple[ExampleKey, ...]]
+
+
+def compile_template(name: str, template: str) -> Callable[..., str]:
+    """Checks the placeholders of a template and returns its rendering function.
+
+    Parameters
+    ----------
+    name : str
+        Name of the template, one of the keys of TEMPLATE_FIELDS.
+    template : str
+        Template in the `str.format` syntax.
+
+    Returns
+    -------
+    Callable[..., str]
+        Renders the template from keyword arguments.
+
+    Raises
+    ------
+    ValueError
+        If the template is malformed or uses an unknown field.
+    """
+    fields = {
+        field.split(".")[0].split("[")[0]
+        for _, field, _, _ in Formatter().parse(template)
+        if field is not None
+    }
+    unknown = fields - TEMPLATE_FIELDS[name]
+    if unknown:
+        raise ValueError(
+            f"Unknown fields in the {name} template: {', '.join(sorted(unknown))}."
+            f" Available fields: {', '.join(sorted(TEMPLATE_FIELDS[name]))}."
+        )
+    return template.format
+
+
+class CardRenderer:
+    """Renders the front and back of the cards from compiled templates.
+
+    The examples of a translation are inserted in its `{examples}` placeholder, each one
+    preceded by the separator and followed by a last separator. The header and the
+    translations are joined with the separator.
+
+    Parameters
+    ----------
+    templates : CardTemplates
+    cache_size : int
+        Maximum number of cached fragments, for the translations and for the examples.
+    limits : Optional[CardLimits]
+        Bounds of the size of the cards, unbounded if None.
+    """
+
+    def __init__(
+        self, templates: CardTemplates, cache_size: int = 4096, limits: Optional[CardLimits] = None
+    ) -> None:
+        self.separator = templates.separator
+        self.limits = limits
+        self._header = compile_template("header", templates.header)
+        self._front_translation = compile_template(
+            "front_translation", templates.front_translation
+        )
+        self._back_translation = compile_template("back_translation", templates.back_translation)
+        self._front_example = compile_template("front_example", templates.front_example)
+        self._back_example = compile_template("back_example", templates.back_example)
+
+        self._render_example = lru_cache(maxsize=cache_size)(self._render_example_uncached)
+        self._render_translation = lru_cache(maxsize=cache_size)(self._render_translation_uncached)
+        self._select_examples = lru_cache(maxsize=cache_size)(self._select_examples_uncached)
+
+    def _render_example_uncached(self, key: ExampleKey) -> tuple[str, str]:
+        src, dst = key
+        return self._front_example(src=src, dst=dst), self._back_example(src=src, dst=dst)
+
+    def _render_translation_uncached(self, key: TranslationKey) -> tuple[str, str]:
+        index, text, pos, examples = key
+        front_examples, back_examples = [], []
+        for example in examples:
+            front_example, back_example = self._render_example(example)
+            front_examples.append(front_example)
+            back_examples.append(back_example)
+
+        sep = self.separator
+        return (
+            self._front_translation(
+                index=index, text=text, pos=pos, examples=sep + sep.join(front_examples + [""])
+            ),
+            self._back_translation(
+                index=index, text=text, pos=pos, examples=sep + sep.join(back_examples + [""])
+            ),
+        )
+
+    def _select_examples_uncached(
+        self, examples: tuple[ExampleKey, ...]
+    ) -> tuple[tuple[ExampleKey, ...], tuple[ExampleKey, ...]]:
+        """Splits the examples into the best ones, best first, and the others."""
+        limits = self.limits
+        if limits is None or limits.max_examples is None or len(examples) <= limits.max_examples:
+            return examples, ()
+        best = top_k(score_examples([src for src, _ in examples], limits), limits.max_examples)
+        kept = set(best)
+        return (
+            tuple(examples[i] for i in best),
+            tuple(e for i, e in enumerate(examples) if i not in kept),
+        )
+
+    def _card_bytes(self, header: str, keys: list[TranslationKey]) -> int:
+        """Returns the size in bytes of the largest field of a card, front or back."""
+        fragments = [self._render_translation(key) for key in keys]
+        n_bytes = len(header.encode("utf-8")) + len(self.separator.encode("utf-8")) * len(keys)
+        return n_bytes + max(
+            sum(len(front.encode("utf-8")) for front, _ in fragments),
+            sum(len(back.encode("utf-8")) for _, back in fragments),
+        )
+
+    def _fit(
+        self, header: str, keys: list[TranslationKey], dropped: list[list[ExampleKey]]
+    ) -> list[TranslationKey]:
+        """Drops the last examples, from the translations holding the most, until both
+        fields fit in the byte cap. The last translations are dropped once they have no
+        example left, the header is always kept."""
+        max_bytes = self.limits.max_field_bytes if self.limits is not None else None
+        if max_bytes is None:
+            return keys
+        keys = list(keys)
+        while keys and self._card_bytes(header, keys) > max_bytes:
+            j = max(range(len(keys)), key=lambda j: (len(keys[j][3]), j))
+            index, text, pos, examples = keys[j]
+            if examples:
+                keys[j] = (index, text, pos, examples[:-1])
+                dropped[index - 1].insert(0, examples[-1])
+            else:
+                keys.pop()
+        return keys
+
+    def render(self, card_data: WordEntry) -> tuple[str, str]:
+        """Renders a card.
+
+        Parameters
+        ----------
+        card_data : WordEntry
+
+        Returns
+        -------
+        tuple[str, str]
+            Front and Back of the anki card.
+        """
+        note = self.render_note(card_data)
+        return note["front"], note["back"]
+
+    def render_note(self, card_data: WordEntry) -> dict[str, str]:
+        """Renders a card within the card limits.
+
+        Parameters
+        ----------
+        card_data : WordEntry
+
+        Returns
+        -------
+        dict[str, str]
+            HTML note with the "front", "back" and "overflow" keys. The overflow holds the
+            dropped examples under their translation, it is empty unless the overflow field
+            is enabled.
+        """
+        header = self._header(text=card_data.text, pos=card_data.pos)
+        keys: list[TranslationKey] = []
+        dropped: list[list[ExampleKey]] = []
+        for i, trans in enumerate(card_data.translations, start=1):
+            kept, others = self._select_examples(tuple((e.src, e.dst) for e in trans.examples))
+            keys.append((i, trans.text, trans.pos, kept))
+            dropped.append(list(others))
+        keys = self._fit(header, keys, dropped)
+
+        front_parts, back_parts = [header], [header]
+        for key in keys:
+            front_translation, back_translation = self._render_translation(key)
+            front_parts.append(front_translation)
+            back_parts.append(back_translation)
+
+        overflow = ""
+        if self.limits is not None and self.limits.overflow_field:
+            overflow = self.separator.join(
+                self._render_translation((i, trans.text, trans.pos, tuple(examples)))[1]
+                for (i, trans), examples in zip(
+                    enumerate(card_data.translations, start=1), dropped
+                )
+                if examples
+            )
+        return {
+            "front": self.separator.join(front_parts),
+            "back": self.separator.join(back_parts),
+            "overflow": overflow,
+        }
+
+
+@lru_cache(maxsize=8)
+def _cached_renderer(
+    templates: CardTemplates, cache_size: int, limits: Optional[CardLimits] = None
+) -> CardRenderer:
+    return CardRenderer(templates, cache_size, limits)
+
+
+def get_renderer(deck_settings: DeckSettings) -> CardRenderer:
+    """Returns the renderer of the card templates of the deck settings, compiled once.
+
+    Parameters
+    ----------
+    deck_settings : DeckSettings
+
+    Returns
+    -------
+    CardRenderer
+    """
+    return _cached_renderer(
+        deck_settings.templates, deck_settings.fragment_cache_size, deck_settings.card_limits
+    )
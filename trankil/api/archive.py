@@ -0,0 +1,112 @@
+"""Archive of the raw Linguee API responses.
+
+Unlike the response cache, the archive never expires nor evicts: it keeps the latest raw
+JSON response of every fetched word of a language pair, so the notes can be rebuilt
+without calling the API again when the preprocessing or the card layout change.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any, Union
+
+from trankil.api.cache import encode_payload
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    word TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+class ResponseArchive:
+    """Append-only archive of the raw responses, backed by SQLite.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        Path of the SQLite database. The parent folders are created if needed.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Like the response cache, the archive may be used from the thread running the
+        # event loop of the concurrent fetching.
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def add(self, word: str, payload: Any) -> None:
+        """Archives the response of a word, replacing the previous one if any.
+        The word keeps its position in the archive.
+
+        Parameters
+        ----------
+        word : str
+            Queried word.
+        payload : Any
+            Raw JSON response (bytes or str), or the decoded JSON.
+        """
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO responses (word, payload, fetched_at) VALUES (?, ?, ?)"
+                " ON CONFLICT (word) DO UPDATE SET"
+                " payload = excluded.payload, fetched_at = excluded.fetched_at",
+                (word, encode_payload(payload), time.time()),
+            )
+
+    def add_missing(self, responses: Iterable[tuple[str, str]]) -> int:
+        """Archives the responses of the words that are not archived yet.
+
+        Parameters
+        ----------
+        responses : Iterable[tuple[str, str]]
+            Couples (word, JSON encoded response).
+
+        Returns
+        -------
+        int
+            Number of new words.
+        """
+        n_before = self._conn.total_changes
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO responses (word, payload, fetched_at) VALUES (?, ?, ?)",
+                ((word, payload, now) for word, payload in responses),
+            )
+        return self._conn.total_changes - n_before
+
+    def iter_chunks(self, chunk_size: int) -> Iterator[list[str]]:
+        """Yields the JSON encoded responses in archive order, by chunks.
+
+        Parameters
+        ----------
+        chunk_size : int
+            Maximum number of responses in a chunk.
+
+        Yields
+        ------
+        list[str]
+        """
+        cursor = self._conn.execute("SELECT payload FROM responses ORDER BY id")
+        while chunk := cursor.fetchmany(chunk_size):
+            yield [payload for (payload,) in chunk]
+
+    def __contains__(self, word: object) -> bool:
+        return (
+            self._conn.execute("SELECT 1 FROM responses WHERE word = ?", (word,)).fetchone()
+            is not None
+        )
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,254 @@
+"""Persistent cache of the Linguee API responses.
+
+The raw JSON responses are stored in a SQLite database, keyed on the query parameters.
+Entries expire after a TTL and the least recently used ones are evicted once the cache
+is full. The permanent failures (misspelled words, no translation) are kept in a negative
+cache with its own TTL, so those queries are not sent again.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, Optional, Union
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    query TEXT NOT NULL,
+    src TEXT NOT NULL,
+    dst TEXT NOT NULL,
+    guess_direction TEXT NOT NULL,
+    follow_corrections TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (query, src, dst, guess_direction, follow_corrections)
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses (accessed_at);
+CREATE TABLE IF NOT EXISTS failures (
+    query TEXT NOT NULL,
+    src TEXT NOT NULL,
+    dst TEXT NOT NULL,
+    guess_direction TEXT NOT NULL,
+    follow_corrections TEXT NOT NULL,
+    error TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (query, src, dst, guess_direction, follow_corrections)
+);
+"""
+
+_KEY_COLUMNS = ("query", "src", "dst", "guess_direction", "follow_corrections")
+
+
+def encode_payload(payload: Any) -> str:
+    """Returns the JSON text of a response, raw responses (bytes or str) are kept as is.
+
+    Parameters
+    ----------
+    payload : Any
+        Raw JSON response, or the decoded JSON.
+
+    Returns
+    -------
+    str
+    """
+    if isinstance(payload, bytes):
+        return payload.decode("utf-8")
+    if isinstance(payload, str):
+        return payload
+    return json.dumps(payload, ensure_ascii=False)
+
+
+class ResponseCache:
+    """SQLite-backed cache with TTL expiration and size-bounded LRU eviction.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        Path of the SQLite database. The parent folders are created if needed.
+    ttl : float
+        Number of seconds an entry stays valid.
+    max_entries : int
+        Maximum number of entries kept, the least recently used ones are evicted first.
+    negative_ttl : float
+        Number of seconds a permanent failure stays valid, 0 disables the negative cache.
+    """
+
+    def __init__(
+        self, path: Union[str, Path], ttl: float, max_entries: int, negative_ttl: float = 0
+    ) -> None:
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # The concurrent fetching may use the cache from the thread running the event loop,
+        # it is never used by two threads at the same time.
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def _key(params: dict[str, Any]) -> tuple[str, ...]:
+        return tuple(str(params[column]) for column in _KEY_COLUMNS)
+
+    def get(self, params: dict[str, Any]) -> Optional[Any]:
+        """Returns the cached response for the query parameters, None if missing or expired.
+
+        Parameters
+        ----------
+        params : dict[str, Any]
+            Query parameters sent to the API.
+
+        Returns
+        -------
+        Optional[Any]
+            Decoded JSON response.
+        """
+        payload = self.get_raw(params)
+        return None if payload is None else json.loads(payload)
+
+    def get_raw(self, params: dict[str, Any]) -> Optional[str]:
+        """Returns the cached JSON text of the response, None if missing or expired.
+
+        Parameters
+        ----------
+        params : dict[str, Any]
+            Query parameters sent to the API.
+
+        Returns
+        -------
+        Optional[str]
+        """
+        key = self._key(params)
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT payload, created_at FROM responses WHERE query = ? AND src = ? AND dst = ?"
+            " AND guess_direction = ? AND follow_corrections = ?",
+            key,
+        ).fetchone()
+
+        if row is None or now - row[1] > self.ttl:
+            self.misses += 1
+            return None
+
+        with self._conn:
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE query = ? AND src = ? AND dst = ?"
+                " AND guess_direction = ? AND follow_corrections = ?",
+                (now, *key),
+            )
+        self.hits += 1
+        return row[0]
+
+    def set(self, params: dict[str, Any], payload: Any) -> None:
+        """Stores a response and evicts the least recently used entries above the size limit.
+
+        Parameters
+        ----------
+        params : dict[str, Any]
+            Query parameters sent to the API.
+        payload : Any
+            Raw JSON response (bytes or str), or the decoded JSON.
+        """
+        now = time.time()
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*self._key(params), encode_payload(payload), now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE rowid IN (SELECT rowid FROM responses"
+                " ORDER BY accessed_at ASC LIMIT max(0, (SELECT COUNT(*) FROM responses) - ?))",
+                (self.max_entries,),
+            )
+
+    def get_failure(self, params: dict[str, Any]) -> Optional[str]:
+        """Returns the error of a query which failed permanently, None if missing or expired.
+
+        Parameters
+        ----------
+        params : dict[str, Any]
+            Query parameters sent to the API.
+
+        Returns
+        -------
+        Optional[str]
+        """
+        if self.negative_ttl <= 0:
+            return None
+        row = self._conn.execute(
+            "SELECT error, created_at FROM failures WHERE query = ? AND src = ? AND dst = ?"
+            " AND guess_direction = ? AND follow_corrections = ?",
+            self._key(params),
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.negative_ttl:
+            return None
+        self.negative_hits += 1
+        return row[0]
+
+    def set_failure(self, params: dict[str, Any], error: str) -> None:
+        """Stores the error of a query which failed permanently.
+
+        Parameters
+        ----------
+        params : dict[str, Any]
+            Query parameters sent to the API.
+        error : str
+        """
+        if self.negative_ttl <= 0:
+            return
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO failures VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*self._key(params), str(error), time.time()),
+            )
+
+    def purge_expired(self) -> int:
+        """Deletes the expired entries, failures included.
+
+        Returns
+        -------
+        int
+            Number of deleted entries.
+        """
+        now = time.time()
+        with self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl,)
+            )
+            n_deleted = cursor.rowcount
+            cursor = self._conn.execute(
+                "DELETE FROM failures WHERE created_at < ?", (now - self.negative_ttl,)
+            )
+        return n_deleted + cursor.rowcount
+
+    def iter_responses(self, src: str, dst: str) -> Iterator[tuple[str, str]]:
+        """Yields the cached responses of a language pair, expired or not.
+
+        Parameters
+        ----------
+        src : str
+        dst : str
+
+        Yields
+        ------
+        tuple[str, str]
+            Couples (query, JSON encoded response), oldest first.
+        """
+        yield from self._conn.execute(
+            "SELECT query, payload FROM responses WHERE src = ? AND dst = ? ORDER BY created_at",
+            (src, dst),
+        )
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,22 +1,531 @@
+import asyncio
+import queue
+import threading
 import time
-import random
-from typing import TYPE_CHECKING
-
-import requests
+from collections.abc import Awaitable, Iterator
+from typing import TYPE_CHECKING, Any, Callable, Optional, Union
 
+from trankil import metrics
+from trankil.api.archive import ResponseArchive
+from trankil.api.cache import ResponseCache
+from trankil.api.providers import FetchError, TranslationProvider, build_providers, error_row
+from trankil.api.rate_limiter import TokenBucket
+from trankil.api.throttle import AdaptiveThrottle, FixedThrottle, backoff_delay
 from trankil.logger import logger
-from trankil.models.word_entry import WordEntry
+from trankil.models.word_entry import WordEntry, parse_word_entries
 
 if TYPE_CHECKING:
-    from trankil.config import Settings
+    import requests
+
+    from trankil.config import PreprocessingSettings, Settings
+
+Throttle = Union[FixedThrottle, AdaptiveThrottle]
+
+# Maximum number of seconds between two checks of the stop event by the concurrent engine.
+_STOP_POLL = 0.1
+
+
+class _Stopped(Exception):
+    """Raised by the waits of the sequential engine once the stop event is set."""
+
+
+def _wait(seconds: float, stop: Optional[threading.Event]) -> None:
+    """Sleeps, or waits for the stop event if any and raises `_Stopped` once it is set."""
+    if stop is None:
+        time.sleep(seconds)
+    elif stop.wait(seconds):
+        raise _Stopped
+
+
+def _build_params(word: str, settings: "Settings") -> dict[str, Any]:
+    return {
+        "query": word,
+        "src": settings.app.src,
+        "dst": settings.app.dst,
+        "guess_direction": settings.api.guess_direction,
+        "follow_corrections": settings.api.follow_correction,
+    }
+
+
+def make_throttle(settings: "Settings") -> Throttle:
+    """Builds the throttle of the sequential fetching from the settings."""
+    if settings.api.throttle == "adaptive":
+        return AdaptiveThrottle(
+            settings.api.rate_per_second,
+            settings.api.min_rate,
+            settings.api.max_rate,
+            settings.api.rate_increase,
+            settings.api.rate_decrease_factor,
+        )
+    return FixedThrottle()
+
+
+def _can_fail_over(error: FetchError, position: int, providers: list[TranslationProvider]) -> bool:
+    if position == len(providers) - 1 or error.permanent:
+        return False
+    logger.debug(
+        "Provider {provider} failed ({error}), falling back to the next one",
+        provider=providers[position].name,
+        error=error,
+    )
+    return True
+
+
+def _fetch_from_chain(
+    providers: list[TranslationProvider],
+    params: dict[str, Any],
+    pace: Callable[[], None],
+    rules: Optional["PreprocessingSettings"] = None,
+) -> tuple[list[WordEntry], Any]:
+    """Queries the providers in order until one of them answers.
+    The providers which can't serve the query (transient error, missing data, client error
+    or invalid response) are skipped, the permanent failures of the word are final.
+
+    Parameters
+    ----------
+    providers : list[TranslationProvider]
+        Ordered failover chain.
+    params : dict[str, Any]
+        Query parameters.
+    pace : Callable[[], None]
+        Called before each request to a throttled provider.
+    rules : Optional[PreprocessingSettings]
+        Filter rules applied while parsing the responses.
+
+    Returns
+    -------
+    tuple[list[WordEntry], Any]
+        Parsed translation data and the raw decoded JSON response.
+
+    Raises
+    ------
+    FetchError
+        Error of the last queried provider.
+    """
+    for position, provider in enumerate(providers):
+        if provider.throttled:
+            pace()
+        try:
+            return provider.fetch(params, rules)
+        except FetchError as e:
+            if not _can_fail_over(e, position, providers):
+                raise
+    raise FetchError("No translation provider configured.")
+
+
+async def _fetch_from_chain_async(
+    providers: list[TranslationProvider],
+    params: dict[str, Any],
+    pace: Callable[[], Awaitable[None]],
+    rules: Optional["PreprocessingSettings"] = None,
+) -> tuple[list[WordEntry], Any]:
+    """Asynchronous version of `_fetch_from_chain`, the requests run in threads."""
+    for position, provider in enumerate(providers):
+        if provider.throttled:
+            await pace()
+        try:
+            return await asyncio.to_thread(provider.fetch, params, rules)
+        except FetchError as e:
+            if not _can_fail_over(e, position, providers):
+                raise
+    raise FetchError("No translation provider configured.")
+
+
+def _on_failure(
+    error: FetchError, word: str, attempt: int, settings: "Settings", throttle: Throttle
+) -> Optional[float]:
+    """Notifies the throttle of a failed request and decides whether it is retried.
+
+    Returns
+    -------
+    Optional[float]
+        Number of seconds to wait before retrying, None if the failure is final.
+    """
+    if error.transient:
+        throttle.on_throttled(error.retry_after)
+
+    if not error.transient or attempt >= settings.api.max_retries:
+        if error.status_code == 500:
+            logger.warning("500 error for the word: {error_word}", error_word=word)
+        else:
+            logger.warning("Failed to fetch the word: {error_word}", error_word=word)
+        return None
+
+    delay = max(
+        backoff_delay(attempt, settings.api.backoff_base, settings.api.backoff_max),
+        error.retry_after or 0.0,
+    )
+    logger.debug(
+        "Transient error for the word {word} ({error}), retry in {delay:.1f}s",
+        word=word,
+        error=error,
+        delay=delay,
+    )
+    return delay
+
+
+Outcome = tuple[str, Optional[list[WordEntry]], Optional[FetchError]]
+
+
+def _failure_from_cache(
+    cache: Optional[ResponseCache], params: dict[str, Any]
+) -> Optional[FetchError]:
+    if cache is None:
+        return None
+    error = cache.get_failure(params)
+    return None if error is None else FetchError(error, permanent=True)
+
+
+def _final_failure(
+    cache: Optional[ResponseCache], params: dict[str, Any], error: FetchError
+) -> FetchError:
+    """Returns a failure which is not retried, the permanent failures are stored in the
+    negative cache."""
+    if cache is not None and error.permanent:
+        cache.set_failure(params, str(error))
+    return error
+
+
+def _from_cache(
+    cache: Optional[ResponseCache],
+    params: dict[str, Any],
+    rules: Optional["PreprocessingSettings"] = None,
+) -> Optional[list[WordEntry]]:
+    if cache is None:
+        return None
+    data = cache.get_raw(params)
+    if data is None:
+        return None
+    with metrics.span("parse"):
+        return parse_word_entries(data, rules)
+
+
+def _outcome_from_cache(
+    cache: Optional[ResponseCache],
+    word: str,
+    params: dict[str, Any],
+    rules: Optional["PreprocessingSettings"] = None,
+) -> Optional[Outcome]:
+    """Returns the outcome of a word from the negative cache or the response cache, None if
+    the word has to be fetched."""
+    failure = _failure_from_cache(cache, params)
+    if failure is not None:
+        return word, None, failure
+    parsed = _from_cache(cache, params, rules)
+    if parsed is not None:
+        return word, parsed, None
+    return None
+
+
+def _store_response(
+    cache: Optional[ResponseCache],
+    archive: Optional[ResponseArchive],
+    word: str,
+    params: dict[str, Any],
+    data: Any,
+) -> None:
+    if cache is not None:
+        cache.set(params, data)
+    if archive is not None:
+        archive.add(word, data)
+
+
+def _fetch_sequentially(
+    words: list[str],
+    settings: "Settings",
+    providers: list[TranslationProvider],
+    cache: Optional[ResponseCache],
+    archive: Optional[ResponseArchive] = None,
+    throttle: Optional[Throttle] = None,
+    stop: Optional[threading.Event] = None,
+) -> Iterator[Outcome]:
+    throttle = throttle or make_throttle(settings)
+
+    def pace() -> None:
+        with metrics.span("throttle"):
+            _wait(throttle.next_delay(), stop)
+
+    try:
+        for word in words:
+            params = _build_params(word, settings)
+            outcome = _outcome_from_cache(cache, word, params, settings.preprocessing)
+            if outcome is not None:
+                yield outcome
+                continue
+            yield from _fetch_word(
+                word, params, settings, providers, pace, cache, archive, throttle, stop
+            )
+    except _Stopped:
+        return
+
+
+def _fetch_word(
+    word: str,
+    params: dict[str, Any],
+    settings: "Settings",
+    providers: list[TranslationProvider],
+    pace: Callable[[], None],
+    cache: Optional[ResponseCache],
+    archive: Optional[ResponseArchive],
+    throttle: Throttle,
+    stop: Optional[threading.Event],
+) -> Iterator[Outcome]:
+    """Fetches a word with retries, for the sequential engine, and yields its outcome."""
+    start = time.perf_counter()
+    for attempt in range(settings.api.max_retries + 1):
+        try:
+            parsed, data = _fetch_from_chain(providers, params, pace, settings.preprocessing)
+        except FetchError as e:
+            delay = _on_failure(e, word, attempt, settings, throttle)
+            if delay is None:
+                metrics.observe("word", time.perf_counter() - start)
+                yield word, None, _final_failure(cache, params, e)
+                return
+            with metrics.span("backoff"):
+                _wait(delay, stop)
+            continue
+
+        throttle.on_success()
+        _store_response(cache, archive, word, params, data)
+        metrics.observe("word", time.perf_counter() - start)
+        yield word, parsed, None
+        return
+
+
+def _make_async_pace(settings: "Settings", throttle: Throttle) -> Callable[[], Awaitable[None]]:
+    """Paces the concurrent requests with a token bucket of `rate_burst` tokens, refilled at
+    `rate_per_second` with the fixed throttle or at the AIMD rate with the adaptive one.
+    No request is sent before the `Retry-After` deadline of the throttle."""
+    bucket = TokenBucket(settings.api.rate_per_second, settings.api.rate_burst)
+
+    async def pace() -> None:
+        with metrics.span("throttle"):
+            while throttle.pause() > 0:
+                await asyncio.sleep(throttle.pause())
+            if isinstance(throttle, AdaptiveThrottle):
+                bucket.rate = throttle.rate
+            await bucket.acquire()
+
+    return pace
+
+
+async def _fetch_concurrently(
+    words: list[str],
+    settings: "Settings",
+    providers: list[TranslationProvider],
+    cache: Optional[ResponseCache],
+    archive: Optional[ResponseArchive] = None,
+    on_outcome: Optional[Callable[[Outcome], None]] = None,
+) -> list[Outcome]:
+    throttle = make_throttle(settings)
+    pace = _make_async_pace(settings, throttle)
+    semaphore = asyncio.Semaphore(settings.api.max_concurrency)
+
+    async def fetch_one(word: str) -> Outcome:
+        outcome = await fetch_word(word)
+        if on_outcome is not None:
+            on_outcome(outcome)
+        return outcome
+
+    async def fetch_word(word: str) -> Outcome:
+        params = _build_params(word, settings)
+        outcome = _outcome_from_cache(cache, word, params, settings.preprocessing)
+        if outcome is not None:
+            return outcome
+
+        start = time.perf_counter()
+        for attempt in range(settings.api.max_retries + 1):
+            async with semaphore:
+                try:
+                    parsed, data = await _fetch_from_chain_async(
+                        providers, params, pace, settings.preprocessing
+                    )
+                except FetchError as e:
+                    error = e
+                else:
+                    error = None
+
+            if error is None:
+                break
+            delay = _on_failure(error, word, attempt, settings, throttle)
+            if delay is None:
+                metrics.observe("word", time.perf_counter() - start)
+                return word, None, _final_failure(cache, params, error)
+            with metrics.span("backoff"):
+                await asyncio.sleep(delay)
+
+        throttle.on_success()
+        _store_response(cache, archive, word, params, data)
+        metrics.observe("word", time.perf_counter() - start)
+        return word, parsed, None
+
+    return await asyncio.gather(*(fetch_one(word) for word in words))
+
+
+class _EngineThread(threading.Thread):
+    """Runs a coroutine in its own event loop, in a background thread, and cancels it on
+    request, its pending requests and waits included."""
+
+    def __init__(self, coroutine: Callable[[], Awaitable[Any]]) -> None:
+        super().__init__(name="trankil-fetch", daemon=True)
+        self.coroutine = coroutine
+        self.failure: Optional[BaseException] = None
+        self._cancelled = threading.Event()
+        self._task: Optional[tuple[asyncio.AbstractEventLoop, asyncio.Task]] = None
+
+    async def _run(self) -> None:
+        self._task = (asyncio.get_running_loop(), asyncio.current_task())
+        if not self._cancelled.is_set():
+            await self.coroutine()
+
+    def run(self) -> None:
+        try:
+            asyncio.run(self._run())
+        except asyncio.CancelledError:
+            pass
+        except BaseException as e:
+            self.failure = e
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        if self._task is not None and self.is_alive():
+            loop, task = self._task
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                # The loop is already closed.
+                pass
+
+
+def _iter_concurrently(
+    words: list[str],
+    settings: "Settings",
+    providers: list[TranslationProvider],
+    cache: Optional[ResponseCache],
+    archive: Optional[ResponseArchive],
+    stop: Optional[threading.Event] = None,
+) -> Iterator[Outcome]:
+    """Runs the asyncio engine in a background thread and yields the outcomes as soon as
+    they are fetched, in completion order. The engine is cancelled once the stop event is
+    set or the generator is closed."""
+    outcomes: queue.Queue = queue.Queue()
+    finished = object()
+
+    async def fetch() -> None:
+        try:
+            await _fetch_concurrently(words, settings, providers, cache, archive, outcomes.put)
+        finally:
+            outcomes.put(finished)
+
+    engine = _EngineThread(fetch)
+    engine.start()
+    try:
+        while True:
+            try:
+                outcome = outcomes.get(timeout=None if stop is None else _STOP_POLL)
+            except queue.Empty:
+                if stop is not None and stop.is_set():
+                    engine.cancel()
+                    break
+                continue
+            if outcome is finished:
+                break
+            yield outcome
+    finally:
+        engine.cancel()
+        engine.join()
+    if engine.failure is not None:
+        raise engine.failure
+
+
+def iter_linguee_translations(
+    words: list[str],
+    settings: "Settings",
+    session: Optional["requests.Session"] = None,
+    throttle: Optional[Throttle] = None,
+    stop: Optional[threading.Event] = None,
+) -> Iterator[Outcome]:
+    """Fetches the translation data of the words and yields each outcome as soon as it is
+    available, see `fetch_linguee_translations` for the fetching behavior.
+    In the "concurrent" fetch mode, the outcomes are yielded in completion order.
+
+    Parameters
+    ----------
+    words : list[str]
+        List of word to query.
+    settings : Settings
+    session : Optional[requests.Session]
+        Session of the HTTP providers, to share their connection pool between several
+        fetches. A new one is created if None.
+    throttle : Optional[Union[FixedThrottle, AdaptiveThrottle]]
+        Throttle of the "sequential" fetch mode, to share the rate budget between several
+        fetches. A new one is created from the settings if None.
+    stop : Optional[threading.Event]
+        Interrupts the throttle and backoff waits once set: the fetching stops without
+        yielding the words left.
+
+    Yields
+    ------
+    tuple[str, Optional[list[WordEntry]], Optional[FetchError]]
+        The queried word, its translation data and None, or the word, None and the error,
+        which tells whether the failure is transient.
+    """
+    cache = None
+    if settings.api.cache_enabled:
+        cache = ResponseCache(
+            settings.api.cache_path,
+            settings.api.cache_ttl,
+            settings.api.cache_max_entries,
+            settings.api.negative_cache_ttl,
+        )
+        n_purged = cache.purge_expired()
+        if n_purged:
+            logger.debug("{n_entry} expired entries purged from the cache", n_entry=n_purged)
+
+    archive = ResponseArchive(settings.app.archive_path) if settings.api.archive_enabled else None
+
+    try:
+        providers = build_providers(settings, session)
+        if settings.api.fetch_mode == "concurrent":
+            yield from _iter_concurrently(words, settings, providers, cache, archive, stop)
+        else:
+            yield from _fetch_sequentially(
+                words, settings, providers, cache, archive, throttle, stop
+            )
+    finally:
+        if archive is not None:
+            archive.close()
+        if cache is not None:
+            logger.info(
+                "Response cache: {n_hits} hits, {n_misses} misses"
+                " and {n_negative_hits} known failures",
+                n_hits=cache.hits,
+                n_misses=cache.misses,
+                n_negative_hits=cache.negative_hits,
+            )
+            metrics.increment("cache_hits", cache.hits)
+            metrics.increment("cache_misses", cache.misses)
+            metrics.increment("negative_cache_hits", cache.negative_hits)
+            cache.close()
 
 
 def fetch_linguee_translations(
     words: list[str], settings: "Settings"
-) -> tuple[list[list[WordEntry]], list[dict[str, str]]]:
+) -> tuple[list[list[WordEntry]], list[dict[str, Any]]]:
     """Calls the Linguee API for a list of words to retrieve the translation data.
     Words causing server errors are skipped and logged.
-    To avoid temporary inaccessibility to the API, a sleeper is added to the function.
+    The words are queried through the failover chain of providers set in the settings
+    (by default the public Linguee API).
+    To avoid temporary inaccessibility to the API, the throttled providers are paced: either
+    a fixed random sleeper, or an adaptive AIMD rate that honors the `Retry-After` header.
+    Transient failures (timeouts, 429, 5xx except 500) are retried with a capped exponential
+    backoff. When the cache is enabled, the cached responses skip both the API call and the
+    throttle, and the permanent failures (500 spelling error, no translation) are kept in the
+    negative cache, so they are not queried again until `negative_cache_ttl` expires.
+    When the archive is enabled, the fetched responses are archived for the rebuilds.
+
+    In the "concurrent" fetch mode, the words are fetched by an asyncio engine with a bounded
+    number of in-flight requests, paced by a token bucket refilled at the rate of the throttle.
 
     Parameters
     ----------
@@ -29,42 +538,23 @@ def fetch_linguee_translations(
 
     Returns
     -------
-    tuple[list[list[WordEntry]], list[dict[str, str]]]
+    tuple[list[list[WordEntry]], list[dict[str, Any]]]
         First element of the tuple is the list of list, because a word can have several meanings
         of translation information.
-        And the second element is the dictionnary of the erros.
+        And the second element is the dictionnary of the erros, see `error_row`.
     """
     results: list[list[WordEntry]] = []
-    errors: list[dict[str, str]] = []
+    errors: list[dict[str, Any]] = []
 
-    for word in words:
-        wait_time = random.uniform(5, 8)
-        time.sleep(wait_time)
-        try:
-            resp = requests.get(
-                settings.api.url,
-                params={
-                    "query": word,
-                    "src": settings.app.src,
-                    "dst": settings.app.dst,
-                    "guess_direction": settings.api.guess_direction,
-                    "follow_corrections": settings.api.follow_correction,
-                },
-                timeout=10,
-            )
-
-            if resp.status_code == 500:
-                logger.warning("500 error for the word: {error_word}", error_word=word)
-                errors.append({"word": word, "error": "500 error, please check the spelling"})
-                continue
+    positions = {word: i for i, word in reversed(list(enumerate(words)))}
+    outcomes = sorted(
+        iter_linguee_translations(words, settings), key=lambda outcome: positions[outcome[0]]
+    )
 
-            resp.raise_for_status()
-            data = resp.json()
-            parsed = [WordEntry(**entry) for entry in data]
+    for word, parsed, error in outcomes:
+        if error is not None:
+            errors.append(error_row(word, error))
+        else:
             results.append(parsed)
 
-        except Exception as e:
-            logger.warning("Failed to fetch the word: {error_word}", error_word=word)
-            errors.append({"word": word, "error": str(e)})
-
     return results, errors
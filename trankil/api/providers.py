@@ -0,0 +1,344 @@
+"""Translation providers.
+
+A provider answers a translation query with a list of WordEntry. The providers are
+registered by kind and chained in the order given by the settings: when a provider is
+unavailable, the next one is tried.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+import requests
+
+from trankil import metrics
+from trankil.api.throttle import TRANSIENT_STATUS_CODES, parse_retry_after
+from trankil.models.word_entry import WordEntry, parse_word_entries
+from trankil.work_queue import PERMANENT, TRANSIENT, UNAVAILABLE
+
+if TYPE_CHECKING:
+    from trankil.config import PreprocessingSettings, ProviderSettings, Settings
+
+NO_TRANSLATION_ERROR = "No translation found, please check the spelling"
+
+
+class FetchError(Exception):
+    """Raised when the translation of a word cannot be fetched from a provider.
+
+    The failure is transient, permanent, or else the provider is unavailable: it can't
+    serve the query (misconfigured URL, authentication, invalid response...), which says
+    nothing about the word.
+
+    Parameters
+    ----------
+    message : str
+        Description of the error.
+    transient : bool
+        Whether the request may succeed if retried later (timeout, 429, 5xx except 500).
+    retry_after : Optional[float]
+        Number of seconds requested by the API before retrying, if any.
+    status_code : Optional[int]
+        HTTP status code of the response, if any.
+    permanent : bool
+        Whether the word has no translation (500 spelling error, empty response): the
+        failure is stored in the negative cache and the word is marked as failed.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        transient: bool = False,
+        retry_after: Optional[float] = None,
+        status_code: Optional[int] = None,
+        permanent: bool = False,
+    ) -> None:
+        super().__init__(message)
+        self.transient = transient
+        self.retry_after = retry_after
+        self.status_code = status_code
+        self.permanent = permanent
+
+    @property
+    def kind(self) -> str:
+        """Kind of the failure: "transient", "permanent" or "unavailable"."""
+        if self.transient:
+            return TRANSIENT
+        return PERMANENT if self.permanent else UNAVAILABLE
+
+
+def error_row(word: str, error: FetchError) -> dict[str, str]:
+    """Returns the error row of a word whose fetching failed.
+
+    Parameters
+    ----------
+    word : str
+    error : FetchError
+
+    Returns
+    -------
+    dict[str, str]
+        word, error message and kind of the failure, see `FetchError.kind`.
+    """
+    return {"word": word, "error": str(error), "kind": error.kind}
+
+
+def _is_empty_response(data: Any) -> bool:
+    if isinstance(data, bytes):
+        return data.strip() == b"[]"
+    if isinstance(data, str):
+        return data.strip() == "[]"
+    return data == []
+
+
+class ProviderMiss(FetchError):
+    """Raised when a provider has no data for the query, the next provider is tried."""
+
+
+class TranslationProvider(ABC):
+    """Base class of the translation providers.
+
+    Parameters
+    ----------
+    name : str
+        Name used in the logs.
+    throttled : bool
+        Whether the requests to this provider must be paced by the client throttle.
+    """
+
+    def __init__(self, name: str, throttled: bool) -> None:
+        self.name = name
+        self.throttled = throttled
+
+    @classmethod
+    @abstractmethod
+    def from_settings(
+        cls, provider_settings: ProviderSettings, session: requests.Session
+    ) -> TranslationProvider:
+        """Builds the provider from its settings."""
+
+    @abstractmethod
+    def fetch_raw(self, params: dict[str, Any]) -> Any:
+        """Returns the response for the query: preferably the raw JSON (bytes or str),
+        validated without decoding it first, or the decoded JSON.
+
+        Parameters
+        ----------
+        params : dict[str, Any]
+            Query parameters: query, src, dst, guess_direction and follow_corrections.
+
+        Raises
+        ------
+        FetchError
+            If the provider cannot answer the query.
+        """
+
+    def fetch(
+        self, params: dict[str, Any], rules: Optional[PreprocessingSettings] = None
+    ) -> tuple[list[WordEntry], Any]:
+        """Returns the translation data for the query.
+
+        Parameters
+        ----------
+        params : dict[str, Any]
+            Query parameters: query, src, dst, guess_direction and follow_corrections.
+        rules : Optional[PreprocessingSettings]
+            Filter rules applied while parsing the response, see `parse_word_entries`.
+
+        Returns
+        -------
+        tuple[list[WordEntry], Any]
+            Parsed translation data and the response returned by `fetch_raw`.
+
+        Raises
+        ------
+        FetchError
+            If the provider cannot answer the query, returns an invalid response or no
+            translation.
+        """
+        metrics.increment("requests")
+        try:
+            with metrics.span("request", latency=True):
+                data = self.fetch_raw(params)
+        except FetchError:
+            metrics.increment("request_errors")
+            raise
+        if isinstance(data, bytes):
+            metrics.increment("fetched_bytes", len(data))
+        if _is_empty_response(data):
+            raise FetchError(NO_TRANSLATION_ERROR, permanent=True)
+
+        try:
+            with metrics.span("parse"):
+                return parse_word_entries(data, rules), data
+        except Exception as e:
+            raise FetchError(str(e)) from e
+
+
+class LingueeHTTPProvider(TranslationProvider):
+    """Linguee API over HTTP, by default the public endpoint.
+
+    Parameters
+    ----------
+    url : str
+        Translations endpoint of the API.
+    session : Optional[requests.Session]
+        Session holding the connection pool, a new one is created if None.
+    timeout : float
+        Timeout of the requests, in seconds.
+    throttled : bool
+    """
+
+    default_throttled = True
+
+    def __init__(
+        self,
+        url: str,
+        session: Optional[requests.Session] = None,
+        timeout: float = 10,
+        throttled: Optional[bool] = None,
+    ) -> None:
+        super().__init__(url, self.default_throttled if throttled is None else throttled)
+        self.url = url
+        self.session = session or requests.Session()
+        self.timeout = timeout
+
+    @classmethod
+    def from_settings(
+        cls, provider_settings: ProviderSettings, session: requests.Session
+    ) -> LingueeHTTPProvider:
+        if provider_settings.url is None:
+            raise ValueError(f"The {provider_settings.kind} provider requires an url.")
+        return cls(
+            provider_settings.url, session, provider_settings.timeout, provider_settings.throttled
+        )
+
+    def fetch_raw(self, params: dict[str, Any]) -> Any:
+        try:
+            resp = self.session.get(self.url, params=params, timeout=self.timeout)
+        except (requests.Timeout, requests.ConnectionError) as e:
+            raise FetchError(str(e), transient=True) from e
+        except Exception as e:
+            raise FetchError(str(e)) from e
+
+        if resp.status_code == 500:
+            raise FetchError(
+                "500 error, please check the spelling", status_code=500, permanent=True
+            )
+
+        if resp.status_code in TRANSIENT_STATUS_CODES or 500 < resp.status_code < 600:
+            raise FetchError(
+                f"{resp.status_code} error, the API is temporarily unavailable",
+                transient=True,
+                retry_after=parse_retry_after(resp.headers.get("Retry-After")),
+                status_code=resp.status_code,
+            )
+
+        try:
+            resp.raise_for_status()
+            return resp.content
+        except Exception as e:
+            raise FetchError(str(e), status_code=resp.status_code) from e
+
+
+class SelfHostedLingueeProvider(LingueeHTTPProvider):
+    """Self-hosted linguee-api instance, not throttled by default."""
+
+    default_throttled = False
+
+
+class FixtureProvider(TranslationProvider):
+    """In-process provider answering from recorded responses.
+
+    The responses are looked up in `responses` first, then in the
+    `<fixtures_path>/<src>_<dst>/<query>.json` files.
+
+    Parameters
+    ----------
+    responses : Optional[dict[str, Any]]
+        Decoded JSON responses by query.
+    fixtures_path : Optional[Path]
+        Folder of the recorded responses.
+    """
+
+    def __init__(
+        self, responses: Optional[dict[str, Any]] = None, fixtures_path: Optional[Path] = None
+    ) -> None:
+        super().__init__("fixture", throttled=False)
+        self.responses = responses or {}
+        self.fixtures_path = fixtures_path
+
+    @classmethod
+    def from_settings(
+        cls, provider_settings: ProviderSettings, session: requests.Session
+    ) -> FixtureProvider:
+        if provider_settings.fixtures_path is None:
+            raise ValueError("The fixture provider requires a fixtures_path.")
+        return cls(fixtures_path=provider_settings.fixtures_path)
+
+    def fetch_raw(self, params: dict[str, Any]) -> Any:
+        query = params["query"]
+        if query in self.responses:
+            return self.responses[query]
+
+        if self.fixtures_path is not None:
+            path = Path(self.fixtures_path) / f"{params['src']}_{params['dst']}" / f"{query}.json"
+            if path.exists():
+                return path.read_bytes()
+
+        raise ProviderMiss(f"No fixture found for the word: {query}")
+
+
+PROVIDERS: dict[str, type[TranslationProvider]] = {
+    "linguee": LingueeHTTPProvider,
+    "linguee_self_hosted": SelfHostedLingueeProvider,
+    "fixture": FixtureProvider,
+}
+
+
+def register_provider(kind: str, provider_class: type[TranslationProvider]) -> None:
+    """Registers a provider class under a kind usable in the settings.
+
+    Parameters
+    ----------
+    kind : str
+    provider_class : type[TranslationProvider]
+    """
+    PROVIDERS[kind] = provider_class
+
+
+def build_providers(
+    settings: Settings, session: Optional[requests.Session] = None
+) -> list[TranslationProvider]:
+    """Builds the ordered failover chain of providers from the settings.
+    Without any configured provider, the chain is the Linguee API at `settings.api.url`.
+
+    Parameters
+    ----------
+    settings : Settings
+    session : Optional[requests.Session]
+        Session shared by the HTTP providers, a new one is created if None.
+
+    Returns
+    -------
+    list[TranslationProvider]
+
+    Raises
+    ------
+    ValueError
+        If a provider kind is not registered.
+    """
+    session = session or requests.Session()
+
+    if not settings.api.providers:
+        return [LingueeHTTPProvider(settings.api.url, session)]
+
+    providers = []
+    for provider_settings in settings.api.providers:
+        if provider_settings.kind not in PROVIDERS:
+            raise ValueError(f"Unknown translation provider: {provider_settings.kind}")
+        providers.append(
+            PROVIDERS[provider_settings.kind].from_settings(provider_settings, session)
+        )
+    return providers
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Asynchronous token bucket rate limiter.
+
+    The bucket is refilled continuously at `rate` tokens per second and holds at most
+    `burst` tokens. Each request consumes one token, so short bursts are allowed while
+    the long run rate stays bounded.
+
+    Parameters
+    ----------
+    rate : float
+        Number of tokens added per second.
+    burst : int
+        Capacity of the bucket.
+
+    Raises
+    ------
+    ValueError
+        If the rate or the burst is not strictly positive.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        if rate <= 0 or burst <= 0:
+            raise ValueError("The rate and the burst must be strictly positive.")
+
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def acquire(self) -> None:
+        """Waits until a token is available and consumes it."""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
@@ -0,0 +1,148 @@
+"""Throttling policies of the API client.
+
+The fixed throttle waits a random delay between the requests. The adaptive throttle
+controls the request rate with AIMD (additive increase, multiplicative decrease):
+the rate slowly grows while the API answers, and is halved as soon as it pushes back.
+"""
+
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+TRANSIENT_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+
+class FixedThrottle:
+    """Waits a random delay between `min_delay` and `max_delay` seconds before each request."""
+
+    def __init__(self, min_delay: float = 5, max_delay: float = 8) -> None:
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._not_before = 0.0
+
+    def next_delay(self) -> float:
+        """Returns the number of seconds to wait before sending the next request."""
+        return max(self.pause(), random.uniform(self.min_delay, self.max_delay))
+
+    def pause(self) -> float:
+        """Returns the number of seconds left before the `Retry-After` deadline."""
+        return max(0.0, self._not_before - time.monotonic())
+
+    def on_success(self) -> None:
+        pass
+
+    def on_throttled(self, retry_after: Optional[float] = None) -> None:
+        if retry_after is not None:
+            self._not_before = max(self._not_before, time.monotonic() + retry_after)
+
+
+class AdaptiveThrottle:
+    """AIMD controller of the request rate.
+
+    Parameters
+    ----------
+    rate : float
+        Initial rate, in requests per second.
+    min_rate : float
+        Lower bound of the rate.
+    max_rate : float
+        Upper bound of the rate.
+    increase : float
+        Rate added after each successful request.
+    decrease_factor : float
+        Factor applied to the rate when the API pushes back.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        min_rate: float,
+        max_rate: float,
+        increase: float = 0.01,
+        decrease_factor: float = 0.5,
+    ) -> None:
+        if not 0 < min_rate <= max_rate:
+            raise ValueError("The rates must satisfy 0 < min_rate <= max_rate.")
+
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self._next_slot = 0.0
+        self._not_before = 0.0
+
+    def next_delay(self) -> float:
+        """Reserves the next request slot and returns the number of seconds to wait for it.
+
+        The slots are spaced by 1 / rate and never start before the `Retry-After` deadline.
+        """
+        now = time.monotonic()
+        start = max(now, self._next_slot, self._not_before)
+        self._next_slot = start + 1 / self.rate
+        return start - now
+
+    def pause(self) -> float:
+        """Returns the number of seconds left before the `Retry-After` deadline."""
+        return max(0.0, self._not_before - time.monotonic())
+
+    def on_success(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttled(self, retry_after: Optional[float] = None) -> None:
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        if retry_after is not None:
+            self._not_before = max(self._not_before, time.monotonic() + retry_after)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Computes a capped exponential backoff with full jitter.
+
+    Parameters
+    ----------
+    attempt : int
+        Number of the retry, starting at 0.
+    base : float
+        Delay of the first retry, in seconds.
+    cap : float
+        Maximum delay, in seconds.
+
+    Returns
+    -------
+    float
+        Random delay between 0 and min(cap, base * 2 ** attempt).
+    """
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses the value of a `Retry-After` header.
+
+    Parameters
+    ----------
+    value : Optional[str]
+        Number of seconds or HTTP date.
+
+    Returns
+    -------
+    Optional[float]
+        Number of seconds to wait, None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,136 @@
+"""Batch mode over all the language pairs.
+
+The language pairs are the `<src>_<dst>/` folders of the data folder holding an input file.
+Their words are translated in a single process: the HTTP providers share one session, and
+so one connection pool, and the requests of all the pairs are paced by one throttle, so the
+rate budget of the settings is global. The pairs are interleaved round-robin, so every pair
+progresses even when the budget is tight.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+from typing import TYPE_CHECKING, TypeVar
+
+import requests
+
+from trankil.api.client import Outcome, iter_linguee_translations, make_throttle
+from trankil.logger import logger
+from trankil.pipeline import WordCheckpointer, claim_words
+from trankil.work_queue import WorkQueue
+
+if TYPE_CHECKING:
+    from trankil.config import Settings
+
+K = TypeVar("K")
+T = TypeVar("T")
+
+
+def discover_pairs(data_folder: Path) -> list[tuple[str, str]]:
+    """Returns the language pairs of the `<src>_<dst>` folders holding an input file.
+
+    Parameters
+    ----------
+    data_folder : Path
+
+    Returns
+    -------
+    list[tuple[str, str]]
+        Source and destination languages, sorted.
+    """
+    pairs = []
+    for input_path in sorted(data_folder.glob("*_*/input_words.csv")):
+        src, _, dst = input_path.parent.name.partition("_")
+        if src and dst:
+            pairs.append((src, dst))
+    return pairs
+
+
+def pair_settings(settings: Settings, src: str, dst: str) -> Settings:
+    """Returns the settings of a language pair.
+
+    The fetching is sequential: the shared throttle paces the requests of all the pairs.
+    """
+    return settings.model_copy(
+        update={
+            "app": settings.app.model_copy(update={"src": src, "dst": dst}),
+            "api": settings.api.model_copy(update={"fetch_mode": "sequential"}),
+        }
+    )
+
+
+def interleave(iterators: Mapping[K, Iterator[T]]) -> Iterator[tuple[K, T]]:
+    """Yields the items of the iterators round-robin, with the key of their iterator,
+    until all of them are exhausted."""
+    active = dict(iterators)
+    while active:
+        for key in list(active):
+            try:
+                item = next(active[key])
+            except StopIteration:
+                del active[key]
+                continue
+            yield key, item
+
+
+def run_all_pairs(
+    settings: Settings, export: bool = True
+) -> dict[str, tuple[int, list[dict[str, str]], list[Path]]]:
+    """Translates the next words of every language pair.
+
+    The pairs are discovered in `settings.app.data_folder`. Each pair claims
+    `settings.app.words_limit` words in its own work queue, and its words are processed and
+    checkpointed one by one as in the streaming pipeline.
+
+    Parameters
+    ----------
+    settings : Settings
+        Settings shared by the pairs, their language pair is ignored.
+    export : bool
+        Whether the decks are exported, otherwise the notes are only stored.
+
+    Returns
+    -------
+    dict[str, tuple[int, list[dict[str, str]], list[Path]]]
+        By language pair, the number of translated words, the errors and the paths of the
+        exported packages.
+    """
+    data_folder = settings.app.data_folder
+    pairs = discover_pairs(data_folder)
+    if not pairs:
+        logger.warning("No language pair found in {data_folder}", data_folder=data_folder)
+        return {}
+
+    session = requests.Session()
+    throttle = make_throttle(settings)
+    queues: dict[str, WorkQueue] = {}
+    checkpointers: dict[str, WordCheckpointer] = {}
+    outcomes: dict[str, Iterator[Outcome]] = {}
+    results = {}
+    completed = False
+
+    try:
+        for src, dst in pairs:
+            settings_of_pair = pair_settings(settings, src, dst)
+            pair = settings_of_pair.app.pair
+            logger.info("Language pair {pair}", pair=pair)
+            queues[pair] = WorkQueue(settings_of_pair.app.queue_path)
+            words = claim_words(queues[pair], settings_of_pair)
+            checkpointers[pair] = WordCheckpointer(settings_of_pair, queues[pair], export)
+            outcomes[pair] = iter_linguee_translations(words, settings_of_pair, session, throttle)
+
+        for pair, (word, entries, error) in interleave(outcomes):
+            checkpointers[pair].process(word, entries, error)
+        completed = True
+    finally:
+        for iterator in outcomes.values():
+            iterator.close()
+        for pair, checkpointer in checkpointers.items():
+            deck_paths = checkpointer.close(completed)
+            results[pair] = (checkpointer.n_translated, checkpointer.errors, deck_paths)
+        for queue in queues.values():
+            queue.close()
+        session.close()
+
+    return results
@@ -0,0 +1,144 @@
+"""Command line interface of Trankil.
+
+Only the standard library is imported at startup: each subcommand imports the modules it
+needs when it runs, so the quick commands (`status`, `--help`) do not pay for the import
+of genanki, requests, pydantic-settings or loguru.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from typing import Any, Optional
+
+
+def _call(function_name: str, **kwargs: Any) -> int:
+    """Calls an application function of `trankil.main`, logging the crashes."""
+    from trankil import main as app
+
+    try:
+        getattr(app, function_name)(**kwargs)
+    except Exception as e:
+        app.logger.exception("Application crashed due to an unexpected error: {}", e)
+        raise
+    return 0
+
+
+def _run(args: argparse.Namespace) -> int:
+    if getattr(args, "all_pairs", False):
+        return _call("run", all_pairs=True)
+    return _call("run")
+
+
+def _fetch(args: argparse.Namespace) -> int:
+    if args.all_pairs:
+        return _call("run", export=False, all_pairs=True)
+    return _call("run", export=False)
+
+
+def _render(args: argparse.Namespace) -> int:
+    return _call("rebuild", export=False)
+
+
+def _export(args: argparse.Namespace) -> int:
+    return _call("export", full=args.full)
+
+
+def _rebuild(args: argparse.Namespace) -> int:
+    return _call("rebuild")
+
+
+def _daemon(args: argparse.Namespace) -> int:
+    return _call("daemon")
+
+
+def _compact_notes(args: argparse.Namespace) -> int:
+    return _call("compact")
+
+
+def _status(args: argparse.Namespace) -> int:
+    """Prints the number of words by state in the work queues, read with sqlite3 only."""
+    import sqlite3
+    from pathlib import Path
+
+    from trankil.work_queue import DONE, FAILED, IN_FLIGHT, PENDING
+
+    # The queues are in outputs/<src>_<dst>/queue.sqlite, see AppSettings.queue_path.
+    outputs = Path("outputs")
+    if args.pair:
+        queue_paths = [outputs / args.pair / "queue.sqlite"]
+    else:
+        queue_paths = sorted(outputs.glob("*/queue.sqlite"))
+    queue_paths = [path for path in queue_paths if path.exists()]
+    if not queue_paths:
+        print("No work queue found.")
+        return 1
+
+    for path in queue_paths:
+        conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            counts = dict.fromkeys((PENDING, IN_FLIGHT, DONE, FAILED), 0)
+            counts.update(conn.execute("SELECT state, COUNT(*) FROM words GROUP BY state"))
+        finally:
+            conn.close()
+        print(
+            f"{path.parent.name}: {counts[PENDING]} pending, {counts[IN_FLIGHT]} in flight,"
+            f" {counts[DONE]} done, {counts[FAILED]} failed"
+        )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="trankil", description="Builds Anki translation decks.")
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    parser.set_defaults(handler=_run)
+
+    run = subparsers.add_parser(
+        "run", help="Translates the next words and exports the deck (default)."
+    )
+    run.set_defaults(handler=_run)
+    fetch = subparsers.add_parser(
+        "fetch", help="Translates the next words into the note store, without exporting."
+    )
+    fetch.set_defaults(handler=_fetch)
+    for subparser in (run, fetch):
+        subparser.add_argument(
+            "--all-pairs",
+            action="store_true",
+            help="Translates the words of every <src>_<dst> folder of the data folder, not only"
+            " the ones of the language pair of the settings.",
+        )
+    subparsers.add_parser(
+        "render",
+        help="Renders all the notes again from the archived API responses, without exporting.",
+    ).set_defaults(handler=_render)
+
+    export = subparsers.add_parser("export", help="Exports the deck without translating.")
+    export.add_argument(
+        "--full", action="store_true", help="Exports all the notes, not only the new ones."
+    )
+    export.set_defaults(handler=_export)
+
+    subparsers.add_parser(
+        "rebuild", help="Renders all the notes again and exports all of them."
+    ).set_defaults(handler=_rebuild)
+    subparsers.add_parser(
+        "daemon", help="Watches the input file and translates its new words continuously."
+    ).set_defaults(handler=_daemon)
+    subparsers.add_parser("compact-notes", help="Compacts the note store.").set_defaults(
+        handler=_compact_notes
+    )
+
+    status = subparsers.add_parser("status", help="Prints the state of the work queues.")
+    status.add_argument("--pair", help="Language pair, e.g. fr_en. All the pairs by default.")
+    status.set_defaults(handler=_status)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,12 +4,14 @@ Defines structured settings for the app, deck, and API.
 Loaded from .env via pydantic-settings.
 """
 
+import hashlib
 from pathlib import Path
-from typing import Literal
+from typing import Literal, Optional
 
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from trankil.anki.templates import TEMPLATE_FIELDS, compile_template
 from trankil.logger import logger
 
 
@@ -17,14 +19,26 @@ class AppSettings(BaseModel):
     src: str
     dst: str
     words_limit: int = 5
+    pipeline: Literal["staged", "streaming"] = "staged"
+    rebuild_workers: Optional[int] = None
+    rebuild_chunk_size: int = 500
+    skip_translated: bool = True
+    requeue_max_attempts: int = 5
+    requeue_delay: float = 15 * 60
+    requeue_max_delay: float = 24 * 3600
+    data_folder: Path = Path("data")
+
+    @property
+    def pair(self) -> str:
+        return f"{self.src}_{self.dst}"
 
     @property
     def input_path(self) -> Path:
-        return Path(f"data/{self.src}_{self.dst}/input_words.csv")
+        return self.data_folder / self.pair / "input_words.csv"
 
     @property
     def output_folder(self) -> Path:
-        return Path(f"outputs/{self.src}_{self.dst}")
+        return Path(f"outputs/{self.pair}")
 
     @property
     def output_errors_path(self) -> Path:
@@ -34,9 +48,90 @@ class AppSettings(BaseModel):
     def output_history_path(self) -> Path:
         return Path(f"{self.output_folder}/history.csv")
 
+    @property
+    def history_index_path(self) -> Path:
+        return Path(f"{self.output_folder}/history.sqlite")
+
+    @property
+    def queue_path(self) -> Path:
+        return Path(f"{self.output_folder}/queue.sqlite")
+
+    @property
+    def input_cursor_path(self) -> Path:
+        return Path(f"{self.output_folder}/input_words.cursor")
+
+    @property
+    def archive_path(self) -> Path:
+        return Path(f"{self.output_folder}/responses.sqlite")
+
+    @property
+    def metrics_report_path(self) -> Path:
+        return Path(f"{self.output_folder}/run_metrics.json")
+
+
+class CardTemplates(BaseModel):
+    """HTML templates of the cards, in the `str.format` syntax.
+    The available fields are listed in `trankil.anki.templates.TEMPLATE_FIELDS`.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    header: str = "<div class='word'>{text} <span class='type_word'>{pos}</span></div>"
+    front_translation: str = (
+        "<div class='group'><div class='translation_title'>__translation_{index}__:</div>"
+        "<ul>{examples}</ul></div>"
+    )
+    back_translation: str = (
+        "<div class='group'><div class='meaning'>{text}</div><ul>{examples}</ul></div>"
+    )
+    front_example: str = "<li>{src}</li>"
+    back_example: str = "<li>{src}<br><i>{dst}</i></li>"
+    separator: str = "<br>"
+
+    @model_validator(mode="after")
+    def check_templates(self) -> "CardTemplates":
+        for name in TEMPLATE_FIELDS:
+            compile_template(name, getattr(self, name))
+        return self
+
+
+class CardLimits(BaseModel):
+    """Bounds of the size of the cards, see `trankil.anki.examples`.
+    The cards are unbounded by default.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    # Number of examples kept by translation, the best scored ones.
+    max_examples: Optional[int] = Field(default=None, ge=1)
+    example_min_length: int = 20
+    example_max_length: int = 120
+    length_weight: float = 1.0
+    uniqueness_weight: float = 1.0
+    # Size of the front and back fields, in bytes: the last examples are dropped to fit.
+    max_field_bytes: Optional[int] = Field(default=None, ge=1)
+    # Whether the dropped examples are kept in a third field, shown below the back.
+    overflow_field: bool = False
+
+    @model_validator(mode="after")
+    def check_length_band(self) -> "CardLimits":
+        if not 0 < self.example_min_length <= self.example_max_length:
+            raise ValueError("The example length band must satisfy 0 < min <= max.")
+        return self
+
+
+# Anki deck id of the single deck exported by the versions before the decks by pair.
+LEGACY_DECK_ID = 1239922789
+
 
 class DeckSettings(BaseModel):
     name: str = "Trankil"
+    templates: CardTemplates = CardTemplates()
+    card_limits: CardLimits = CardLimits()
+    fragment_cache_size: int = 4096
+    export_mode: Literal["full", "delta"] = "delta"
+    export_interval: float = 60
+    deck_ids: dict[str, int] = {}
 
     @property
     def export_name(self) -> Path:
@@ -46,22 +141,118 @@ class DeckSettings(BaseModel):
     def save_notes_json(self) -> Path:
         return Path(f"{self.name}.json")
 
+    @property
+    def notes_store(self) -> Path:
+        return Path(f"{self.name}.sqlite")
+
+    def delta_export_name(self, timestamp: str) -> Path:
+        return Path(f"{self.name}_{timestamp}.apkg")
+
+    def deck_name(self, pair: str) -> str:
+        """Returns the Anki name of the deck of a language pair, a subdeck of the deck name.
+
+        Anki matches the imported decks by name, so the pair with the legacy deck id keeps
+        the deck name of the previous versions.
+        """
+        if self.deck_id(pair) == LEGACY_DECK_ID:
+            return self.name
+        return f"{self.name}::{pair}"
+
+    def deck_id(self, pair: str) -> int:
+        """Returns the Anki deck id of a language pair: the pinned one in `deck_ids`, or a
+        stable id derived from the deck name and the pair."""
+        if pair in self.deck_ids:
+            return self.deck_ids[pair]
+        digest = hashlib.sha256(f"{self.name}/{pair}".encode()).digest()
+        return (1 << 30) + int.from_bytes(digest[:4], "big") % (1 << 30)
+
+
+class PreprocessingSettings(BaseModel):
+    featured_entries_only: bool = True
+    featured_translations_only: bool = True
+    min_usage_frequency: Optional[Literal["often used", "almost always used"]] = None
+    allowed_pos: list[str] = []
+    max_translations: Optional[int] = Field(default=None, ge=1)
+
+
+class ProviderSettings(BaseModel):
+    kind: str = "linguee"
+    url: Optional[str] = None
+    fixtures_path: Optional[Path] = None
+    throttled: Optional[bool] = None
+    timeout: float = 10
+
 
 class APISettings(BaseModel):
     url: str = "https://linguee-api.fly.dev/api/v2/translations"
     guess_direction: bool = False
     follow_correction: Literal["never", "always", "on_empty_translations"] = "never"
+    archive_enabled: bool = True
+    cache_enabled: bool = True
+    cache_path: Path = Path("outputs/linguee_cache.sqlite")
+    cache_ttl: int = 30 * 24 * 3600
+    cache_max_entries: int = 50_000
+    negative_cache_ttl: int = 180 * 24 * 3600
+    fetch_mode: Literal["sequential", "concurrent"] = "sequential"
+    max_concurrency: int = 4
+    rate_per_second: float = 0.2
+    rate_burst: int = 1
+    throttle: Literal["fixed", "adaptive"] = "adaptive"
+    min_rate: float = 0.05
+    max_rate: float = 0.5
+    rate_increase: float = 0.01
+    rate_decrease_factor: float = 0.5
+    max_retries: int = 3
+    backoff_base: float = 2.0
+    backoff_max: float = 60.0
+    providers: list[ProviderSettings] = []
+
+
+class LoggingSettings(BaseModel):
+    level: Literal["TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "CRITICAL"] = "INFO"
+    path: Optional[Path] = Path("logs/app.log")
+    format: Literal["text", "json"] = "text"
+    enqueue: bool = True
+    diagnose: bool = False
+    backtrace: bool = True
+    rotation: str = "500 KB"
+    retention: str = "7 days"
+
+
+class MetricsSettings(BaseModel):
+    enabled: bool = True
+    textfile_dir: Optional[Path] = None
+
+
+class DaemonSettings(BaseModel):
+    watcher: Literal["auto", "inotify", "polling"] = "auto"
+    poll_interval: float = 5
+    # Seconds between two imports of the input file when the watcher reports no change.
+    rescan_interval: float = 300
 
 
 class Settings(BaseSettings):
     app: AppSettings
     api: APISettings = APISettings()
     deck: DeckSettings = DeckSettings()
+    preprocessing: PreprocessingSettings = PreprocessingSettings()
+    metrics: MetricsSettings = MetricsSettings()
+    logging: LoggingSettings = LoggingSettings()
+    daemon: DaemonSettings = DaemonSettings()
 
     model_config = SettingsConfigDict(
         env_prefix="", env_nested_delimiter="__", env_file=".env", env_file_encoding="utf-8"
     )
 
+    @model_validator(mode="after")
+    def keep_legacy_deck_id(self) -> "Settings":
+        """The configured language pair keeps the deck id of the previous versions, unless
+        its id is pinned."""
+        if self.app.pair not in self.deck.deck_ids:
+            deck_ids = {**self.deck.deck_ids, self.app.pair: LEGACY_DECK_ID}
+            self.deck = self.deck.model_copy(update={"deck_ids": deck_ids})
+        return self
+
 
 class SettingsError(Exception):
     """Raised when application settings cannot be loaded."""
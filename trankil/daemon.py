@@ -0,0 +1,152 @@
+"""Daemon mode: translates the words of the input file continuously.
+
+The daemon watches the input file and imports the appended words when the watcher reports
+a change, or every `settings.daemon.rescan_interval` seconds as a backstop. The words are
+claimed by batches of `settings.app.words_limit` and processed one by one as in the
+streaming pipeline, paced by a single throttle, so the rate budget holds across the
+batches. The deck is exported at most once per `settings.deck.export_interval` seconds.
+On SIGTERM or SIGINT, the daemon stops after the word being processed, without waiting for
+the throttle or for a backoff: the claimed words left are pending again, and the last
+notes are exported.
+"""
+
+from __future__ import annotations
+
+import signal
+import threading
+import time
+from collections.abc import Generator
+from typing import TYPE_CHECKING, Any, Optional
+
+import requests
+
+from trankil import metrics
+from trankil.api.client import Outcome, iter_linguee_translations, make_throttle
+from trankil.history import HistoryIndex
+from trankil.logger import logger
+from trankil.pipeline import WordCheckpointer, claim_untranslated
+from trankil.watcher import FileWatcher, make_watcher
+from trankil.work_queue import WorkQueue
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from trankil.config import Settings
+
+# Maximum number of seconds between two checks of the stop event while idle.
+_IDLE_WAIT = 1.0
+
+
+def install_stop_handlers(stop: threading.Event) -> None:
+    """Sets the stop event on SIGTERM and SIGINT."""
+
+    def handler(signum: int, frame: object) -> None:
+        logger.info("{signal} received, stopping", signal=signal.Signals(signum).name)
+        stop.set()
+
+    signal.signal(signal.SIGTERM, handler)
+    signal.signal(signal.SIGINT, handler)
+
+
+def _import_words(queue: WorkQueue, settings: Settings) -> None:
+    n_imported = queue.import_csv(
+        settings.app.input_path,
+        settings.app.input_cursor_path,
+        requeue=not settings.app.skip_translated,
+    )
+    if n_imported:
+        logger.info("{n_word_imported} new words imported", n_word_imported=n_imported)
+
+
+def _claim_next(queue: WorkQueue, settings: Settings, history: HistoryIndex) -> list[str]:
+    """Claims the next words, skipping the words of the history index if enabled."""
+    if not settings.app.skip_translated:
+        return queue.claim(settings.app.words_limit)
+    history.sync_csv(settings.app.output_history_path)
+    return claim_untranslated(queue, settings.app.words_limit, history)
+
+
+def _process_until_stopped(
+    outcomes: Generator[Outcome, None, None], checkpointer: WordCheckpointer, stop: threading.Event
+) -> None:
+    """Processes the fetched words until the stop event is set, then closes the fetching."""
+    try:
+        for word, entries, error in outcomes:
+            checkpointer.process(word, entries, error)
+            if stop.is_set():
+                break
+    finally:
+        outcomes.close()
+
+
+def run_daemon(
+    settings: Settings,
+    stop: Optional[threading.Event] = None,
+    watcher: Optional[FileWatcher] = None,
+) -> tuple[int, list[dict[str, Any]], list[Path]]:
+    """Translates the words of the input file until the stop event is set.
+
+    Parameters
+    ----------
+    settings : Settings
+    stop : Optional[threading.Event]
+        Stops the daemon once set, see `install_stop_handlers`.
+    watcher : Optional[FileWatcher]
+        Watcher of the input file, built from the daemon settings if None.
+
+    Returns
+    -------
+    tuple[int, list[dict[str, Any]], list[Path]]
+        Number of translated words, the errors and the paths of the exported packages.
+    """
+    stop = stop or threading.Event()
+    watcher = watcher or make_watcher(
+        settings.app.input_path, settings.daemon.watcher, settings.daemon.poll_interval
+    )
+    queue = WorkQueue(settings.app.queue_path)
+    session = requests.Session()
+    throttle = make_throttle(settings)
+    history = HistoryIndex(settings.app.history_index_path)
+    checkpointer = None
+    deck_paths: list[Path] = []
+    changed, next_import = True, 0.0
+
+    try:
+        queue.release_in_flight()
+        checkpointer = WordCheckpointer(settings, queue, history=history)
+        logger.info("Watching {input_path}", input_path=settings.app.input_path)
+
+        while not stop.is_set():
+            if changed or time.monotonic() >= next_import:
+                _import_words(queue, settings)
+                next_import = time.monotonic() + settings.daemon.rescan_interval
+
+            words = _claim_next(queue, settings, history)
+            if not words:
+                checkpointer.maybe_export()
+                changed = watcher.wait(_IDLE_WAIT)
+                continue
+
+            outcomes = iter_linguee_translations(words, settings, session, throttle, stop)
+            _process_until_stopped(outcomes, checkpointer, stop)
+            # The changes made while processing are pending in the watcher.
+            changed = watcher.wait(0)
+
+            if settings.metrics.enabled:
+                metrics.write_run_metrics(settings)
+    finally:
+        n_released = queue.release_in_flight()
+        if n_released:
+            logger.info("{n_word} claimed words are pending again", n_word=n_released)
+        if checkpointer is not None:
+            deck_paths = checkpointer.close()
+        if settings.metrics.enabled:
+            metrics.write_run_metrics(settings)
+        watcher.close()
+        history.close()
+        queue.close()
+        session.close()
+
+    n_translated = checkpointer.n_translated if checkpointer else 0
+    errors = checkpointer.errors if checkpointer else []
+    return n_translated, errors, deck_paths
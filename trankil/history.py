@@ -0,0 +1,139 @@
+"""Index of the translated words of a language pair.
+
+The index is a persisted set of words, in SQLite, so a word can be looked up without
+scanning a file. The translated words are added as they were queried, when they are
+checkpointed. The words of the history file (`history.csv`), the texts of the translated
+entries, are indexed too, so the history written by the previous versions is known: the
+index is synced incrementally, it only reads the rows appended to the history file since
+the previous sync.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Iterable
+from itertools import islice
+from pathlib import Path
+from typing import Union
+
+from trankil.reader import iter_input_csv
+
+HISTORY_COLUMN = "translated_words"
+
+# Maximum number of bound parameters of a query, below the SQLite default limit.
+_MAX_VARIABLES = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS words (
+    word TEXT PRIMARY KEY
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync (
+    path TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL
+);
+"""
+
+
+class HistoryIndex:
+    """Persisted set of the translated words, backed by SQLite.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        Path of the SQLite database. The parent folders are created if needed.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript(_SCHEMA)
+
+    def add(self, words: Iterable[str]) -> int:
+        """Adds the words to the index.
+
+        Parameters
+        ----------
+        words : Iterable[str]
+
+        Returns
+        -------
+        int
+            Number of new words.
+        """
+        n_before = self._conn.total_changes
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO words (word) VALUES (?)", ((w,) for w in words if w)
+            )
+        return self._conn.total_changes - n_before
+
+    def sync_csv(self, csv_path: Union[str, Path]) -> int:
+        """Indexes the words appended to the history file since the previous sync.
+
+        Parameters
+        ----------
+        csv_path : Union[str, Path]
+            History file, with the 'translated_words' column.
+
+        Returns
+        -------
+        int
+            Number of new words, 0 if the history file doesn't exist.
+        """
+        csv_path = Path(csv_path)
+        if not csv_path.exists():
+            return 0
+        key = str(csv_path.resolve())
+        row = self._conn.execute("SELECT offset FROM sync WHERE path = ?", (key,)).fetchone()
+        offset = row[0] if row else 0
+
+        def words() -> Iterable[str]:
+            nonlocal offset
+            for word, next_offset in iter_input_csv(csv_path, offset, HISTORY_COLUMN):
+                offset = next_offset
+                yield word
+
+        n_new = self.add(words())
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO sync (path, offset) VALUES (?, ?)"
+                " ON CONFLICT (path) DO UPDATE SET offset = excluded.offset",
+                (key, offset),
+            )
+        return n_new
+
+    def known(self, words: Iterable[str]) -> set[str]:
+        """Returns the words of the index among the given words.
+
+        Parameters
+        ----------
+        words : Iterable[str]
+
+        Returns
+        -------
+        set[str]
+        """
+        known: set[str] = set()
+        iterator = iter(words)
+        while chunk := list(islice(iterator, _MAX_VARIABLES)):
+            placeholders = ", ".join("?" * len(chunk))
+            known.update(
+                word
+                for (word,) in self._conn.execute(
+                    f"SELECT word FROM words WHERE word IN ({placeholders})", chunk
+                )
+            )
+        return known
+
+    def __contains__(self, word: object) -> bool:
+        return (
+            self._conn.execute("SELECT 1 FROM words WHERE word = ?", (word,)).fetchone()
+            is not None
+        )
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM words").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,18 +1,66 @@
-from pathlib import Path
+"""Logger of the application.
+
+Importing the module has no side effect: the sinks are added by `configure_logging`, called
+by the entry points once the settings are loaded. Until then, the records go to the default
+loguru sink (stderr).
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING
 
 from loguru import logger
 
-__all__ = ["logger"]
+if TYPE_CHECKING:
+    from trankil.config import LoggingSettings
+
+__all__ = ["configure_logging", "logger"]
+
+_DEFAULT_HANDLER_ID = 0
+_handler_ids: list[int] = []
+
+
+def configure_logging(settings: LoggingSettings) -> None:
+    """Replaces the sinks of the logger by the ones of the settings.
+
+    The records below the level of the settings are dropped. The file sink writes the
+    records in the text or JSON format, from a background thread when `enqueue` is set so
+    the logging calls never wait for the disk. The values of the variables are added to
+    the tracebacks only when `diagnose` is set, which is meant for the development.
+
+    Parameters
+    ----------
+    settings : LoggingSettings
+    """
+    for handler_id in [_DEFAULT_HANDLER_ID, *_handler_ids]:
+        try:
+            logger.remove(handler_id)
+        except ValueError:
+            pass
+    _handler_ids.clear()
 
-log_path = Path("logs/app.log")
-log_path.parent.mkdir(parents=True, exist_ok=True)
+    _handler_ids.append(
+        logger.add(
+            sys.stderr,
+            level=settings.level,
+            backtrace=settings.backtrace,
+            diagnose=settings.diagnose,
+        )
+    )
 
-logger.add(
-    log_path,
-    rotation="500 KB",
-    retention="7 days",
-    level="DEBUG",
-    encoding="utf-8",
-    backtrace=True,
-    diagnose=True,
-)
+    if settings.path is not None:
+        settings.path.parent.mkdir(parents=True, exist_ok=True)
+        _handler_ids.append(
+            logger.add(
+                settings.path,
+                level=settings.level,
+                serialize=settings.format == "json",
+                enqueue=settings.enqueue,
+                rotation=settings.rotation,
+                retention=settings.retention,
+                encoding="utf-8",
+                backtrace=settings.backtrace,
+                diagnose=settings.diagnose,
+            )
+        )
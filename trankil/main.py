@@ -1,61 +1,204 @@
-from trankil.anki.deck_generator import generate_deck
-from trankil.api.client import fetch_linguee_translations
-from trankil.config import get_settings
-from trankil.logger import logger
-from trankil.preprocessing.preprocessing import preprocess_translations
-from trankil.reader import read_input_csv
-from trankil.writer import write_errors, remove_translated_word_from_csv, write_translated_word
+"""Application commands, called by `trankil.cli`.
 
+Each command imports the modules it needs when it runs, so that `export` or
+`compact-notes` don't load the fetch stack (requests, asyncio) nor the daemon.
+"""
 
-def run():
-    logger.info("Starting of the application")
+import threading
+from typing import Optional
+
+from trankil.cli import main as cli_main
+from trankil.config import Settings, get_settings
+from trankil.logger import configure_logging, logger
+from trankil.metrics import increment, span, start_run, write_run_metrics
+
+
+def load_settings() -> Settings:
     settings = get_settings()
+    configure_logging(settings.logging)
+    return settings
 
-    words_to_translate = read_input_csv(settings.app.input_path, settings.app.words_limit)
-    logger.info("{n_word_loaded} loaded words", n_word_loaded=len(words_to_translate))
 
-    translations, errors = fetch_linguee_translations(words_to_translate, settings)
-    logger.info(
-        "API returned {n_word_translated} translations and {n_word_err} errors",
-        n_word_translated=len(translations),
-        n_word_err=len(errors),
-    )
+def run(export: bool = True, all_pairs: bool = False):
+    settings = load_settings()
+    logger.info("Starting of the application")
+    run_metrics = start_run()
+    try:
+        if all_pairs:
+            translate_all_pairs(settings, export)
+        else:
+            translate(settings, export)
+    finally:
+        if settings.metrics.enabled:
+            report_path, prometheus_path = write_run_metrics(settings, run_metrics, all_pairs)
+            logger.info(
+                "Run metrics exported: {report_path} and {prometheus_path}",
+                report_path=report_path,
+                prometheus_path=prometheus_path,
+            )
 
-    translations = preprocess_translations(translations)
-    logger.info("Data preprocessing is done")
 
-    generate_deck(translations, settings)
-    logger.success(
-        "The {deck_name} Anki deck generated: {deck_path}",
-        deck_name=settings.deck.name,
-        deck_path=settings.app.output_folder / settings.deck.export_name,
-    )
+def translate_all_pairs(settings: Settings, export: bool = True) -> None:
+    from trankil.batch import run_all_pairs
 
-    if translations:
-        words_to_remove = [t.text for t in translations] + [err["word"] for err in errors]
-        remove_translated_word_from_csv(words_to_remove, settings.app.input_path)
+    for pair, (n_translated, errors, deck_paths) in run_all_pairs(settings, export).items():
+        increment("words_translated", n_translated)
+        increment("word_errors", len(errors))
         logger.info(
-            "Translated words are removed from the original file: {file_path}",
-            file_path=settings.app.input_path,
+            "{pair}: {n_word_translated} words translated and {n_word_err} errors",
+            pair=pair,
+            n_word_translated=n_translated,
+            n_word_err=len(errors),
         )
+        for deck_path in deck_paths:
+            logger.success(
+                "The {deck_name} Anki deck generated: {deck_path}",
+                deck_name=settings.deck.name,
+                deck_path=deck_path,
+            )
+
+
+def translate(settings: Settings, export: bool = True) -> None:
+    from trankil.anki.deck_generator import generate_deck
+    from trankil.api.client import fetch_linguee_translations
+    from trankil.pipeline import claim_words, record_errors, record_translated, stream_words
+    from trankil.preprocessing.preprocessing import preprocess_translations
+    from trankil.work_queue import WorkQueue
+    from trankil.writer import write_errors, write_translated_word
+
+    queue = WorkQueue(settings.app.queue_path)
+    try:
+        words_to_translate = claim_words(queue, settings)
+
+        if settings.app.pipeline == "streaming":
+            n_translated, errors, deck_paths = stream_words(
+                words_to_translate, settings, queue, export
+            )
+            increment("words_translated", n_translated)
+            increment("word_errors", len(errors))
+            logger.info(
+                "{n_word_translated} words translated and {n_word_err} errors",
+                n_word_translated=n_translated,
+                n_word_err=len(errors),
+            )
+            for deck_path in deck_paths:
+                logger.success(
+                    "The {deck_name} Anki deck generated: {deck_path}",
+                    deck_name=settings.deck.name,
+                    deck_path=deck_path,
+                )
+            logger.info("Work queue: {counts}", counts=queue.counts())
+            return
+
+        with span("fetch"):
+            translations, errors = fetch_linguee_translations(words_to_translate, settings)
+        increment("words_translated", len(translations))
+        increment("word_errors", len(errors))
+        logger.info(
+            "API returned {n_word_translated} translations and {n_word_err} errors",
+            n_word_translated=len(translations),
+            n_word_err=len(errors),
+        )
+
+        with span("preprocess"):
+            translations = preprocess_translations(translations, settings.preprocessing)
+        logger.info("Data preprocessing is done")
+
+        with span("deck"):
+            deck_path = generate_deck(translations, settings, export)
+        if deck_path is not None:
+            logger.success(
+                "The {deck_name} Anki deck generated: {deck_path}",
+                deck_name=settings.deck.name,
+                deck_path=deck_path,
+            )
+
+        error_words = {err["word"] for err in errors}
+        done_words = [w for w in words_to_translate if w not in error_words]
+        queue.mark_done(done_words)
+        record_translated(done_words, settings)
+        failed = record_errors(queue, errors, settings)
+        logger.info("Work queue: {counts}", counts=queue.counts())
+    finally:
+        queue.close()
 
+    if translations:
         write_translated_word([t.text for t in translations], settings.app.output_history_path)
         logger.info(
             "Translated words are saved in the history file: {file_path}",
             file_path=settings.app.output_history_path,
         )
 
-    if errors:
-        write_errors(errors, settings.app.output_errors_path)
+    if failed:
+        write_errors(failed, settings.app.output_errors_path)
         logger.info("Errors exported: {file_path}", file_path=settings.app.output_errors_path)
 
 
-def main() -> None:
+def daemon() -> None:
+    from trankil.daemon import install_stop_handlers, run_daemon
+
+    settings = load_settings()
+    logger.info("Starting of the daemon")
+    start_run()
+    stop = threading.Event()
+    install_stop_handlers(stop)
+    n_translated, errors, deck_paths = run_daemon(settings, stop)
+
+    logger.info(
+        "Daemon stopped: {n_word_translated} words translated and {n_word_err} errors",
+        n_word_translated=n_translated,
+        n_word_err=len(errors),
+    )
+    for deck_path in deck_paths:
+        logger.success(
+            "The {deck_name} Anki deck generated: {deck_path}",
+            deck_name=settings.deck.name,
+            deck_path=deck_path,
+        )
+
+
+def compact() -> None:
+    from trankil.anki.deck_generator import compact_notes
+
+    settings = load_settings()
+    compact_notes(settings)
+
+
+def export(full: bool = False) -> None:
+    from trankil.anki.deck_generator import export_notes, open_note_store
+
+    settings = load_settings()
+    store = open_note_store(settings)
     try:
-        run()
-    except Exception as e:
-        logger.exception("Application crashed due to an unexpected error: {}", e)
-        raise
+        deck_path = export_notes(store, settings, full=full)
+    finally:
+        store.close()
+
+    if deck_path is not None:
+        logger.success(
+            "The {deck_name} Anki deck exported: {deck_path}",
+            deck_name=settings.deck.name,
+            deck_path=deck_path,
+        )
+
+
+def rebuild(export: bool = True) -> None:
+    from trankil.rebuild import rebuild_notes
+
+    settings = load_settings()
+    deck_path = rebuild_notes(settings, export)
+
+    if deck_path is not None:
+        logger.success(
+            "The {deck_name} Anki deck rebuilt: {deck_path}",
+            deck_name=settings.deck.name,
+            deck_path=deck_path,
+        )
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Entry point of `python -m trankil.main`, see `trankil.cli` for the commands."""
+    cli_main(argv)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,260 @@
+"""Metrics of a run.
+
+The pipeline records timing spans around its stages, latency samples of the requests and
+of the words, counters (bytes fetched, cache hits...) and gauges (note store sizes) into
+the metrics of the current run. At the end of the run, they are exported as a JSON report
+and as a file for the textfile collector of the Prometheus node exporter.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from trankil.config import Settings
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def quantile(sorted_samples: list[float], q: float) -> float:
+    """Returns the nearest-rank quantile of sorted samples."""
+    rank = max(1, round(q * len(sorted_samples)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+class RunMetrics:
+    """Thread-safe metrics of a run.
+
+    Spans accumulate the time spent in each stage (and the number of calls), histograms
+    keep every latency sample, counters are summed and gauges keep their last value.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._spans: dict[str, list[float]] = defaultdict(lambda: [0, 0.0])
+        self._samples: dict[str, list[float]] = defaultdict(list)
+        self._counters: dict[str, float] = defaultdict(float)
+        self._gauges: dict[str, float] = {}
+
+    @contextmanager
+    def span(self, stage: str, latency: bool = False) -> Iterator[None]:
+        """Times the enclosed block as a call of a stage.
+
+        Parameters
+        ----------
+        stage : str
+        latency : bool
+            Whether the duration is also recorded as a latency sample of the stage.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.add_span(stage, seconds)
+            if latency:
+                self.observe(stage, seconds)
+
+    def add_span(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            span = self._spans[stage]
+            span[0] += 1
+            span[1] += seconds
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[name].append(seconds)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def report(self) -> dict[str, Any]:
+        """Returns the metrics as a JSON serializable dict.
+
+        Returns
+        -------
+        dict[str, Any]
+            started_at, duration_seconds, stages (calls and seconds), latencies (count, sum,
+            p50, p95, p99 and max), counters and gauges.
+        """
+        with self._lock:
+            latencies = {}
+            for name, samples in self._samples.items():
+                ordered = sorted(samples)
+                latencies[name] = {
+                    "count": len(ordered),
+                    "sum": sum(ordered),
+                    **{f"p{round(q * 100)}": quantile(ordered, q) for q in QUANTILES},
+                    "max": ordered[-1],
+                }
+            return {
+                "started_at": self.started_at,
+                "duration_seconds": time.perf_counter() - self._start,
+                "stages": {
+                    stage: {"calls": calls, "seconds": seconds}
+                    for stage, (calls, seconds) in self._spans.items()
+                },
+                "latencies": latencies,
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+            }
+
+    def to_prometheus(self, labels: dict[str, str]) -> str:
+        """Formats the metrics in the Prometheus text exposition format.
+
+        The values are the ones of the run, so all of them are exposed as gauges, except
+        the latencies exposed as histograms, with their quantiles as separate gauges.
+
+        Parameters
+        ----------
+        labels : dict[str, str]
+            Labels added to every sample, e.g. the language pair.
+
+        Returns
+        -------
+        str
+        """
+        report = self.report()
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP trankil_{name} {help_text}")
+            lines.append(f"# TYPE trankil_{name} {kind}")
+
+        def sample(metric_name: str, value: float, /, **extra: str) -> None:
+            all_labels = ",".join(f'{k}="{v}"' for k, v in {**labels, **extra}.items())
+            lines.append(f"trankil_{metric_name}{{{all_labels}}} {float(value)!r}")
+
+        metric("run_started_timestamp_seconds", "gauge", "Start time of the last run.")
+        sample("run_started_timestamp_seconds", report["started_at"])
+        metric("run_duration_seconds", "gauge", "Duration of the last run.")
+        sample("run_duration_seconds", report["duration_seconds"])
+
+        metric("stage_seconds", "gauge", "Time spent in each stage during the last run.")
+        for stage, stage_span in report["stages"].items():
+            sample("stage_seconds", stage_span["seconds"], stage=stage)
+        metric("stage_calls", "gauge", "Number of calls of each stage during the last run.")
+        for stage, stage_span in report["stages"].items():
+            sample("stage_calls", stage_span["calls"], stage=stage)
+
+        metric("latency_seconds", "histogram", "Latencies of the last run.")
+        for name, values in samples.items():
+            for bound, count in _cumulative_buckets(values):
+                sample("latency_seconds_bucket", count, name=name, le=bound)
+            sample("latency_seconds_sum", sum(values), name=name)
+            sample("latency_seconds_count", len(values), name=name)
+        metric("latency_quantile_seconds", "gauge", "Latency quantiles of the last run.")
+        for name, latency in report["latencies"].items():
+            for q in QUANTILES:
+                sample(
+                    "latency_quantile_seconds",
+                    latency[f"p{round(q * 100)}"],
+                    name=name,
+                    quantile=f"{q:g}",
+                )
+
+        for name, value in {**report["counters"], **report["gauges"]}.items():
+            metric(name, "gauge", f"{name.replace('_', ' ').capitalize()} of the last run.")
+            sample(name, value)
+
+        return "\n".join(lines) + "\n"
+
+
+def _cumulative_buckets(sorted_samples: list[float]) -> list[tuple[str, int]]:
+    """Returns the upper bounds of the latency buckets and the number of samples below."""
+    buckets = []
+    count = 0
+    for bound in LATENCY_BUCKETS:
+        while count < len(sorted_samples) and sorted_samples[count] <= bound:
+            count += 1
+        buckets.append((f"{bound:g}", count))
+    buckets.append(("+Inf", len(sorted_samples)))
+    return buckets
+
+
+_current = RunMetrics()
+
+
+def start_run() -> RunMetrics:
+    """Starts recording the metrics of a new run and returns them."""
+    global _current
+    _current = RunMetrics()
+    return _current
+
+
+def span(stage: str, latency: bool = False) -> Any:
+    """Times the enclosed block in the metrics of the current run, see `RunMetrics.span`."""
+    return _current.span(stage, latency)
+
+
+def observe(name: str, seconds: float) -> None:
+    _current.observe(name, seconds)
+
+
+def increment(name: str, value: float = 1) -> None:
+    _current.increment(name, value)
+
+
+def set_gauge(name: str, value: float) -> None:
+    _current.set_gauge(name, value)
+
+
+def _write_atomically(path: Path, text: str) -> None:
+    # The textfile collector may read the file at any time: it must never be partial.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def write_run_metrics(
+    settings: Settings, run: Optional[RunMetrics] = None, all_pairs: bool = False
+) -> tuple[Path, Path]:
+    """Writes the JSON report and the Prometheus textfile of a run.
+
+    Parameters
+    ----------
+    settings : Settings
+    run : Optional[RunMetrics]
+        Metrics to write, those of the current run if None.
+    all_pairs : bool
+        Whether the run covered all the language pairs: the metrics are labelled "all"
+        instead of the language pair and the report is written into the parent folder of
+        the output folders.
+
+    Returns
+    -------
+    tuple[Path, Path]
+        Paths of the JSON report and of the Prometheus file. The Prometheus file is written
+        into the textfile directory of the settings, or next to the report.
+    """
+    run = run or _current
+    pair = "all" if all_pairs else settings.app.pair
+    report_path = settings.app.metrics_report_path
+    if all_pairs:
+        report_path = settings.app.output_folder.parent / report_path.name
+    prometheus_path = (
+        settings.metrics.textfile_dir or report_path.parent
+    ) / f"trankil_{pair}.prom"
+    _write_atomically(report_path, json.dumps(run.report(), indent=2))
+    _write_atomically(prometheus_path, run.to_prometheus({"pair": pair}))
+    return report_path, prometheus_path
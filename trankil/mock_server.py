@@ -0,0 +1,291 @@
+"""Local stand-in of the Linguee API, for the load tests.
+
+The server speaks the `/api/v2/translations` contract of the Linguee API: it answers the
+queries with the recorded responses of a fixtures folder (`<src>_<dst>/<query>.json`, as
+the fixture provider) or with synthetic responses. The latency of the responses follows a
+configurable distribution, a share of the queries fail with a 500 (misspelled word) or a
+503 error, and the server can push back with periodic bursts of 429 errors carrying a
+`Retry-After` header.
+
+Usage:
+    poetry run python -m trankil.mock_server --port 8000 --latency 0.2 --burst-every 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from trankil.synthetic import synthetic_response
+
+TRANSLATIONS_PATH = "/api/v2/translations"
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "lognormal")
+
+
+class MockBehavior:
+    """Behavior of the mock server.
+
+    Parameters
+    ----------
+    latency : float
+        Median latency of the responses, in seconds.
+    latency_distribution : str
+        "constant", "uniform" (between 0 and twice the median) or "lognormal".
+    latency_sigma : float
+        Standard deviation of the logarithm of the latency, for the "lognormal" distribution.
+    error_rate : float
+        Share of the queries failing with a 503 error.
+    spelling_error_rate : float
+        Share of the queries failing with a 500 error, as a misspelled word.
+    burst_every : float
+        Period of the bursts of 429 errors, in seconds, 0 for no burst.
+    burst_duration : float
+        Duration of each burst, in seconds.
+    retry_after : Optional[int]
+        Value of the `Retry-After` header of the 429 and 503 errors, in seconds.
+    fixtures_path : Optional[Path]
+        Folder of the recorded responses, the queries without fixture get a synthetic one.
+    seed : Optional[int]
+        Seed of the random generator.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        latency_distribution: str = "constant",
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        spelling_error_rate: float = 0.0,
+        burst_every: float = 0.0,
+        burst_duration: float = 1.0,
+        retry_after: Optional[int] = 1,
+        fixtures_path: Optional[Path] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_distribution}")
+        self.latency = latency
+        self.latency_distribution = latency_distribution
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.spelling_error_rate = spelling_error_rate
+        self.burst_every = burst_every
+        self.burst_duration = burst_duration
+        self.retry_after = retry_after
+        self.fixtures_path = fixtures_path
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_latency(self) -> float:
+        """Returns the latency of a response, in seconds."""
+        if self.latency <= 0:
+            return 0.0
+        with self._lock:
+            if self.latency_distribution == "uniform":
+                return self._rng.uniform(0, 2 * self.latency)
+            if self.latency_distribution == "lognormal":
+                return self._rng.lognormvariate(math.log(self.latency), self.latency_sigma)
+        return self.latency
+
+    def sample_status(self, elapsed: float) -> int:
+        """Returns the status of a response.
+
+        Parameters
+        ----------
+        elapsed : float
+            Number of seconds since the start of the server, which places the bursts.
+
+        Returns
+        -------
+        int
+        """
+        if self.burst_every > 0 and elapsed % self.burst_every < self.burst_duration:
+            return 429
+        with self._lock:
+            draw = self._rng.random()
+        if draw < self.spelling_error_rate:
+            return 500
+        if draw < self.spelling_error_rate + self.error_rate:
+            return 503
+        return 200
+
+    def response(self, query: str, src: str, dst: str) -> bytes:
+        """Returns the JSON response of a query."""
+        if self.fixtures_path is not None:
+            path = Path(self.fixtures_path) / f"{src}_{dst}" / f"{query}.json"
+            if path.exists():
+                return path.read_bytes()
+        return json.dumps(synthetic_response(query)).encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: MockLingueeServer
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != TRANSLATIONS_PATH:
+            self._send(404, {"detail": "Not Found"})
+            return
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        missing = [key for key in ("query", "src", "dst") if not params.get(key)]
+        if missing:
+            self._send(422, {"detail": f"Missing parameters: {', '.join(missing)}"})
+            return
+
+        mock = self.server.mock
+        time.sleep(mock.behavior.sample_latency())
+        status = mock.behavior.sample_status(time.monotonic() - mock.started_at)
+        mock.record(status)
+        if status == 200:
+            body = mock.behavior.response(params["query"], params["src"], params["dst"])
+            self._send_body(200, body)
+        elif status == 500:
+            self._send(500, {"message": "Internal Server Error"})
+        else:
+            self._send(
+                status, {"message": "Too Many Requests" if status == 429 else "Unavailable"}
+            )
+
+    def _send(self, status: int, payload: dict[str, Any]) -> None:
+        self._send_body(status, json.dumps(payload).encode("utf-8"))
+
+    def _send_body(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        retry_after = self.server.mock.behavior.retry_after
+        if status in (429, 503) and retry_after is not None:
+            self.send_header("Retry-After", str(retry_after))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class MockLingueeServer:
+    """Mock Linguee API served from a background thread.
+
+    Parameters
+    ----------
+    behavior : Optional[MockBehavior]
+        Latencies and errors of the server, a fast and reliable server if None.
+    host : str
+    port : int
+        Port of the server, a free port is picked if 0.
+    """
+
+    def __init__(
+        self, behavior: Optional[MockBehavior] = None, host: str = "127.0.0.1", port: int = 0
+    ) -> None:
+        self.behavior = behavior or MockBehavior()
+        self.statuses: Counter[int] = Counter()
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL of the translations endpoint."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{TRANSLATIONS_PATH}"
+
+    def record(self, status: int) -> None:
+        with self._lock:
+            self.statuses[status] += 1
+
+    def start(self) -> MockLingueeServer:
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="trankil-mock-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self.started_at = time.monotonic()
+        self._httpd.serve_forever()
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+        self._httpd.server_close()
+
+    def __enter__(self) -> MockLingueeServer:
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def add_behavior_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the arguments of `MockBehavior` to a parser, see `behavior_from_args`."""
+    group = parser.add_argument_group("mock server")
+    group.add_argument("--latency", type=float, default=0.05, help="Median latency, in seconds.")
+    group.add_argument(
+        "--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal"
+    )
+    group.add_argument("--latency-sigma", type=float, default=0.5)
+    group.add_argument("--error-rate", type=float, default=0.0, help="Share of 503 errors.")
+    group.add_argument(
+        "--spelling-error-rate", type=float, default=0.0, help="Share of 500 errors."
+    )
+    group.add_argument(
+        "--burst-every", type=float, default=0.0, help="Period of the 429 bursts, in seconds."
+    )
+    group.add_argument("--burst-duration", type=float, default=1.0)
+    group.add_argument("--retry-after", type=int, default=1, help="Retry-After, in seconds.")
+    group.add_argument("--fixtures-path", type=Path, help="Folder of the recorded responses.")
+    group.add_argument("--seed", type=int)
+
+
+def behavior_from_args(args: argparse.Namespace) -> MockBehavior:
+    return MockBehavior(
+        latency=args.latency,
+        latency_distribution=args.latency_distribution,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        spelling_error_rate=args.spelling_error_rate,
+        burst_every=args.burst_every,
+        burst_duration=args.burst_duration,
+        retry_after=args.retry_after,
+        fixtures_path=args.fixtures_path,
+        seed=args.seed,
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local stand-in of the Linguee API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    add_behavior_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = MockLingueeServer(behavior_from_args(args), args.host, args.port)
+    print(f"Mock Linguee API listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        print(f"Responses by status: {dict(sorted(server.statuses.items()))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
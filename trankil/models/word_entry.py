@@ -1,6 +1,9 @@
-from typing import Optional
+from typing import TYPE_CHECKING, Annotated, Any, Literal, Optional, Union
 
-from pydantic import BaseModel
+from pydantic import AfterValidator, BaseModel, Field, TypeAdapter
+
+if TYPE_CHECKING:
+    from trankil.config import PreprocessingSettings
 
 
 class Example(BaseModel):
@@ -21,3 +24,110 @@ class WordEntry(BaseModel):
     text: str
     pos: str
     translations: list[Translation]
+
+
+class _Discarded(BaseModel):
+    """Stand-in of a non featured item, discarded while parsing. Only the `featured` flag of
+    the item is validated, its other fields (e.g. the examples) are skipped without being
+    built.
+    """
+
+    featured: Literal[False]
+
+
+class _DiscardedTranslation(_Discarded):
+    pass
+
+
+class _DiscardedEntry(_Discarded):
+    pass
+
+
+def _drop_discarded(items: list[Any]) -> list[Any]:
+    return [item for item in items if not isinstance(item, _Discarded)]
+
+
+class _FeaturedTranslationsEntry(BaseModel):
+    """Stand-in of a WordEntry parsed with `featured_translations_only`: its non featured
+    translations are discarded without being built."""
+
+    featured: bool
+    text: str
+    pos: str
+    translations: Annotated[
+        list[
+            Annotated[Union[_DiscardedTranslation, Translation], Field(union_mode="left_to_right")]
+        ],
+        AfterValidator(_drop_discarded),
+    ]
+
+
+def _to_word_entries(items: list[Any]) -> list[WordEntry]:
+    return [
+        WordEntry.model_construct(**dict(item))
+        if isinstance(item, _FeaturedTranslationsEntry)
+        else item
+        for item in items
+        if not isinstance(item, _Discarded)
+    ]
+
+
+# Adapters by `featured_entries_only` and `featured_translations_only` rule.
+_WORD_ENTRIES: dict[tuple[bool, bool], TypeAdapter[Any]] = {
+    (False, False): TypeAdapter(list[WordEntry]),
+    (False, True): TypeAdapter(
+        Annotated[list[_FeaturedTranslationsEntry], AfterValidator(_to_word_entries)]
+    ),
+    (True, False): TypeAdapter(
+        Annotated[
+            list[Annotated[Union[_DiscardedEntry, WordEntry], Field(union_mode="left_to_right")]],
+            AfterValidator(_to_word_entries),
+        ]
+    ),
+    (True, True): TypeAdapter(
+        Annotated[
+            list[
+                Annotated[
+                    Union[_DiscardedEntry, _FeaturedTranslationsEntry],
+                    Field(union_mode="left_to_right"),
+                ]
+            ],
+            AfterValidator(_to_word_entries),
+        ]
+    ),
+}
+
+
+def parse_word_entries(
+    data: Union[bytes, str, Any], rules: Optional["PreprocessingSettings"] = None
+) -> list[WordEntry]:
+    """Validates a Linguee API response into a list of WordEntry.
+    A raw JSON response (bytes or str) is validated in a single pass by the pydantic core
+    JSON parser, without building the intermediate Python dicts.
+
+    The filter rules are pushed down into the validation: the non featured entries and
+    translations discarded by the rules are never built, nor their examples.
+
+    Parameters
+    ----------
+    data : Union[bytes, str, Any]
+        Raw JSON response, or the already decoded JSON.
+    rules : Optional[PreprocessingSettings]
+        Filter rules applied while parsing, nothing is filtered if None.
+
+    Returns
+    -------
+    list[WordEntry]
+
+    Raises
+    ------
+    pydantic.ValidationError
+        If the response is not a valid list of entries.
+    """
+    if rules is None:
+        adapter = _WORD_ENTRIES[False, False]
+    else:
+        adapter = _WORD_ENTRIES[rules.featured_entries_only, rules.featured_translations_only]
+    if isinstance(data, (bytes, str)):
+        return adapter.validate_json(data)
+    return adapter.validate_python(data)
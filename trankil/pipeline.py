@@ -0,0 +1,366 @@
+"""Streaming pipeline of the words to be translated.
+
+Each word goes through fetching, preprocessing, rendering and the note store as soon as
+its translation is fetched, then it is checkpointed as done in the work queue: an
+interrupted run loses at most the word being processed. The deck is exported in a
+background thread while the next words are fetched.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+from trankil import metrics
+from trankil.anki.card_generator import generate_note
+from trankil.anki.deck_generator import export_notes, open_note_store
+from trankil.anki.note_store import NoteStore
+from trankil.anki.templates import get_renderer
+from trankil.api.client import iter_linguee_translations
+from trankil.api.providers import error_row
+from trankil.history import HistoryIndex
+from trankil.logger import logger
+from trankil.preprocessing.preprocessing import preprocess_translations
+from trankil.work_queue import PERMANENT, TRANSIENT, UNAVAILABLE
+from trankil.writer import write_errors, write_translated_word
+
+if TYPE_CHECKING:
+    from trankil.api.providers import FetchError
+    from trankil.config import Settings
+    from trankil.models.word_entry import WordEntry
+    from trankil.work_queue import WorkQueue
+
+
+def claim_words(queue: WorkQueue, settings: Settings) -> list[str]:
+    """Releases the words of an interrupted run, imports the new words of the input file
+    and claims the next words to translate.
+
+    Parameters
+    ----------
+    queue : WorkQueue
+    settings : Settings
+
+    Returns
+    -------
+    list[str]
+        At most `settings.app.words_limit` claimed words.
+    """
+    n_released = queue.release_in_flight()
+    if n_released:
+        logger.info("{n_word} words of an interrupted run are pending again", n_word=n_released)
+
+    n_imported = queue.import_csv(
+        settings.app.input_path,
+        settings.app.input_cursor_path,
+        requeue=not settings.app.skip_translated,
+    )
+    logger.info("{n_word_imported} new words imported", n_word_imported=n_imported)
+
+    if settings.app.skip_translated:
+        history = HistoryIndex(settings.app.history_index_path)
+        try:
+            history.sync_csv(settings.app.output_history_path)
+            words = claim_untranslated(queue, settings.app.words_limit, history)
+        finally:
+            history.close()
+    else:
+        words = queue.claim(settings.app.words_limit)
+    logger.info("{n_word_loaded} loaded words", n_word_loaded=len(words))
+    return words
+
+
+def record_translated(words: Iterable[str], settings: Settings) -> None:
+    """Adds the translated words, as they were queried, to the history index.
+
+    Parameters
+    ----------
+    words : Iterable[str]
+    settings : Settings
+    """
+    history = HistoryIndex(settings.app.history_index_path)
+    try:
+        history.add(words)
+    finally:
+        history.close()
+
+
+def claim_untranslated(queue: WorkQueue, n_limit: int, history: HistoryIndex) -> list[str]:
+    """Claims the next words which are not in the history index. The claimed words of the
+    history are marked as done without being fetched.
+
+    Parameters
+    ----------
+    queue : WorkQueue
+    n_limit : int
+        Maximum number of claimed words.
+    history : HistoryIndex
+
+    Returns
+    -------
+    list[str]
+    """
+    words: list[str] = []
+    while len(words) < n_limit:
+        claimed = queue.claim(n_limit - len(words))
+        if not claimed:
+            break
+        known = history.known(claimed)
+        if known:
+            queue.mark_done(known)
+            logger.info("{n_word} words already translated are skipped", n_word=len(known))
+        words.extend(word for word in claimed if word not in known)
+    return words
+
+
+def record_errors(
+    queue: WorkQueue, errors: list[dict[str, Any]], settings: Settings
+) -> list[dict[str, str]]:
+    """Records the failed words in the work queue. The words which failed transiently are
+    retried later, see `WorkQueue.retry_later`, the words whose provider was unavailable are
+    postponed, see `WorkQueue.postpone`, the other ones are marked as failed.
+
+    Parameters
+    ----------
+    queue : WorkQueue
+    errors : list[dict[str, Any]]
+        Error rows of the words, see `error_row`.
+    settings : Settings
+
+    Returns
+    -------
+    list[dict[str, str]]
+        Couples (word, error information) of the words marked as failed, which are not
+        retried.
+    """
+    failed = [error for error in errors if error["kind"] == PERMANENT]
+    queue.mark_failed(failed)
+    unavailable = [error for error in errors if error["kind"] == UNAVAILABLE]
+    if unavailable:
+        queue.postpone(unavailable, settings.app.requeue_max_delay)
+        logger.warning(
+            "{n_word} words are postponed, the provider can't serve them ({error}):"
+            " check its settings",
+            n_word=len(unavailable),
+            error=unavailable[0]["error"],
+        )
+    transient = [error for error in errors if error["kind"] == TRANSIENT]
+    if transient:
+        n_failed = len(failed)
+        failed += queue.retry_later(
+            transient,
+            settings.app.requeue_delay,
+            settings.app.requeue_max_delay,
+            settings.app.requeue_max_attempts,
+        )
+        n_retried = len(transient) - (len(failed) - n_failed)
+        if n_retried:
+            logger.info("{n_word} words will be retried later", n_word=n_retried)
+    return [{"word": error["word"], "error": error["error"]} for error in failed]
+
+
+class BackgroundExporter:
+    """Exports the deck in a background thread, one export at a time and at most once per
+    interval. The exports read the notes through their own connection to the note store.
+
+    Parameters
+    ----------
+    settings : Settings
+    interval : float
+        Minimum number of seconds between two exports.
+    """
+
+    def __init__(self, settings: Settings, interval: float) -> None:
+        self.settings = settings
+        self.interval = interval
+        self.deck_paths: list[Path] = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trankil-export")
+        self._pending: Optional[Future] = None
+        self._last_export = time.monotonic()
+
+    def _export(self) -> Optional[Path]:
+        store = NoteStore(self.settings.app.output_folder / self.settings.deck.notes_store)
+        try:
+            return export_notes(store, self.settings)
+        finally:
+            store.close()
+
+    def _collect(self) -> None:
+        if self._pending is not None:
+            deck_path = self._pending.result()
+            if deck_path is not None:
+                self.deck_paths.append(deck_path)
+            self._pending = None
+
+    def maybe_export(self) -> None:
+        """Starts an export if the previous one is over and the interval has elapsed."""
+        if self._pending is not None and not self._pending.done():
+            return
+        if time.monotonic() - self._last_export < self.interval:
+            return
+        self._collect()
+        self._pending = self._executor.submit(self._export)
+        self._last_export = time.monotonic()
+
+    def close(self, final_export: bool = True) -> list[Path]:
+        """Waits for the running export, exports the last notes and stops the thread.
+
+        Parameters
+        ----------
+        final_export : bool
+            Whether the notes added since the last export are exported.
+
+        Returns
+        -------
+        list[Path]
+            Paths of the packages written by the exporter.
+        """
+        try:
+            self._collect()
+            if final_export:
+                self._pending = self._executor.submit(self._export)
+                self._collect()
+        finally:
+            self._executor.shutdown()
+        return self.deck_paths
+
+
+class WordCheckpointer:
+    """Processes the fetched words of a language pair one by one, from the preprocessing to
+    the note store, and checkpoints each of them.
+
+    Each word is checkpointed once processed: its notes are stored, it is written into the
+    history file, marked as done in the work queue and added to the history index. A failed
+    word is marked as failed and written into the errors file, or retried later if the
+    failure is transient, see `record_errors`.
+    The deck is exported every `settings.deck.export_interval` seconds, and once more when
+    the checkpointer is closed.
+
+    Parameters
+    ----------
+    settings : Settings
+    queue : WorkQueue
+        Work queue of the language pair, where the words are claimed.
+    export : bool
+        Whether the deck is exported, otherwise the notes are only stored.
+    history : Optional[HistoryIndex]
+        History index of the language pair, opened by the checkpointer if None.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        queue: WorkQueue,
+        export: bool = True,
+        history: Optional[HistoryIndex] = None,
+    ) -> None:
+        self.settings = settings
+        self.queue = queue
+        self.export = export
+        self._owns_history = history is None
+        self._history = history or HistoryIndex(settings.app.history_index_path)
+        self.n_translated = 0
+        self.errors: list[dict[str, Any]] = []
+        self._renderer = get_renderer(settings.deck)
+        self._store = open_note_store(settings)
+        self._exporter = BackgroundExporter(
+            settings, settings.deck.export_interval if export else float("inf")
+        )
+
+    def process(
+        self, word: str, entries: Optional[list[WordEntry]], error: Optional[FetchError]
+    ) -> None:
+        """Processes the outcome of the fetching of a word.
+
+        Parameters
+        ----------
+        word : str
+        entries : Optional[list[WordEntry]]
+            Translation data of the word, None if it failed.
+        error : Optional[FetchError]
+            Error of the word, None if it succeeded.
+        """
+        settings = self.settings
+        if error is not None:
+            self.errors.append(error_row(word, error))
+            failed = record_errors(self.queue, [self.errors[-1]], settings)
+            if failed:
+                write_errors(failed, settings.app.output_errors_path)
+            return
+
+        with metrics.span("preprocess"):
+            translations = preprocess_translations([entries], settings.preprocessing)
+        with metrics.span("render"):
+            n_new = self._store.add(
+                generate_note(t, self._renderer, settings.app.pair) for t in translations
+            )
+        if translations:
+            write_translated_word([t.text for t in translations], settings.app.output_history_path)
+        self.queue.mark_done([word])
+        # The queried word is recorded, the texts of its entries may differ (inflections,
+        # corrected spellings) and all of them may have been filtered out.
+        self._history.add([word])
+        self.n_translated += 1
+        logger.info("{word} is translated, {n_new} new notes", word=word, n_new=n_new)
+
+        self._exporter.maybe_export()
+
+    def maybe_export(self) -> None:
+        """Exports the deck if the export interval has elapsed, see `BackgroundExporter`."""
+        if self.export:
+            self._exporter.maybe_export()
+
+    def close(self, completed: bool = True) -> list[Path]:
+        """Closes the note store and exports the last notes if the words were all processed.
+
+        Parameters
+        ----------
+        completed : bool
+            Whether all the claimed words were processed.
+
+        Returns
+        -------
+        list[Path]
+            Paths of the exported packages.
+        """
+        try:
+            self._store.close()
+            if self._owns_history:
+                self._history.close()
+        finally:
+            deck_paths = self._exporter.close(final_export=completed and self.export)
+        return deck_paths
+
+
+def stream_words(
+    words: list[str], settings: Settings, queue: WorkQueue, export: bool = True
+) -> tuple[int, list[dict[str, Any]], list[Path]]:
+    """Translates the words one by one, from fetching to the note store, see
+    `WordCheckpointer` for the processing of each word.
+
+    Parameters
+    ----------
+    words : list[str]
+        Words claimed in the work queue.
+    settings : Settings
+    queue : WorkQueue
+    export : bool
+        Whether the deck is exported, otherwise the notes are only stored.
+
+    Returns
+    -------
+    tuple[int, list[dict[str, Any]], list[Path]]
+        Number of translated words, the errors and the paths of the exported packages.
+    """
+    checkpointer = WordCheckpointer(settings, queue, export)
+    completed = False
+    try:
+        for word, entries, error in iter_linguee_translations(words, settings):
+            checkpointer.process(word, entries, error)
+        completed = True
+    finally:
+        deck_paths = checkpointer.close(completed)
+
+    return checkpointer.n_translated, checkpointer.errors, deck_paths
@@ -1,4 +1,15 @@
-from trankil.models.word_entry import WordEntry
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Optional
+
+from trankil.models.word_entry import Translation, WordEntry
+
+if TYPE_CHECKING:
+    from trankil.config import PreprocessingSettings
+
+# Usage frequencies of the translations returned by the Linguee API, least frequent first.
+USAGE_FREQUENCIES = ("often used", "almost always used")
+_FREQUENCY_RANKS = {frequency: rank for rank, frequency in enumerate(USAGE_FREQUENCIES, 1)}
 
 
 def split_meanings(translations: list[list[WordEntry]]) -> list[WordEntry]:
@@ -40,7 +51,7 @@ def keep_frequent_word(translations: list[WordEntry]) -> list[WordEntry]:
 def keep_frequent_translations(translations: list[WordEntry]) -> list[WordEntry]:
     """Keeps only the frequent translations.
     The Linguee API return a lot of different translation,
-    this function keeps only the frequent ones.
+    this function keeps only the frequent ones. The entries are copied, not modified.
 
     Parameters
     ----------
@@ -50,25 +61,98 @@ def keep_frequent_translations(translations: list[WordEntry]) -> list[WordEntry]
     -------
     list[WordEntry]
     """
-    for translation in translations:
-        translation.translations = [t for t in translation.translations if t.featured]
-    return translations
+    return [
+        translation.model_copy(
+            update={"translations": [t for t in translation.translations if t.featured]}
+        )
+        for translation in translations
+    ]
+
+
+def _pos_class(pos: str) -> str:
+    """Returns the class of a part of speech, e.g. "noun" for "noun, masculine"."""
+    return pos.split(",", 1)[0].strip()
+
+
+def _compile_rules(
+    rules: Optional["PreprocessingSettings"],
+) -> tuple[Callable[[WordEntry], bool], Callable[[Translation], bool], Optional[int]]:
+    """Compiles the rules into the predicates of the entries and of the translations, and
+    the maximum number of translations of an entry."""
+    if rules is None:
+        return (lambda entry: entry.featured), (lambda t: t.featured), None
+
+    featured_entries = rules.featured_entries_only
+    allowed_pos = frozenset(rules.allowed_pos)
+    featured_translations = rules.featured_translations_only
+    min_rank = _FREQUENCY_RANKS[rules.min_usage_frequency] if rules.min_usage_frequency else 0
+
+    def keep_entry(entry: WordEntry) -> bool:
+        return (entry.featured or not featured_entries) and (
+            not allowed_pos or _pos_class(entry.pos) in allowed_pos
+        )
 
+    def keep_translation(translation: Translation) -> bool:
+        return (translation.featured or not featured_translations) and (
+            _FREQUENCY_RANKS.get(translation.usage_frequency, 0) >= min_rank
+        )
 
-def preprocess_translations(translations: list[list[WordEntry]]) -> list[WordEntry]:
-    """Applies all the preprocessing steps to the Linguee translation to generate Anki cards.
+    return keep_entry, keep_translation, rules.max_translations
+
+
+def iter_preprocessed(
+    translations: Iterable[list[WordEntry]], rules: Optional["PreprocessingSettings"] = None
+) -> Iterator[WordEntry]:
+    """Applies the preprocessing rules to the Linguee translations in a single pass, and
+    yields each entry, i.e. each card, as soon as it is filtered.
+
+    The different meanings of a word (its entries) give different cards. An entry is kept
+    if it is featured and its part of speech is allowed, and only its featured translations
+    used at least `min_usage_frequency` are kept, at most `max_translations` of them.
+    The input is not modified: the entries whose translations are filtered are copies.
 
     Parameters
     ----------
-    translations : list[list[WordEntry]]
+    translations : Iterable[list[WordEntry]]
+        Raw translations, the entries of each word. It may be a lazy iterable.
+    rules : Optional[PreprocessingSettings]
+        Filter rules, only the featured entries and translations are kept if None.
+
+    Yields
+    ------
+    WordEntry
+        Preprocessed entry.
+    """
+    keep_entry, keep_translation, max_translations = _compile_rules(rules)
+    for entries in translations:
+        for entry in entries:
+            if not keep_entry(entry):
+                continue
+            kept = list(islice(filter(keep_translation, entry.translations), max_translations))
+            if len(kept) == len(entry.translations):
+                yield entry
+            else:
+                yield entry.model_copy(update={"translations": kept})
+
+
+def preprocess_translations(
+    translations: Iterable[list[WordEntry]], rules: Optional["PreprocessingSettings"] = None
+) -> list[WordEntry]:
+    """Applies all the preprocessing steps to the Linguee translation to generate Anki cards,
+    see `iter_preprocessed`.
+    The featured filters are usually pushed down into the parsing of the responses already
+    (see `parse_word_entries`), they are applied again for the entries built otherwise.
+
+    Parameters
+    ----------
+    translations : Iterable[list[WordEntry]]
         Raw translations.
+    rules : Optional[PreprocessingSettings]
+        Filter rules, only the featured entries and translations are kept if None.
 
     Returns
     -------
     list[WordEntry]
         Preprocessed translation.
     """
-    translations = split_meanings(translations)
-    translations = keep_frequent_word(translations)
-    translations = keep_frequent_translations(translations)
-    return translations
+    return list(iter_preprocessed(translations, rules))
@@ -1,16 +1,87 @@
 import csv
+import hashlib
+import json
+import os
+from collections.abc import Iterator
+from itertools import islice
 from pathlib import Path
-from typing import Union
+from typing import Any, Optional, Union
 
+WORD_COLUMN = "word_to_translate"
 
-def read_input_csv(file_path: Union[str, Path], n_limit: int) -> list[str]:
+
+def iter_input_csv(
+    file_path: Union[str, Path], offset: int = 0, column_name: str = WORD_COLUMN
+) -> Iterator[tuple[str, int]]:
+    """Yields the words to be translated from a csv file, reading it lazily.
+
+    Parameters
+    ----------
+    file_path : Union[str, Path]
+    offset : int
+        Byte offset where the reading resumes, as yielded by a previous reading.
+        The reading starts after the header if the offset is 0 or doesn't match
+        the beginning of a row.
+    column_name : str
+        Column of the words, 'word_to_translate' by default.
+
+    Yields
+    ------
+    tuple[str, int]
+        The word and the byte offset following its row.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the file doesn't exist.
+    ValueError
+        If the CSV file is empty or missing the required column.
+    """
+    path = Path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"No file found : {path}")
+
+    with path.open("rb") as f:
+        header_line = f.readline().decode("utf-8")
+        header = next(csv.reader([header_line]), None)
+
+        if not header:
+            raise ValueError(f"CSV file is empty or missing headers: {path}")
+
+        if column_name not in header:
+            raise ValueError(f"Missing column '{column_name}' in CSV file.")
+
+        column = header.index(column_name)
+
+        if offset > f.tell() and offset <= path.stat().st_size:
+            f.seek(offset - 1)
+            if f.read(1) != b"\n":
+                f.seek(len(header_line.encode("utf-8")))
+
+        position = f.tell()
+
+        def lines() -> Iterator[str]:
+            nonlocal position
+            for line in iter(f.readline, b""):
+                position = f.tell()
+                yield line.decode("utf-8")
+
+        for row in csv.reader(lines()):
+            if len(row) > column:
+                yield row[column], position
+
+
+def read_input_csv(file_path: Union[str, Path], n_limit: int, offset: int = 0) -> list[str]:
     """Reads words from csv file to be translated.
+    The file is read lazily and the reading stops after n_limit words.
 
     Parameters
     ----------
     file_path : Union[str, Path]
     n_limit : int
         Limited number of words to be loaded in the list and translated by Trankil.
+    offset : int
+        Byte offset where the reading resumes, see `iter_input_csv`.
 
     Returns
     -------
@@ -24,17 +95,92 @@ def read_input_csv(file_path: Union[str, Path], n_limit: int) -> list[str]:
     ValueError
         If the CSV file is empty or missing the required 'word_to_translate' column.
     """
+    return [word for word, _ in islice(iter_input_csv(file_path, offset), n_limit)]
+
+
+def _prefix_hash(file_path: Path, offset: int) -> str:
+    digest = hashlib.sha256()
+    with file_path.open("rb") as f:
+        while offset > 0 and (chunk := f.read(min(offset, 1 << 20))):
+            digest.update(chunk)
+            offset -= len(chunk)
+    return digest.hexdigest()
+
+
+def file_identity(file_path: Union[str, Path], offset: int) -> dict[str, Any]:
+    """Returns the identity of a file up to a byte offset: its inode and the hash of its
+    bytes before the offset.
+
+    Parameters
+    ----------
+    file_path : Union[str, Path]
+    offset : int
+
+    Returns
+    -------
+    dict[str, Any]
+        "inode" and "prefix_sha256".
+    """
     path = Path(file_path)
+    return {"inode": path.stat().st_ino, "prefix_sha256": _prefix_hash(path, offset)}
+
+
+def load_cursor(
+    cursor_path: Union[str, Path], file_path: Optional[Union[str, Path]] = None
+) -> int:
+    """Loads the persisted byte offset, 0 if there is no cursor.
+
+    Parameters
+    ----------
+    cursor_path : Union[str, Path]
+    file_path : Optional[Union[str, Path]]
+        File read up to the offset. If set, 0 is returned as well when the file doesn't
+        match the identity saved with the cursor: replaced, truncated or rewritten before
+        the offset, so that it is read again from the header.
+
+    Returns
+    -------
+    int
+    """
+    path = Path(cursor_path)
     if not path.exists():
-        raise FileNotFoundError(f"No file found : {path}")
+        return 0
+    text = path.read_text(encoding="utf-8").strip()
+    if not text.startswith("{"):
+        # Cursor saved by a previous version, without the identity of the file.
+        return int(text or 0)
 
-    with path.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+    cursor = json.loads(text)
+    offset = cursor["offset"]
+    if file_path is None or not offset:
+        return offset
+    file_path = Path(file_path)
+    if (
+        not file_path.exists()
+        or file_path.stat().st_size < offset
+        or file_identity(file_path, offset) != cursor.get("identity")
+    ):
+        return 0
+    return offset
 
-        if reader.fieldnames is None:
-            raise ValueError(f"CSV file is empty or missing headers: {path}")
 
-        if "word_to_translate" not in reader.fieldnames:
-            raise ValueError("Missing column 'word_to_translate' in CSV file.")
+def save_cursor(
+    cursor_path: Union[str, Path], offset: int, file_path: Optional[Union[str, Path]] = None
+) -> None:
+    """Persists a byte offset, with the identity of the file read up to it if set, see
+    `file_identity`. The file is replaced atomically.
 
-        return [row["word_to_translate"] for row in reader][:n_limit]
+    Parameters
+    ----------
+    cursor_path : Union[str, Path]
+    offset : int
+    file_path : Optional[Union[str, Path]]
+    """
+    path = Path(cursor_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cursor: dict[str, Any] = {"offset": offset}
+    if file_path is not None:
+        cursor["identity"] = file_identity(file_path, offset)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(cursor), encoding="utf-8")
+    os.replace(tmp_path, path)
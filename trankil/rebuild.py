@@ -0,0 +1,231 @@
+"""Rebuild of the notes from the archive of the raw API responses.
+
+The archived responses are preprocessed and rendered again in a process pool, chunk by
+chunk, so a change of the preprocessing or of the card layout applies to all the existing
+cards without calling the API. The rebuilt notes replace the note store and are exported
+in a single full package. They keep the GUIDs of the previous notes of their meanings, and
+of the notes stored by the previous versions, so that Anki updates the existing cards.
+"""
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from trankil.anki.card_generator import generate_note, legacy_guid
+from trankil.anki.deck_generator import export_notes, open_note_store
+from trankil.anki.note_store import NoteStore
+from trankil.anki.templates import get_renderer
+from trankil.api.archive import ResponseArchive
+from trankil.api.cache import ResponseCache
+from trankil.logger import logger
+from trankil.models.word_entry import parse_word_entries
+from trankil.preprocessing.preprocessing import iter_preprocessed
+
+if TYPE_CHECKING:
+    from trankil.config import DeckSettings, PreprocessingSettings, Settings
+
+
+def render_chunk(
+    payloads: list[str],
+    deck_settings: Optional[DeckSettings] = None,
+    rules: Optional[PreprocessingSettings] = None,
+    pair: Optional[str] = None,
+) -> list[dict[str, str]]:
+    """Preprocesses and renders the notes of a chunk of raw responses.
+
+    Parameters
+    ----------
+    payloads : list[str]
+        JSON encoded responses of the Linguee API.
+    deck_settings : Optional[DeckSettings]
+        Settings holding the card templates, the default templates are used if None.
+    rules : Optional[PreprocessingSettings]
+        Filter rules, all the filters are applied if None.
+    pair : Optional[str]
+        Language pair, the notes get the GUIDs of their source entries if set.
+
+    Returns
+    -------
+    list[dict[str, str]]
+        HTML notes with the "front", "back" and "overflow" keys, and the "guid", "key" and
+        "legacy_guid" keys if the pair is set, see `keep_previous_guids`.
+    """
+    translations = iter_preprocessed(
+        (parse_word_entries(payload, rules) for payload in payloads), rules
+    )
+    renderer = None if deck_settings is None else get_renderer(deck_settings)
+    notes = []
+    for t in translations:
+        note = generate_note(t, renderer, pair)
+        if pair is not None:
+            note["legacy_guid"] = legacy_guid(t)
+        notes.append(note)
+    return notes
+
+
+def render_in_pool(
+    chunks: Iterable[list[str]],
+    workers: Optional[int] = None,
+    deck_settings: Optional[DeckSettings] = None,
+    rules: Optional[PreprocessingSettings] = None,
+    pair: Optional[str] = None,
+) -> Iterator[list[dict[str, str]]]:
+    """Renders the chunks in a process pool and yields the notes in the order of the chunks.
+    Only a few chunks per worker are in flight, so the archive is never loaded in memory.
+
+    Parameters
+    ----------
+    chunks : Iterable[list[str]]
+        Chunks of JSON encoded responses.
+    workers : Optional[int]
+        Number of processes, the number of CPUs if None.
+    deck_settings : Optional[DeckSettings]
+        Settings holding the card templates, compiled once in each process.
+    rules : Optional[PreprocessingSettings]
+        Filter rules.
+    pair : Optional[str]
+        Language pair, the notes get the GUIDs of their source entries if set.
+
+    Yields
+    ------
+    list[dict[str, str]]
+        HTML notes of a chunk.
+    """
+    workers = workers or os.cpu_count() or 1
+    pending: deque[Future] = deque()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in chunks:
+            pending.append(executor.submit(render_chunk, chunk, deck_settings, rules, pair))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def keep_previous_guids(
+    notes: list[dict[str, str]], previous: NoteStore, adopted: set[str]
+) -> list[dict[str, str]]:
+    """Gives the rebuilt notes the GUIDs of the previous notes of their meanings, or else of
+    the notes stored by the previous versions, without meaning key, which had the GUID of
+    their fields rendered with the default templates.
+
+    Parameters
+    ----------
+    notes : list[dict[str, str]]
+        Rebuilt notes, with their "key" and "legacy_guid" keys.
+    previous : NoteStore
+        Note store before the rebuild.
+    adopted : set[str]
+        GUIDs of the legacy notes already given to a rebuilt note, updated.
+
+    Returns
+    -------
+    list[dict[str, str]]
+    """
+    for note in notes:
+        legacy = note.pop("legacy_guid", None)
+        if "key" not in note:
+            continue
+        guid = previous.guid_of_key(note["key"])
+        if guid is None and legacy not in adopted and previous.has_legacy_note(legacy):
+            guid = legacy
+            adopted.add(guid)
+        if guid is not None:
+            note["guid"] = guid
+    return notes
+
+
+def _seed_from_cache(archive: ResponseArchive, settings: Settings) -> None:
+    if not settings.api.cache_enabled or not settings.api.cache_path.exists():
+        return
+    cache = ResponseCache(
+        settings.api.cache_path, settings.api.cache_ttl, settings.api.cache_max_entries
+    )
+    try:
+        n_seeded = archive.add_missing(cache.iter_responses(settings.app.src, settings.app.dst))
+    finally:
+        cache.close()
+    if n_seeded:
+        logger.info("{n_word} responses archived from the cache", n_word=n_seeded)
+
+
+def rebuild_notes(settings: Settings, export: bool = True) -> Optional[Path]:
+    """Rebuilds the note store from the archived responses and exports all the notes.
+
+    The responses still in the response cache are archived first. The previous note store
+    is kept with a ".bak" suffix: its notes of the words missing from the archive are not
+    rebuilt. The rebuilt notes keep the GUIDs of the previous ones, see
+    `keep_previous_guids`.
+
+    Parameters
+    ----------
+    settings : Settings
+    export : bool
+        Whether all the notes are exported once rebuilt.
+
+    Returns
+    -------
+    Optional[Path]
+        Path of the exported package, None if the archive is empty or nothing is exported.
+    """
+    # Migrates the legacy json file, so its old notes are not added to the rebuilt store.
+    previous_store = open_note_store(settings)
+    n_previous = len(previous_store)
+
+    archive = ResponseArchive(settings.app.archive_path)
+    adopted: set[str] = set()
+    try:
+        _seed_from_cache(archive, settings)
+        if not len(archive):
+            logger.warning("No archived response, nothing to rebuild.")
+            return None
+
+        store_path = settings.app.output_folder / settings.deck.notes_store
+        rebuild_path = store_path.with_name(store_path.name + ".rebuild")
+        rebuild_path.unlink(missing_ok=True)
+
+        store = NoteStore(rebuild_path)
+        try:
+            for notes in render_in_pool(
+                archive.iter_chunks(settings.app.rebuild_chunk_size),
+                settings.app.rebuild_workers,
+                settings.deck,
+                settings.preprocessing,
+                settings.app.pair,
+            ):
+                store.add(keep_previous_guids(notes, previous_store, adopted))
+            n_notes = len(store)
+        finally:
+            store.close()
+        n_words = len(archive)
+    finally:
+        archive.close()
+        previous_store.close()
+
+    if store_path.exists():
+        os.replace(store_path, store_path.with_name(store_path.name + ".bak"))
+    os.replace(rebuild_path, store_path)
+    logger.info(
+        "{n_notes} notes rebuilt from {n_words} archived responses ({n_previous} before)",
+        n_notes=n_notes,
+        n_words=n_words,
+        n_previous=n_previous,
+    )
+
+    if not export:
+        return None
+
+    store = NoteStore(store_path)
+    try:
+        deck_path = export_notes(store, settings, full=True)
+        # The full package holds every note: the next delta export starts after them.
+        store.mark_exported("delta", *store.snapshot())
+    finally:
+        store.close()
+    return deck_path
@@ -0,0 +1,71 @@
+"""Synthetic Linguee API responses, for the benchmarks and the load tests.
+
+The responses have the shape of the Linguee API ones, including the fields Trankil
+ignores, and are reproducible from a seed.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Any, Optional
+
+_POS = ["noun, masculine", "noun, feminine", "verb", "adjective", "adverb"]
+_FREQUENCIES = [None, "often used", "almost always used"]
+
+
+def synthetic_response(
+    word: str,
+    n_entries: int = 3,
+    n_translations: int = 8,
+    n_examples: int = 3,
+    seed: Optional[int] = None,
+) -> list[dict[str, Any]]:
+    """Builds a synthetic response of the Linguee API for a word.
+
+    Parameters
+    ----------
+    word : str
+        Queried word.
+    n_entries : int
+        Number of entries, i.e. source words.
+    n_translations : int
+        Number of translations per entry.
+    n_examples : int
+        Number of examples per translation.
+    seed : Optional[int]
+        Seed of the random generator, the word is used if None.
+
+    Returns
+    -------
+    list[dict[str, Any]]
+        Decoded JSON response.
+    """
+    rng = random.Random(word if seed is None else seed)
+    return [
+        {
+            "featured": i == 0 or rng.random() < 0.3,
+            "text": word if i == 0 else f"{word}_{i}",
+            "pos": rng.choice(_POS),
+            "forms": [],
+            "grammar_info": None,
+            "audio_links": [{"url": f"https://example.com/{word}_{i}.mp3", "lang": "French"}],
+            "translations": [
+                {
+                    "featured": j < 3 or rng.random() < 0.2,
+                    "text": f"{word}_translation_{i}_{j}",
+                    "pos": rng.choice(_POS),
+                    "audio_links": [],
+                    "usage_frequency": rng.choice(_FREQUENCIES),
+                    "examples": [
+                        {
+                            "src": f"Une phrase d'exemple avec {word}, numéro {k}.",
+                            "dst": f"An example sentence with {word}_translation_{i}_{j}, #{k}.",
+                        }
+                        for k in range(n_examples)
+                    ],
+                }
+                for j in range(n_translations)
+            ],
+        }
+        for i in range(n_entries)
+    ]
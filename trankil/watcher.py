@@ -0,0 +1,162 @@
+"""Watchers of the input file.
+
+On Linux the file is watched with inotify, called through ctypes; elsewhere, or when
+inotify is not available, its size and modification time are polled.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Optional, Protocol, Union
+
+from trankil.logger import logger
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class FileWatcher(Protocol):
+    def wait(self, timeout: float) -> bool:
+        """Waits at most `timeout` seconds for a change of the file.
+
+        Returns
+        -------
+        bool
+            Whether the file changed.
+        """
+
+    def close(self) -> None: ...
+
+
+class InotifyWatcher:
+    """Watches a file with inotify. The folder of the file is watched, so the file may be
+    created or replaced.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        Path of the watched file, its folder is created if needed.
+
+    Raises
+    ------
+    OSError
+        If inotify is not available.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        try:
+            init, add_watch = libc.inotify_init1, libc.inotify_add_watch
+        except AttributeError as e:
+            raise OSError("inotify is not available") from e
+
+        self._fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if add_watch(self._fd, os.fsencode(self.path.parent), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed on {self.path.parent}")
+
+    def wait(self, timeout: float) -> bool:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return False
+        changed = False
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(buffer):
+                _, _, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = buffer[offset : offset + length].rstrip(b"\0")
+                offset += length
+                changed = changed or os.fsdecode(name) == self.path.name
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Watches a file by polling its size and modification time.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        Path of the watched file.
+    interval : float
+        Minimum number of seconds between two polls.
+    """
+
+    def __init__(self, path: Union[str, Path], interval: float = 5) -> None:
+        self.path = Path(path)
+        self.interval = interval
+        self._signature = self._stat()
+        self._last_poll = time.monotonic()
+
+    def _stat(self) -> Optional[tuple[int, int, int]]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def wait(self, timeout: float) -> bool:
+        next_poll = self._last_poll + self.interval
+        delay = next_poll - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return False
+        time.sleep(max(0.0, delay))
+
+        self._last_poll = time.monotonic()
+        signature = self._stat()
+        changed = signature != self._signature
+        self._signature = signature
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+def make_watcher(
+    path: Union[str, Path], kind: str = "auto", poll_interval: float = 5
+) -> FileWatcher:
+    """Builds the watcher of a file.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+    kind : str
+        "inotify", "polling", or "auto" for inotify when available and polling otherwise.
+    poll_interval : float
+        Polling interval, in seconds.
+
+    Returns
+    -------
+    FileWatcher
+    """
+    if kind == "inotify" or (kind == "auto" and sys.platform.startswith("linux")):
+        try:
+            return InotifyWatcher(path)
+        except OSError as e:
+            if kind == "inotify":
+                raise
+            logger.warning("inotify is not available ({error}), polling the file", error=e)
+    return PollingWatcher(path, poll_interval)
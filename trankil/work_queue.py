@@ -0,0 +1,336 @@
+"""Durable work queue of the words to be translated.
+
+The words are imported from the input csv file and their state is tracked in SQLite:
+pending, in flight (claimed by a run), done or failed. A run claims a batch of pending
+words and updates their state once processed, so the input file is never rewritten.
+The words whose fetching failed transiently, or whose provider was unavailable, are pending
+again after a delay, and every failure is logged in an indexed table of errors.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from trankil.reader import iter_input_csv, load_cursor, save_cursor
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+PERMANENT = "permanent"
+TRANSIENT = "transient"
+UNAVAILABLE = "unavailable"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS words (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    word TEXT NOT NULL UNIQUE,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_words_state ON words (state, seq);
+CREATE TABLE IF NOT EXISTS errors (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    word TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    error TEXT NOT NULL,
+    attempt INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_errors_word ON errors (word, created_at);
+CREATE INDEX IF NOT EXISTS idx_errors_kind ON errors (kind, created_at);
+"""
+
+
+class WorkQueue:
+    """SQLite-backed queue of the words to be translated.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        Path of the SQLite database. The parent folders are created if needed.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(words)")}
+        if "next_attempt_at" not in columns:
+            # Queue created by a previous version.
+            with self._conn:
+                self._conn.execute(
+                    "ALTER TABLE words ADD COLUMN next_attempt_at REAL NOT NULL DEFAULT 0"
+                )
+
+    def enqueue(self, words: Iterable[str], requeue: bool = False) -> int:
+        """Adds the words as pending, the words already in the queue are ignored.
+
+        Parameters
+        ----------
+        words : Iterable[str]
+        requeue : bool
+            Whether the words already done or failed are pending again, as new words.
+
+        Returns
+        -------
+        int
+            Number of new words.
+        """
+        n_before = self._conn.total_changes
+        now = time.time()
+        with self._conn:
+            if requeue:
+                self._conn.executemany(
+                    "INSERT INTO words (word, state, updated_at) VALUES (?, ?, ?)"
+                    " ON CONFLICT (word) DO UPDATE SET state = excluded.state, attempts = 0,"
+                    " error = NULL, updated_at = excluded.updated_at, next_attempt_at = 0"
+                    " WHERE state IN (?, ?)",
+                    ((word, PENDING, now, DONE, FAILED) for word in words if word),
+                )
+            else:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO words (word, state, updated_at) VALUES (?, ?, ?)",
+                    ((word, PENDING, now) for word in words if word),
+                )
+        return self._conn.total_changes - n_before
+
+    def import_csv(
+        self, csv_path: Union[str, Path], cursor_path: Union[str, Path], requeue: bool = False
+    ) -> int:
+        """Imports the rows added to the input csv file since the last import. If the file
+        was rewritten since, it is scanned again from the header: the words already queued
+        are ignored, none of them is pending again.
+
+        Parameters
+        ----------
+        csv_path : Union[str, Path]
+            Input csv file with the 'word_to_translate' column.
+        cursor_path : Union[str, Path]
+            File holding the byte offset where the last import ended.
+        requeue : bool
+            Whether the words added again to the file are pending again once done or
+            failed, otherwise they are ignored.
+
+        Returns
+        -------
+        int
+            Number of new words.
+        """
+        offset = load_cursor(cursor_path, csv_path)
+        if not offset and load_cursor(cursor_path):
+            # Imported here: the status command reads the queue without loading loguru.
+            from trankil.logger import logger
+
+            logger.info("The input file changed since the last import, it is scanned again")
+            requeue = False
+
+        def words() -> Iterable[str]:
+            nonlocal offset
+            for word, next_offset in iter_input_csv(csv_path, offset):
+                offset = next_offset
+                yield word
+
+        n_new = self.enqueue(words(), requeue)
+        save_cursor(cursor_path, offset, csv_path)
+        return n_new
+
+    def claim(self, n_limit: int) -> list[str]:
+        """Claims the oldest pending words whose retry delay is over, they are marked in
+        flight.
+
+        Parameters
+        ----------
+        n_limit : int
+            Maximum number of claimed words.
+
+        Returns
+        -------
+        list[str]
+        """
+        now = time.time()
+        with self._conn:
+            rows = self._conn.execute(
+                "SELECT seq, word FROM words WHERE state = ? AND next_attempt_at <= ?"
+                " ORDER BY seq LIMIT ?",
+                (PENDING, now, n_limit),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE words SET state = ?, attempts = attempts + 1, updated_at = ?"
+                " WHERE seq = ?",
+                ((IN_FLIGHT, now, seq) for seq, _ in rows),
+            )
+        return [word for _, word in rows]
+
+    def mark_done(self, words: Iterable[str]) -> None:
+        """Marks the words as done.
+
+        Parameters
+        ----------
+        words : Iterable[str]
+        """
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE words SET state = ?, error = NULL, updated_at = ? WHERE word = ?",
+                ((DONE, now, word) for word in words),
+            )
+
+    def _log_errors(self, errors: list[dict[str, str]], kind: str, now: float) -> None:
+        self._conn.executemany(
+            "INSERT INTO errors (word, kind, error, attempt, created_at)"
+            " SELECT word, ?, ?, attempts, ? FROM words WHERE word = ?",
+            ((kind, e["error"], now, e["word"]) for e in errors),
+        )
+
+    def mark_failed(self, errors: Iterable[dict[str, str]], kind: str = PERMANENT) -> None:
+        """Marks the words as failed.
+
+        Parameters
+        ----------
+        errors : Iterable[dict[str, str]]
+            Couples (word, error information).
+        kind : str
+            Kind of the failures, logged with the errors.
+        """
+        errors = list(errors)
+        now = time.time()
+        with self._conn:
+            self._log_errors(errors, kind, now)
+            self._conn.executemany(
+                "UPDATE words SET state = ?, error = ?, updated_at = ? WHERE word = ?",
+                ((FAILED, e["error"], now, e["word"]) for e in errors),
+            )
+
+    def retry_later(
+        self, errors: Iterable[dict[str, str]], delay: float, max_delay: float, max_attempts: int
+    ) -> list[dict[str, str]]:
+        """Puts the words which failed transiently back as pending, claimable once a delay
+        doubling with each attempt is over. The words which reached the maximum number of
+        attempts are marked as failed.
+
+        Parameters
+        ----------
+        errors : Iterable[dict[str, str]]
+            Couples (word, error information).
+        delay : float
+            Delay after the first attempt, in seconds.
+        max_delay : float
+            Maximum delay, in seconds.
+        max_attempts : int
+            Maximum number of attempts of a word.
+
+        Returns
+        -------
+        list[dict[str, str]]
+            Errors of the words marked as failed.
+        """
+        errors = list(errors)
+        now = time.time()
+        failed = []
+        with self._conn:
+            self._log_errors(errors, TRANSIENT, now)
+            for error in errors:
+                row = self._conn.execute(
+                    "SELECT attempts FROM words WHERE word = ?", (error["word"],)
+                ).fetchone()
+                attempts = row[0] if row else max_attempts
+                if attempts >= max_attempts:
+                    failed.append(error)
+                    state, next_attempt_at = FAILED, 0.0
+                else:
+                    state = PENDING
+                    next_attempt_at = now + min(max_delay, delay * 2 ** max(0, attempts - 1))
+                self._conn.execute(
+                    "UPDATE words SET state = ?, error = ?, updated_at = ?, next_attempt_at = ?"
+                    " WHERE word = ?",
+                    (state, error["error"], now, next_attempt_at, error["word"]),
+                )
+        return failed
+
+    def postpone(self, errors: Iterable[dict[str, str]], delay: float) -> None:
+        """Puts the words whose provider was unavailable back as pending, claimable once the
+        delay is over. The attempt isn't counted, the failure says nothing about the word.
+
+        Parameters
+        ----------
+        errors : Iterable[dict[str, str]]
+            Couples (word, error information).
+        delay : float
+            Delay before the next attempt, in seconds.
+        """
+        errors = list(errors)
+        now = time.time()
+        with self._conn:
+            self._log_errors(errors, UNAVAILABLE, now)
+            self._conn.executemany(
+                "UPDATE words SET state = ?, attempts = MAX(0, attempts - 1), error = ?,"
+                " updated_at = ?, next_attempt_at = ? WHERE word = ?",
+                ((PENDING, e["error"], now, now + delay, e["word"]) for e in errors),
+            )
+
+    def error_log(
+        self, word: Optional[str] = None, kind: Optional[str] = None
+    ) -> list[dict[str, Any]]:
+        """Returns the logged errors, oldest first.
+
+        Parameters
+        ----------
+        word : Optional[str]
+            Only the errors of this word if set.
+        kind : Optional[str]
+            Only the errors of this kind (permanent, transient or unavailable) if set.
+
+        Returns
+        -------
+        list[dict[str, Any]]
+            Errors with their word, kind, message, attempt and time.
+        """
+        query = "SELECT word, kind, error, attempt, created_at FROM errors"
+        conditions, params = [], []
+        if word is not None:
+            conditions.append("word = ?")
+            params.append(word)
+        if kind is not None:
+            conditions.append("kind = ?")
+            params.append(kind)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        columns = ("word", "kind", "error", "attempt", "created_at")
+        return [
+            dict(zip(columns, row))
+            for row in self._conn.execute(query + " ORDER BY created_at, id", params)
+        ]
+
+    def release_in_flight(self) -> int:
+        """Puts back the words claimed by an interrupted run as pending.
+
+        Returns
+        -------
+        int
+            Number of released words.
+        """
+        with self._conn:
+            cursor = self._conn.execute(
+                "UPDATE words SET state = ?, updated_at = ? WHERE state = ?",
+                (PENDING, time.time(), IN_FLIGHT),
+            )
+        return cursor.rowcount
+
+    def counts(self) -> dict[str, int]:
+        """Returns the number of words by state."""
+        counts = dict.fromkeys((PENDING, IN_FLIGHT, DONE, FAILED), 0)
+        counts.update(self._conn.execute("SELECT state, COUNT(*) FROM words GROUP BY state"))
+        return counts
+
+    def close(self) -> None:
+        self._conn.close()
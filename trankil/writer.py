@@ -45,33 +45,6 @@ def write_errors(data: list[dict[str, str]], output_path: Union[str, Path]) -> N
         writer.writerows(data)
 
 
-def remove_translated_word_from_csv(
-    translated_words_to_remove: list[str], csv_path: Union[str, Path]
-) -> None:
-    """Removes the correct translated word from the original file.
-
-    Parameters
-    ----------
-    translated_words_to_remove : list[str]
-        Words to be removed.
-    csv_path : Union[str, Path]
-    """
-    csv_path = Path(csv_path)
-
-    with open(csv_path, newline="", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        header = next(reader)
-        words = [row[0] for row in reader]
-
-    words_filtered = [w for w in words if w not in translated_words_to_remove]
-
-    with open(csv_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(header)
-        for w in words_filtered:
-            writer.writerow([w])
-
-
 def write_translated_word(words: list[str], output_path: Union[str, Path]) -> None:
     """Writes the translated words into the history file.
     If the history file doesn't exist, the function creates it.